@@ -0,0 +1,240 @@
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+import maya.mel as mel
+
+from ncloth_index import get_index
+
+# APPLY ENGINE #
+# Reads nCloth attributes in bulk, diffs them against a preset and writes only the changed plugs #
+#######################################################################################
+
+#Values closer than this are treated as equal so float noise does not trigger a write
+TOLERANCE = 1e-6
+
+#Read the current values of the given attributes from every node through the API (no command per plug)
+def read_attributes(nodes, attributes):
+    selection = om.MSelectionList()
+    for node in nodes:
+        selection.add(node)
+
+    values = {}
+    for index, node in enumerate(nodes):
+        dep_node = om.MFnDependencyNode(selection.getDependNode(index))
+        values[node] = {attr: dep_node.findPlug(attr, False).asDouble() for attr in attributes}
+    return values
+
+#Return only the attributes whose target value differs from the current value
+def attribute_delta(current, target, tolerance=TOLERANCE):
+    delta = {}
+    for attr, value in target.items():
+        old_value = current.get(attr)
+        if old_value is None or abs(old_value - value) > tolerance:
+            delta[attr] = value
+    return delta
+
+#Build the MEL setAttr statement for a single plug (ints are kept as ints for enum and int attributes)
+def set_attr_command(node, attr, value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f'setAttr "{node}.{attr}" {value};'
+    return f'setAttr "{node}.{attr}" {float(value)!r};'
+
+#Write every pending plug change for all nodes in a single host call, returns the number of plugs written
+def write_attributes(writes):
+    commands = [set_attr_command(node, attr, value) for node, values in writes.items() for attr, value in values.items()]
+    if commands:
+        mel.eval("\n".join(commands))
+    return len(commands)
+
+#######################################################################################
+# HEADLESS APPLY #
+# Applies presets to explicit node names, never reads the selection or opens a dialog #
+#######################################################################################
+
+#Find the nCloth nodes connected to a transform or mesh shape (an object's input and output shapes share one nCloth node)
+#Resolved from the scene index, only objects the index doesn't know about cost a host call to check they exist
+def find_ncloth_nodes(obj):
+    ncloth_nodes = get_index().ncloth_nodes(obj)
+    if not ncloth_nodes and not cmds.objExists(obj):
+        raise RuntimeError(f"No object matches name: {obj}")
+    return ncloth_nodes
+
+#Create nCloth for all given objects with a single createNCloth call
+#createNCloth only works on the selection, so the user's selection is restored straight afterwards
+def create_ncloth(objects):
+    previous_selection = cmds.ls(selection=True)
+    cmds.select(objects, replace=True)
+    try:
+        mel.eval("createNCloth 0")
+    finally:
+        if previous_selection:
+            cmds.select(previous_selection, replace=True)
+        else:
+            cmds.select(clear=True)
+
+#Apply presets to a list of (node, preset) pairs and return one result dictionary per pair
+#Objects without nCloth get it created in one batch when create_missing is True, otherwise they are reported as "no_ncloth"
+#transactional applies everything as one undo step with refresh suspended, and rolls back every node if any write fails
+def apply_presets(assignments, create_missing=True, transactional=False):
+    results = [{"node": node, "preset": preset.name, "values": preset.sim_values(), "ncloth": [],
+                "status": None, "written": 0, "skipped": 0, "error": None} for node, preset in assignments]
+
+    if transactional:
+        _apply_transaction(results, create_missing)
+    else:
+        _apply(results, create_missing)
+
+    for result in results:
+        result.pop("values")
+        result.pop("writes", None)
+    return results
+
+#Resolve, create, diff and write for a list of result dictionaries
+#If transaction is given (a dictionary), the prior values of every node, the nCloth nodes created and what createNCloth
+#changed besides them (input shapes made intermediate, a new nucleus) are recorded in it
+#and a failed write is raised instead of being retried per object
+def _apply(results, create_missing, transaction=None):
+
+    #Resolve the nCloth nodes of every object, objects that don't exist are reported and skipped
+    missing = []
+    for result in results:
+        try:
+            result["ncloth"] = find_ncloth_nodes(result["node"])
+        except (RuntimeError, ValueError) as error:
+            result["status"] = "error"
+            result["error"] = str(error)
+            continue
+        if not result["ncloth"]:
+            missing.append(result)
+
+    if missing and create_missing:
+        objects = [result["node"] for result in missing]
+        if transaction is not None:
+            shapes = (cmds.listRelatives(objects, shapes=True, type="mesh") or []) + (cmds.ls(objects, type="mesh") or [])
+            transaction["shapes"] = read_attributes(list(dict.fromkeys(shapes)), ["intermediateObject"])
+            nuclei = set(cmds.ls(type="nucleus") or [])
+        create_ncloth(objects)
+        for result in missing:
+            result["ncloth"] = find_ncloth_nodes(result["node"])
+            if transaction is not None:
+                transaction["created"].extend(result["ncloth"])
+        if transaction is not None:
+            transaction["nuclei"] = [node for node in cmds.ls(type="nucleus") or [] if node not in nuclei]
+
+    for result in results:
+        if result["status"] is None and not result["ncloth"]:
+            result["status"] = "no_ncloth"
+    pending = [result for result in results if result["status"] is None]
+
+    #Read every nCloth node once, then diff each assignment against the (running) current values
+    ncloth_nodes = list(dict.fromkeys(node for result in pending for node in result["ncloth"]))
+    attributes = list(dict.fromkeys(attr for result in pending for attr in result["values"]))
+    current = read_attributes(ncloth_nodes, attributes)
+    if transaction is not None:
+        created = set(transaction["created"])
+        transaction["priors"] = {node: dict(values) for node, values in current.items() if node not in created}
+
+    for result in pending:
+        writes = {}
+        for node in result["ncloth"]:
+            delta = attribute_delta(current[node], result["values"])
+            current[node].update(delta)
+            result["skipped"] += len(result["values"]) - len(delta)
+            if delta:
+                writes[node] = delta
+        result["writes"] = writes
+
+    #Write all changes in one host call, if it fails retry per object so the error can be reported against the right node
+    all_writes = {}
+    for result in pending:
+        for node, values in result["writes"].items():
+            all_writes.setdefault(node, {}).update(values)
+    try:
+        write_attributes(all_writes)
+        batch_failed = False
+    except RuntimeError:
+        if transaction is not None:
+            raise
+        batch_failed = True
+
+    for result in pending:
+        if batch_failed:
+            try:
+                write_attributes(result["writes"])
+            except RuntimeError as error:
+                result["status"] = "error"
+                result["error"] = str(error)
+                continue
+        result["written"] = sum(len(values) for values in result["writes"].values())
+        result["status"] = "applied" if result["written"] else "unchanged"
+
+#######################################################################################
+# TRANSACTIONAL APPLY #
+# One undo chunk and no viewport redraws for the whole apply, the scene is left untouched if anything fails #
+#######################################################################################
+
+#Name of the undo step an apply shows up as in Maya's undo queue
+UNDO_CHUNK = "PAM Apply Preset"
+
+def _apply_transaction(results, create_missing):
+    transaction = {"priors": {}, "created": [], "shapes": {}, "nuclei": []}
+    failure = None
+
+    #A failed apply is rolled back from the recorded prior values inside its own chunk, never with cmds.undo():
+    #if the failure comes before the first undoable edit the chunk is empty, and an undo would revert the user's previous edit
+    #Restoring inside the chunk leaves nothing in the undo queue that changes the scene, with undo on or off
+    cmds.undoInfo(openChunk=True, chunkName=UNDO_CHUNK)
+    cmds.refresh(suspend=True)
+    try:
+        try:
+            _apply(results, create_missing, transaction)
+        except Exception as error:
+            failure = error
+            restore(transaction)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+        cmds.refresh(suspend=False)
+
+    if failure is None:
+        return
+
+    for result in results:
+        if result["status"] in (None, "applied", "unchanged"):
+            result["status"] = "rolled_back"
+            result["error"] = str(failure)
+            result["written"] = 0
+    if not isinstance(failure, RuntimeError):
+        raise failure
+
+#Put nodes back to their prior values (only plugs that changed are written) and undo nCloth creation by the apply:
+#its nCloth nodes, output meshes and any nucleus it made are deleted and the input shapes are no longer intermediate
+def restore(transaction):
+    created = transaction["created"]
+    if created:
+        outputs = cmds.listConnections([node + ".outputMesh" for node in created], source=False, type="mesh") or []
+        cmds.delete(outputs + (cmds.listRelatives(created, parent=True) or created))
+    nuclei = [node for node in transaction["nuclei"] if cmds.objExists(node)]
+    if nuclei:
+        cmds.delete(nuclei)
+
+    #Input shapes and nCloth nodes hold different attributes, so each group is read on its own
+    writes = {}
+    for priors in (transaction["shapes"], transaction["priors"]):
+        attributes = list(dict.fromkeys(attr for values in priors.values() for attr in values))
+        current = read_attributes(list(priors), attributes)
+        for node, values in priors.items():
+            delta = attribute_delta(current[node], values)
+            if delta:
+                writes[node] = delta
+    return write_attributes(writes)
+
+#Total up a list of apply results for reporting
+def summarize(results):
+    summary = {"nodes": len(results), "written": 0, "skipped": 0, "errors": 0, "rolled_back": 0}
+    for result in results:
+        summary["written"] += result["written"]
+        summary["skipped"] += result["skipped"]
+        summary["errors"] += result["status"] == "error"
+        summary["rolled_back"] += result["status"] == "rolled_back"
+    return summary
+
+#######################################################################################
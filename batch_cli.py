@@ -0,0 +1,256 @@
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# BATCH COMMAND LINE #
+# Applies presets to many scene files without the UI, one standalone Maya session per worker process #
+# Objects are matched to presets by name rules, every scene gets a JSON result file with its timings #
+#
+#   mayapy batch_cli.py --library /shows/abc/pam --rule "*_shirt*=T-Shirt Cotton" --rule "*jeans*=Heavy Denim" \
+#       --output results shots/*.ma
+#######################################################################################
+
+#Library loaded once per worker process by initialize_worker
+_library = None
+
+#######################################################################################
+# RULES AND LIBRARY #
+#######################################################################################
+
+#Turn "pattern=preset" strings (and an optional JSON file of {pattern: preset}) into an ordered list of (pattern, preset)
+#The first rule whose pattern matches an object's name decides its preset
+def parse_rules(rule_strings=(), rules_file=None):
+    rules = []
+    if rules_file:
+        with open(rules_file, 'r') as file:
+            rules.extend(json.load(file).items())
+    for rule in rule_strings:
+        pattern, separator, preset_name = rule.partition("=")
+        if not separator or not pattern.strip() or not preset_name.strip():
+            raise ValueError(f"Rule '{rule}' is not in the form pattern=preset")
+        rules.append((pattern.strip(), preset_name.strip()))
+    return rules
+
+#Preset name for an object from the rules, None if no rule matches
+def match_preset(obj, rules):
+    for pattern, preset_name in rules:
+        if fnmatch.fnmatchcase(obj, pattern):
+            return preset_name
+    return None
+
+#Folder holding presets.json for a --library path (the folder, or the presets.json file itself)
+def library_directory(path):
+    return os.path.dirname(path) if os.path.basename(path) == "presets.json" else path
+
+#Check in the parent process that the library can be read before any worker starts, returns its folder
+#Only the JSON is checked (the parent has no Maya session to build presets in), raises OSError or ValueError with a one-line reason
+def check_library(path):
+    directory = library_directory(path)
+    file_path = os.path.join(directory, "presets.json")
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"No presets.json in '{directory}'")
+    with open(file_path, 'rb') as file:
+        try:
+            data = json.load(file)
+        except ValueError as error:
+            raise ValueError(f"{file_path} is not valid JSON ({error})") from None
+    if not isinstance(data, dict):
+        raise ValueError(f"{file_path} is not a preset library (a JSON object of presets)")
+    return directory
+
+#Built-in presets with the library at path on top (a folder holding presets.json, or the presets.json file itself)
+def load_library(path):
+    from all_presets import presets as builtin_presets
+    from json_manager import JsonManager
+
+    directory = library_directory(path)
+    if not os.path.exists(os.path.join(directory, "presets.json")):
+        raise FileNotFoundError(f"No presets.json in '{directory}'")
+
+    library = dict(builtin_presets)
+    library.update(JsonManager(directory, snapshot=False, create=False).load_presets().items())
+    return library
+
+#######################################################################################
+# WORKER #
+#######################################################################################
+
+#Process pool initializer: start a standalone Maya session (or install the stand-in maya package) and load the library
+def initialize_worker(library_path, use_fake_maya=False):
+    global _library
+    if use_fake_maya:
+        import fake_maya
+        fake_maya.install()
+    else:
+        import atexit
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+        atexit.register(maya.standalone.uninitialize)
+
+    _library = load_library(library_path)
+
+#Mesh objects in the open scene (transforms with a mesh shape), in scene order
+def scene_objects():
+    import maya.cmds as cmds
+    shapes = cmds.ls(type="mesh") or []
+    return list(dict.fromkeys(cmds.listRelatives(shapes, parent=True) or []))
+
+#Open one scene, apply the matched presets, save it and write its JSON result, returns the result
+def process_scene(scene_path, rules, result_path, create_missing=True, save=True):
+    import maya.cmds as cmds
+    from apply_engine import apply_presets, summarize
+    from preset_journal import atomic_write
+
+    result = {"scene": scene_path, "status": None, "error": None, "worker": os.getpid(),
+              "objects": 0, "matched": 0, "summary": None, "results": [], "unknown_presets": [], "timings": {}}
+    timings = result["timings"]
+    started = time.perf_counter()
+    try:
+        start = time.perf_counter()
+        cmds.file(scene_path, open=True, force=True)
+        timings["open"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        objects = scene_objects()
+        assignments = []
+        for obj in objects:
+            preset_name = match_preset(obj, rules)
+            if preset_name is None:
+                continue
+            if preset_name not in _library:
+                if preset_name not in result["unknown_presets"]:
+                    result["unknown_presets"].append(preset_name)
+                continue
+            assignments.append((obj, _library[preset_name]))
+        result["objects"] = len(objects)
+        result["matched"] = len(assignments)
+        timings["match"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        result["results"] = apply_presets(assignments, create_missing=create_missing, transactional=True)
+        result["summary"] = summarize(result["results"])
+        timings["apply"] = (time.perf_counter() - start) * 1000
+
+        #A rolled back scene is left as it was on disk
+        if result["summary"]["rolled_back"]:
+            result["status"] = "rolled_back"
+        elif save and result["summary"]["written"]:
+            start = time.perf_counter()
+            cmds.file(save=True, force=True)
+            timings["save"] = (time.perf_counter() - start) * 1000
+            result["status"] = "saved"
+        else:
+            result["status"] = "unchanged" if not result["summary"]["written"] else "applied"
+
+    except Exception as error:
+        result["status"] = "error"
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    timings["total"] = (time.perf_counter() - started) * 1000
+    atomic_write(result_path, json.dumps(result, indent=4).encode("utf-8"))
+    return result
+
+#######################################################################################
+# COMMAND LINE #
+#######################################################################################
+
+#One result file name per scene, scenes with the same file name in different folders get a number added
+def result_names(scenes):
+    names = []
+    used = set()
+    for scene in scenes:
+        stem = os.path.splitext(os.path.basename(scene))[0]
+        name = stem
+        number = 2
+        while name in used:
+            name = f"{stem}_{number}"
+            number += 1
+        used.add(name)
+        names.append(name + ".json")
+    return names
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Apply PAM nCloth presets to many scene files without the UI")
+    parser.add_argument("scenes", nargs="*", help="scene files to process")
+    parser.add_argument("--scene-list", help="text file with one scene path per line (added to the scenes given)")
+    parser.add_argument("--library", required=True, help="folder holding presets.json (or the presets.json file)")
+    parser.add_argument("--rule", action="append", default=[], metavar="PATTERN=PRESET",
+                        help="objects whose name matches the glob pattern get the preset, first matching rule wins (repeatable)")
+    parser.add_argument("--rules", help="JSON file of {pattern: preset} rules, checked before --rule rules")
+    parser.add_argument("--output", default="pam_batch_results", help="folder the per-scene JSON results are written to")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: one per core)")
+    parser.add_argument("--no-create", action="store_true", help="only update objects that already have nCloth")
+    parser.add_argument("--no-save", action="store_true", help="apply without saving the scenes (dry run)")
+    parser.add_argument("--fake-maya", action="store_true", help="use the in-process stand-in maya package (scenes are fake_maya JSON files)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    scenes = list(args.scenes)
+    if args.scene_list:
+        with open(args.scene_list, 'r') as file:
+            scenes.extend(line.strip() for line in file if line.strip())
+    if not scenes:
+        print("PAM: No scenes given", file=sys.stderr)
+        return 2
+
+    try:
+        rules = parse_rules(args.rule, args.rules)
+    except (OSError, ValueError) as error:
+        print(f"PAM: {error}", file=sys.stderr)
+        return 2
+    if not rules:
+        print("PAM: No rules given, use --rule pattern=preset or --rules file.json", file=sys.stderr)
+        return 2
+
+    #A library every worker would fail to load is reported once here instead of breaking the pool
+    try:
+        check_library(args.library)
+    except (OSError, ValueError) as error:
+        print(f"PAM: {error}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    workers = min(args.workers or os.cpu_count() or 1, len(scenes))
+    result_paths = [os.path.join(args.output, name) for name in result_names(scenes)]
+
+    start = time.perf_counter()
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker, initargs=(args.library, args.fake_maya)) as pool:
+            futures = [pool.submit(process_scene, scene, rules, result_path, not args.no_create, not args.no_save)
+                       for scene, result_path in zip(scenes, result_paths)]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"PAM: [{len(results)}/{len(scenes)}] {result['scene']}: {result['status']} "
+                      f"({result['matched']} object(s), {result['timings']['total']:.0f} ms)"
+                      + (f" {result['error']}" if result["error"] else ""))
+
+    #A worker that couldn't start its Maya session or load the library (or crashed) stops the whole pool
+    except BrokenProcessPool:
+        print(f"PAM: A worker process failed to start or died, {len(results)} of {len(scenes)} scene(s) processed "
+              f"(results in {args.output})", file=sys.stderr)
+        return 1
+    wall_time = time.perf_counter() - start
+
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    summary = {"scenes": len(scenes), "workers": workers, "wall_seconds": wall_time, "statuses": statuses,
+               "scene_seconds": sum(result["timings"]["total"] for result in results) / 1000}
+    with open(os.path.join(args.output, "summary.json"), 'w') as file:
+        json.dump(summary, file, indent=4)
+    print(f"PAM: Processed {len(scenes)} scene(s) with {workers} worker(s) in {wall_time:.1f} s, "
+          + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+
+    return 1 if statuses.get("error") or statuses.get("rolled_back") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from all_presets import presets
+from attr_preset_io import export_attr_presets, import_attr_presets, parse_file, preset_from_parsed, summarize_import
+from json_manager import JsonManager
+from preset import INT_ATTRIBUTES, SIM_ATTRIBUTES
+
+# BENCHMARK: MAYA ATTRIBUTE PRESET IMPORT #
+# Migrating a folder of Maya nCloth presets (.mel) into the library: one add_preset per file as a script looping over #
+# the files would, vs the importer parsing in this process and in a process pool with one bulk write, then exporting them back #
+#######################################################################################
+
+#Attributes a real nCloth preset carries besides the 21 PAM manages (booleans, floats, colours, strings)
+EXTRA_ATTRIBUTES = ([(f"collisionFlag{i}", "int") for i in range(30)] + [(f"inputAttract{i}", "float") for i in range(50)]
+                    + [(f"displayColor{i}", "color") for i in range(10)] + [(f"cacheName{i}", "string") for i in range(5)])
+
+#Text of one synthetic nCloth attribute preset
+def preset_file_text(rng, base):
+    lines = ["//Maya Preset File", "//Version 2", "//Maya 2024", "//-nodeType nCloth", 'startAttrPreset( "nCloth" );']
+    values = base.sim_values()
+    for attr in SIM_ATTRIBUTES:
+        value = values[attr] if attr in INT_ATTRIBUTES else round(values[attr] * rng.uniform(0.8, 1.2), 4)
+        lines.append(f'\tblendAttr "{attr}" {value};')
+    for attr, kind in EXTRA_ATTRIBUTES:
+        if kind == "int":
+            lines.append(f'\tblendAttr "{attr}" {rng.randint(0, 1)};')
+        elif kind == "float":
+            lines.append(f'\tblendAttr "{attr}" {rng.random():.4f};')
+        elif kind == "color":
+            lines.append(f'\tblendAttr "{attr}" {rng.random():.3f} {rng.random():.3f} {rng.random():.3f};')
+        else:
+            lines.append(f'\tblendAttrStr "{attr}" "cache_{rng.randint(0, 999)}";')
+    lines.append("endAttrPreset();")
+    return "\n".join(lines) + "\n"
+
+#Folder of synthetic preset files spread over a few sub folders, as a show's archive would be
+def make_archive(directory, count, seed=1):
+    rng = random.Random(seed)
+    bases = [preset for name, preset in presets.items() if name not in ("Custom", "Default")]
+    for i in range(count):
+        folder = os.path.join(directory, f"show_{i % 8}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"cloth_{i:05d}.mel"), 'w') as file:
+            file.write(preset_file_text(rng, rng.choice(bases)))
+
+#Fresh library folder holding the built-in presets
+def fresh_store(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    store = JsonManager(directory, snapshot=False)
+    store.save_presets(dict(presets))
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark importing Maya nCloth attribute presets into a PAM library")
+    parser.add_argument("--files", type=int, default=3000, help="preset files in the archive")
+    parser.add_argument("--single", type=int, default=100, help="files imported one add_preset at a time (extrapolated to all)")
+    parser.add_argument("--workers", type=int, default=0, help="pool workers (default: one per core)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="pam_attr_presets_")
+    try:
+        archive = os.path.join(root, "archive")
+        library = os.path.join(root, "library")
+        make_archive(archive, args.files)
+        paths = sorted(os.path.join(folder, name) for folder, _, names in os.walk(archive) for name in names)
+        print(f"{args.files} preset files, {len(SIM_ATTRIBUTES) + len(EXTRA_ATTRIBUTES)} attributes each, "
+              f"{os.cpu_count()} core(s)")
+
+        #One file at a time, each saved on its own
+        store = fresh_store(library)
+        start = time.perf_counter()
+        for path in paths[:args.single]:
+            parsed = parse_file(path)
+            name = os.path.splitext(os.path.basename(path))[0]
+            store.add_preset(name, preset_from_parsed(parsed, name)[0])
+        single_time = (time.perf_counter() - start) / args.single * len(paths)
+        print(f"one add_preset per file: {single_time:.1f} s for all files (extrapolated from {args.single})")
+
+        for label, workers in (("importer, parsed in this process", 1), ("importer, process pool", args.workers or None)):
+            store = fresh_store(library)
+            result = import_attr_presets(archive, store, workers=workers)
+            timings = result["timings"]
+            print(f"{label}: {timings['total'] / 1000:.2f} s (parse {timings['parse']:.0f} ms, convert {timings['convert']:.0f} ms, "
+                  f"write {timings['write']:.0f} ms)")
+        print(f"    {summarize_import(result)}")
+        loaded = JsonManager(library, snapshot=False).load_presets()
+        assert all(name in loaded for name in result["presets"])
+
+        start = time.perf_counter()
+        exported = export_attr_presets(result["presets"], os.path.join(root, "exported"))
+        print(f"export {len(exported)} presets back to .mel: {(time.perf_counter() - start) * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
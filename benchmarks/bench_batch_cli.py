@@ -0,0 +1,82 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+import batch_cli
+from all_presets import presets
+from json_manager import JsonManager
+
+# BENCHMARK: BATCH COMMAND LINE #
+# Processes the same set of fake_maya scene files with 1, 2, 4... worker processes and reports the speed-up #
+#######################################################################################
+
+#Write scene files holding shirts (with nCloth) and trousers (without) for the rules to match
+def make_scenes(directory, count, objects):
+    scenes = []
+    for i in range(count):
+        fake_maya.reset_scene()
+        for j in range(objects):
+            transform = fake_maya.create_mesh(f"shot{i:03d}_shirt{j:03d}" if j % 2 else f"shot{i:03d}_trousers{j:03d}")
+            if j % 2:
+                fake_maya.make_ncloth(transform)
+        scenes.append(os.path.join(directory, f"shot{i:03d}.json"))
+        cmds.file(rename=scenes[-1])
+        cmds.file(save=True)
+    return scenes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch_cli scaling over worker processes")
+    parser.add_argument("--scenes", type=int, default=32, help="scene files to process")
+    parser.add_argument("--objects", type=int, default=400, help="mesh objects per scene")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        library = os.path.join(root, "library")
+        os.makedirs(library)
+        JsonManager(library, snapshot=False).save_presets(dict(presets))
+
+        print(f"{args.scenes} scenes x {args.objects} objects, {os.cpu_count()} core(s)")
+        print(f"{'workers':>8} {'wall s':>8} {'speed-up':>9} {'scene s':>8}")
+        baseline = None
+        for workers in args.workers:
+            scenes_dir = os.path.join(root, f"scenes{workers}")
+            os.makedirs(scenes_dir)
+            scenes = make_scenes(scenes_dir, args.scenes, args.objects)
+            output = os.path.join(root, f"results{workers}")
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                code = batch_cli.main(["--fake-maya", "--library", library, "--rule", "*shirt*=Silk",
+                                       "--rule", "*trousers*=Heavy Denim", "--output", output,
+                                       "--workers", str(workers)] + scenes)
+            wall = time.perf_counter() - start
+            assert code == 0, code
+
+            with open(os.path.join(output, "summary.json")) as file:
+                summary = json.load(file)
+            assert summary["statuses"] == {"saved": args.scenes}, summary
+            with open(os.path.join(output, "shot000.json")) as file:
+                assert json.load(file)["matched"] == args.objects
+
+            baseline = baseline or wall
+            print(f"{workers:>8} {wall:>8.2f} {baseline / wall:>8.2f}x {summary['scene_seconds']:>8.2f}")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from bench_storage import make_library
+from json_manager import JsonManager
+
+# BENCHMARK: BINARY PRESET LIBRARY #
+# Open and single-preset read cost of the memory-mapped binary library vs loading presets.json #
+#######################################################################################
+
+def timed(func, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats * 1e6, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the binary preset library")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="library sizes to test")
+    args = parser.parse_args()
+
+    print(f"{'presets':>8} {'json load us':>14} {'open us':>10} {'find us':>10} {'values us':>10} {'preset us':>10} {'table us':>10}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            library = make_library(size)
+            store = JsonManager(directory, snapshot=False)
+            store.save_presets(library)
+            store.export_binary()
+            name = next(reversed(library))
+
+            json_load, _ = timed(lambda: JsonManager(directory, snapshot=False).load_presets())
+            opened, binary = timed(lambda: store.open_binary(), 100)
+            find, row = timed(lambda: binary.find(name), 1000)
+            values, _ = timed(lambda: binary.row_values(row), 1000)
+            preset, _ = timed(lambda: binary[name], 1000)
+            table, _ = timed(lambda: binary.table())
+
+            assert binary[name].to_dict() == library[name].to_dict(), "binary library disagrees with JSON"
+            print(f"{size:>8} {json_load:>14.0f} {opened:>10.1f} {find:>10.1f} {values:>10.1f} {preset:>10.1f} {table:>10.0f}")
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+import instrumentation
+from ui_manager import UiManager
+
+# BENCHMARK: INSTRUMENTATION #
+# Cost of select_preset, slider edits and Apply with instrumentation off and on, then the recorded per-operation report #
+#######################################################################################
+
+def session(ui, objects, repeats):
+    names = ["Silk", "Heavy Denim", "Chiffon", "Thick Leather"]
+    slider = ui.ncloth_controls["friction"]
+    for i in range(repeats):
+        ui.select_preset(names[i % len(names)])
+        fake_maya.user_edit(slider, (i % 100) / 100.0)
+        cmds.select(objects, replace=True)
+        ui.identify_and_apply_preset()
+
+#Microseconds per host call made in a tight loop
+def per_call(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        cmds.objExists("garment0")
+    return (time.perf_counter() - start) * 1e6 / calls
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark instrumentation overhead and show its report")
+    parser.add_argument("--repeats", type=int, default=200, help="select / edit / apply rounds per measurement")
+    parser.add_argument("--objects", type=int, default=20, help="objects the preset is applied to")
+    args = parser.parse_args()
+
+    state.env["MAYA_APP_DIR"] = tempfile.mkdtemp(prefix="pam_bench_")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ui = UiManager()
+        ui.create_UI()
+    objects = fake_maya.build_scene(args.objects)
+
+    #Cost added to a single host call
+    calls = 100000
+    bare = min(per_call(calls) for _ in range(3))
+    instrumentation.enable(trace=False)
+    wrapped = min(per_call(calls) for _ in range(3))
+    instrumentation.disable()
+    restored = min(per_call(calls) for _ in range(3))
+    print(f"one host call: {bare:.2f} us off, {wrapped:.2f} us recording, {restored:.2f} us after disable()")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        session(ui, objects, 10)
+        off = min(timed(lambda: session(ui, objects, args.repeats)) for _ in range(3))
+        instrumentation.enable(trace=False)
+        stats_only = min(timed(lambda: session(ui, objects, args.repeats)) for _ in range(3))
+        instrumentation.enable(trace=True)
+        traced = timed(lambda: session(ui, objects, args.repeats))
+        recorder = instrumentation.disable()
+        off_again = min(timed(lambda: session(ui, objects, args.repeats)) for _ in range(3))
+
+    assert not hasattr(cmds.setAttr, "__pam_original__"), "host functions not restored"
+    print(f"{args.repeats} rounds of select / slider edit / apply on {args.objects} objects")
+    print(f"  off          {off:8.1f} ms")
+    print(f"  statistics   {stats_only:8.1f} ms  ({stats_only / off - 1:+.0%})")
+    print(f"  with trace   {traced:8.1f} ms  ({traced / off - 1:+.0%})")
+    print(f"  off again    {off_again:8.1f} ms")
+    print()
+    print(instrumentation.summary_text(recorder))
+
+    directory = tempfile.mkdtemp(prefix="pam_trace_")
+    instrumentation.export_all(directory, recorder)
+    with open(os.path.join(directory, "pam_trace.json")) as file:
+        trace = json.load(file)
+    print(f"\n{len(trace['traceEvents'])} trace events written to {directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from bench_storage import make_library
+from json_manager import JsonManager
+from library_layers import LayeredLibrary, LibraryLayer
+
+# BENCHMARK: LAYERED LIBRARIES #
+# Sequential vs parallel loading of studio / project / user libraries, with local directories standing in for network shares #
+# A share's round-trip is simulated with a sleep per file access, an unreachable share with a sleep longer than the timeout #
+#######################################################################################
+
+class SlowLayer(LibraryLayer):
+
+    #A layer on a share that takes latency seconds to answer every file access
+    def __init__(self, name, directory, latency):
+        LibraryLayer.__init__(self, name, directory)
+        self.latency = latency
+
+    def stamp(self):
+        time.sleep(self.latency)
+        return LibraryLayer.stamp(self)
+
+    def load(self):
+        time.sleep(self.latency)
+        return LibraryLayer.load(self)
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+#The same per-layer work (stamp check and load) done one layer after another on the calling thread
+def load_sequential(library):
+    merged = {}
+    for layer in library.layers:
+        layer.stamp()
+        merged.update(layer.load().items())
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs parallel layered library loading")
+    parser.add_argument("--presets", type=int, default=5000, help="presets per shared layer")
+    parser.add_argument("--latency", type=float, default=200.0, help="simulated share latency per file access in milliseconds")
+    parser.add_argument("--timeout", type=float, default=1.0, help="layer timeout in seconds")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        directories = {}
+        for name in ("studio", "project", "user"):
+            directories[name] = os.path.join(root, name)
+            os.makedirs(directories[name])
+        JsonManager(directories["studio"], snapshot=False).save_presets(make_library(args.presets, seed=1))
+        JsonManager(directories["project"], snapshot=False).save_presets(make_library(args.presets // 5, seed=2))
+        user_store = JsonManager(directories["user"], snapshot=False)
+        user_store.save_presets(make_library(50, seed=3))
+
+        latency = args.latency / 1000
+        layers = [SlowLayer("studio", directories["studio"], latency), SlowLayer("project", directories["project"], latency)]
+        library = LayeredLibrary(user_store, layers, timeout=args.timeout)
+
+        _, sequential = timed(lambda: load_sequential(library))
+        merged, cold = timed(library.load)
+        again, warm = timed(library.load)
+        assert merged == again and not library.unavailable
+
+        print(f"{'load':>24} {'ms':>10}")
+        print(f"{'sequential':>24} {sequential:>10.1f}")
+        print(f"{'parallel (cold)':>24} {cold:>10.1f}")
+        print(f"{'parallel (unchanged)':>24} {warm:>10.1f}")
+
+        #A share that never answers in time: the load returns after the timeout without its presets
+        hung = LayeredLibrary(user_store, [SlowLayer("studio", directories["studio"], args.timeout * 3),
+                                           SlowLayer("project", directories["project"], latency)], timeout=args.timeout)
+        partial, hung_time = timed(hung.load)
+        print(f"{'studio unreachable':>24} {hung_time:>10.1f}  (unavailable: {', '.join(hung.unavailable)}, {len(partial)} presets)")
+        library.close()
+        hung.close()
+        print(f"{len(merged)} presets merged")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
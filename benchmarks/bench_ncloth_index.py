@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+from ncloth_index import NClothIndex
+
+# BENCHMARK: NCLOTH NODE RESOLUTION #
+# Compares per-object graph queries (listRelatives + listConnections) with lookups from NClothIndex #
+#######################################################################################
+
+#Resolve nCloth nodes the way apply_preset used to, two graph queries per object
+def resolve_unindexed(objects):
+    found = {}
+    for obj in objects:
+        found[obj] = []
+        for shape in cmds.listRelatives(obj, shapes=True) or []:
+            found[obj].extend(cmds.listConnections(shape, type="nCloth") or [])
+        found[obj] = list(dict.fromkeys(found[obj]))
+    return found
+
+def resolve_indexed(index, objects):
+    return {obj: index.ncloth_nodes(obj) for obj in objects}
+
+#Time a function over several repeats (one repeat = one Apply click on every object)
+def measure(func, repeats):
+    state.reset_calls()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed = time.perf_counter() - start
+    return result, elapsed, sum(state.calls.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed vs unindexed nCloth node resolution")
+    parser.add_argument("--nodes", type=int, default=1000, help="number of nCloth meshes in the synthetic scene")
+    parser.add_argument("--repeats", type=int, default=10, help="number of resolution passes over every object")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated cost of one host call in microseconds")
+    args = parser.parse_args()
+
+    objects = fake_maya.build_scene(args.nodes)
+    state.call_latency = args.latency / 1e6
+
+    unindexed, unindexed_time, unindexed_calls = measure(lambda: resolve_unindexed(objects), args.repeats)
+
+    index = NClothIndex()
+    index.install_callbacks()
+    build_start = time.perf_counter()
+    state.reset_calls()
+    index.build()
+    build_time = time.perf_counter() - build_start
+    build_calls = sum(state.calls.values())
+    indexed, indexed_time, indexed_calls = measure(lambda: resolve_indexed(index, objects), args.repeats)
+    index.remove_callbacks()
+
+    assert unindexed == indexed, "indexed resolution disagrees with graph queries"
+
+    print(f"{args.nodes} nCloth objects, {args.repeats} passes, {args.latency:.0f}us per host call")
+    print(f"  unindexed : {unindexed_time * 1000:9.2f} ms  {unindexed_calls:7d} host calls")
+    print(f"  index build: {build_time * 1000:8.2f} ms  {build_calls:7d} host calls (once per scene)")
+    print(f"  indexed   : {indexed_time * 1000:9.2f} ms  {indexed_calls:7d} host calls")
+    print(f"  speedup   : {unindexed_time / max(indexed_time + build_time, 1e-9):9.1f}x including build")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from bench_storage import make_library
+from json_manager import JsonManager
+from preset import Preset, ATTRIBUTE_RANGES, SIM_ATTRIBUTES
+from preset_schema import describe_errors, validate_presets
+
+# BENCHMARK: PRESET SCHEMA #
+# Validating a large import with the schema vs the unchecked Preset(**data) loop it replaces #
+# A share of the entries is damaged the ways hand-edited or foreign libraries are (out of range, text numbers, missing fields) #
+#######################################################################################
+
+#Ways an entry gets damaged, each takes the raw dictionary and changes it in place
+DAMAGE = [lambda data: data.update(pointMass=-1.5),
+          lambda data: data.update(scalingRelation=7),
+          lambda data: data.update(friction=str(data["friction"])),
+          lambda data: data.update(maxIterations=float(data["maxIterations"])),
+          lambda data: data.pop("damp"),
+          lambda data: data.update(bounce=None),
+          lambda data: data.update(colour="red")]
+
+#Raw library data (name -> dictionary) with a share of damaged entries
+def make_data(size, bad_share, seed=1):
+    rng = random.Random(seed)
+    data = {name: dict(preset.to_dict()) for name, preset in make_library(size).items()}
+    for name in rng.sample(list(data), int(size * bad_share)):
+        rng.choice(DAMAGE)(data[name])
+    return data
+
+#The loader before the schema: every entry that constructs is accepted, whatever its values
+def load_unchecked(presets_data):
+    presets = {}
+    for name, values in presets_data.items():
+        try:
+            presets[name] = Preset(**values)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return presets
+
+#Presets holding a value the UI can't show (outside a slider range or option menu)
+def count_out_of_range(presets):
+    count = 0
+    for preset in presets.values():
+        for attr in SIM_ATTRIBUTES:
+            value = getattr(preset, attr)
+            if not isinstance(value, (int, float)) or not ATTRIBUTE_RANGES[attr]["min"] <= value <= ATTRIBUTE_RANGES[attr]["max"]:
+                count += 1
+                break
+    return count
+
+def best_of(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the preset schema on a large import")
+    parser.add_argument("--presets", type=int, default=100000, help="library size")
+    parser.add_argument("--bad", type=float, default=0.01, help="share of damaged entries")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    clean = make_data(args.presets, 0.0)
+    damaged = make_data(args.presets, args.bad)
+
+    unchecked, unchecked_time = best_of(lambda: load_unchecked(clean), args.repeats)
+    (_, _), schema_time = best_of(lambda: validate_presets(clean), args.repeats)
+    print(f"{args.presets} clean presets: unchecked Preset(**data) {unchecked_time:.0f} ms, schema {schema_time:.0f} ms")
+
+    unchecked, unchecked_time = best_of(lambda: load_unchecked(damaged), args.repeats)
+    (presets, errors), schema_time = best_of(lambda: validate_presets(damaged), args.repeats)
+    print(f"{args.presets} presets, {args.bad:.0%} damaged: unchecked {unchecked_time:.0f} ms, schema {schema_time:.0f} ms")
+    print(f"    unchecked: {len(unchecked)} loaded, {count_out_of_range(unchecked)} with values the UI can't show, "
+          f"{len(damaged) - len(unchecked)} dropped without a word")
+    print(f"    schema:    {len(presets)} loaded, {count_out_of_range(presets)} with values the UI can't show, "
+          f"{len(errors)} reported")
+    print(f"    {describe_errors(errors, presets)}")
+
+    #The whole load from disk, parsing the JSON included (no warm-start snapshot)
+    directory = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(directory, "presets.json"), 'w') as file:
+            json.dump(damaged, file)
+        _, load_time = best_of(lambda: JsonManager(directory, snapshot=False).load_presets(), args.repeats)
+        print(f"JsonManager.load_presets of the damaged library from disk: {load_time:.0f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from bench_storage import make_library
+from json_manager import JsonManager
+from preset import Preset
+from preset_writer import PresetWriter
+
+# BENCHMARK: BACKGROUND PRESET WRITER #
+# Time the calling (UI) thread spends on a burst of saves and deletes: synchronous JsonManager vs queued PresetWriter #
+# The writer's burst must end up as a single write holding every change #
+#######################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synchronous vs background preset saves")
+    parser.add_argument("--presets", type=int, default=20000, help="library size")
+    parser.add_argument("--burst", type=int, default=20, help="saves made in quick succession (one delete follows)")
+    parser.add_argument("--lazy", action="store_true", help="use lazy JSON loading")
+    args = parser.parse_args()
+
+    library = make_library(args.presets)
+    template = next(iter(library.values())).to_dict()
+    new_presets = {f"Burst {i:03d}": Preset.from_dict(dict(template, name=f"Burst {i:03d}")) for i in range(args.burst)}
+
+    print(f"{args.presets} presets, burst of {args.burst} saves and 1 delete")
+    print(f"{'mode':>12} {'UI thread ms':>13} {'flush ms':>9} {'writes':>7}")
+    for mode in ("synchronous", "background"):
+        directory = tempfile.mkdtemp()
+        try:
+            store = JsonManager(directory, lazy=args.lazy)
+            store.save_presets(library)
+            statuses = []
+            writer = PresetWriter(store.reopen(), on_status=statuses.append) if mode == "background" else None
+            target = writer or store
+
+            start = time.perf_counter()
+            for name, preset in new_presets.items():
+                target.add_preset(name, preset)
+            target.delete_preset(next(iter(library)))
+            ui_time = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            if writer:
+                assert writer.flush()
+            flush_time = (time.perf_counter() - start) * 1000
+            writes = writer.writes if writer else len(new_presets) + 1
+
+            saved = JsonManager(directory, lazy=args.lazy, snapshot=False).load_presets()
+            assert all(name in saved for name in new_presets) and next(iter(library)) not in saved
+            assert len(saved) == len(library) + len(new_presets) - 1
+            if writer:
+                fake_maya.run_deferred()
+                assert statuses[-1]["state"] == "idle" and statuses[-1]["writes"] == 1, statuses[-1]
+                writer.close()
+            print(f"{mode:>12} {ui_time:>13.1f} {flush_time:>9.1f} {writes:>7}")
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+from bench_storage import make_library
+from preset import SIM_ATTRIBUTES, INT_ATTRIBUTES
+from preset_table import PresetTable
+from fingerprint_index import FingerprintIndex
+from scene_audit import audit_scene, deviations, summarize_audit
+
+# BENCHMARK: SCENE AUDIT #
+# Audits every nCloth node of a synthetic scene against a library #
+# Per-node getAttr queries and per-node nearest search vs one batched read and one vectorized nearest pass #
+#######################################################################################
+
+#Give every nCloth node the values of a random library preset, part of them with a few attributes changed
+def assign_values(nodes, library, changed, seed=1):
+    rng = random.Random(seed)
+    names = list(library)
+    for node in nodes:
+        values = library[rng.choice(names)].sim_values()
+        if rng.random() < changed:
+            for attr in rng.sample([attr for attr in SIM_ATTRIBUTES if attr not in INT_ATTRIBUTES], 3):
+                values[attr] = round(values[attr] * rng.uniform(0.5, 1.5) + 0.01, 3)
+        state.scene.nodes[node].attrs.update(values)
+
+#The audit written without batching: one getAttr per attribute per node, one nearest search per node
+def audit_unbatched(library, nodes, fingerprints, table):
+    results = []
+    for node in nodes:
+        values = {attr: cmds.getAttr(f"{node}.{attr}") for attr in SIM_ATTRIBUTES}
+        exact = fingerprints.lookup(values)
+        if exact:
+            results.append({"node": node, "preset": exact[0], "match": "exact", "distance": 0.0, "deviations": {}})
+            continue
+        name, distance = table.nearest(values, exclude=["Custom", "Default"])[0]
+        results.append({"node": node, "preset": name, "match": "nearest", "distance": distance,
+                        "deviations": deviations(values, library[name].sim_values())})
+    return results
+
+def measure(func):
+    state.reset_calls()
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000, sum(state.calls.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-node scene audit")
+    parser.add_argument("--nodes", type=int, default=2000, help="number of nCloth nodes in the synthetic scene")
+    parser.add_argument("--presets", type=int, default=10000, help="library size")
+    parser.add_argument("--changed", type=float, default=0.5, help="fraction of nodes with edited attributes")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated cost of one host call in microseconds")
+    args = parser.parse_args()
+
+    library = make_library(args.presets)
+    fake_maya.build_scene(args.nodes)
+    nodes = cmds.ls(type="nCloth")
+    assign_values(nodes, library, args.changed)
+    state.call_latency = args.latency / 1e6
+
+    fingerprints = FingerprintIndex(library)
+    table = PresetTable.from_presets(library)
+
+    unbatched, unbatched_time, unbatched_calls = measure(lambda: audit_unbatched(library, nodes, fingerprints, table))
+    batched, batched_time, batched_calls = measure(lambda: audit_scene(library, nodes, fingerprints, table))
+
+    #Both audits must agree on every node
+    for old, new in zip(unbatched, batched):
+        assert (old["node"], old["match"], set(old["deviations"])) == (new["node"], new["match"], set(new["deviations"])), (old, new)
+        assert abs(old["distance"] - new["distance"]) < 1e-9, (old, new)
+
+    summary = summarize_audit(batched)
+    print(f"{args.nodes} nCloth nodes, {args.presets} presets: {summary['exact']} exact, {summary['nearest']} nearest")
+    print(f"{'audit':>10} {'ms':>10} {'host calls':>12}")
+    print(f"{'per-node':>10} {unbatched_time:>10.1f} {unbatched_calls:>12}")
+    print(f"{'batched':>10} {batched_time:>10.1f} {batched_calls:>12}")
+
+if __name__ == "__main__":
+    main()
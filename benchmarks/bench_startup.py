@@ -0,0 +1,66 @@
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import main
+from all_presets import presets as builtin_presets
+from bench_storage import make_library
+from json_manager import JsonManager
+from ui_manager import UiManager
+
+# BENCHMARK: TIME TO DOCK #
+# Time from main.main() to a built PAM dock for several library sizes #
+# "old" repeats the previous startup path: two eager JsonManagers, each loading the whole library, no snapshot #
+#######################################################################################
+
+def old_startup(directory):
+    JsonManager(directory, snapshot=False).load_presets()
+    ui = UiManager(json_manager=JsonManager(directory, snapshot=False))
+    ui.create_UI()
+
+def timed(func):
+    state.ui = fake_maya.Ui()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark PAM time-to-dock")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000], help="library sizes to test")
+    parser.add_argument("--phases", action="store_true", help="print the startup phases of the warm start")
+    args = parser.parse_args()
+
+    print(f"{'presets':>8} {'old ms':>10} {'cold ms':>10} {'warm ms':>10}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            library = dict(builtin_presets)
+            library.update(make_library(size))
+            JsonManager(directory, snapshot=False).save_presets(library)
+            main.file_path = directory
+            state.env["MAYA_APP_DIR"] = directory
+
+            old, _ = timed(lambda: old_startup(directory))
+            cold, _ = timed(main.main)
+            warm, ui = timed(main.main)
+        finally:
+            shutil.rmtree(directory)
+
+        print(f"{size:>8} {old:>10.2f} {cold:>10.2f} {warm:>10.2f}")
+        if args.phases:
+            print("         " + ui.profile.report())
+
+if __name__ == "__main__":
+    main_cli()
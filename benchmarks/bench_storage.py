@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+fake_maya.install()
+
+from all_presets import presets as builtin_presets
+from json_manager import JsonManager
+from preset import Preset
+from sqlite_manager import SqliteManager
+
+# BENCHMARK: PRESET STORAGE BACKENDS #
+# Load, single-preset save and single-preset lookup latency of JsonManager (eager and lazy) vs SqliteManager #
+#######################################################################################
+
+#Build a synthetic library of the given size by jittering the built-in presets
+def make_library(size, seed=1):
+    rng = random.Random(seed)
+    bases = [preset for name, preset in builtin_presets.items() if name not in ("Custom", "Default")]
+    library = {}
+    for i in range(size):
+        data = dict(rng.choice(bases).to_dict())
+        data["name"] = f"Preset {i:06d}"
+        for attr in ("friction", "stretchResistance", "pointMass", "damp"):
+            data[attr] = round(data[attr] * rng.uniform(0.5, 1.5), 3)
+        library[data["name"]] = Preset.from_dict(data)
+    return library
+
+def timed(func, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+#Measure one backend: cold load (new instance), single add, single lookup by name (new instance)
+def measure(make_store, library):
+    make_store().save_presets(library)
+    name = next(reversed(library))
+    new_preset = Preset.from_dict(dict(library[name].to_dict(), name="Benchmark Preset"))
+
+    load = timed(lambda: make_store().load_presets())
+    store = make_store()
+    store.load_presets()
+    save = timed(lambda: store.add_preset("Benchmark Preset", new_preset))
+    if isinstance(store, SqliteManager):
+        lookup = timed(lambda: make_store().get_preset(name))
+    else:
+        lookup = timed(lambda: make_store().load_presets()[name])
+    return load, save, lookup
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON and SQLite preset storage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000], help="library sizes to test")
+    args = parser.parse_args()
+
+    print(f"{'presets':>8} {'backend':>8} {'load ms':>10} {'save ms':>10} {'lookup ms':>10}")
+    for size in args.sizes:
+        library = make_library(size)
+        lazy_json = lambda directory: JsonManager(directory, lazy=True)
+        for backend, factory in (("json", JsonManager), ("lazy", lazy_json), ("sqlite", SqliteManager)):
+            directory = tempfile.mkdtemp()
+            stores = []
+            def make_store():
+                stores.append(factory(directory))
+                return stores[-1]
+            try:
+                load, save, lookup = measure(make_store, library)
+            finally:
+                for store in stores:
+                    if isinstance(store, SqliteManager):
+                        store.close()
+                shutil.rmtree(directory)
+            print(f"{size:>8} {backend:>8} {load:>10.2f} {save:>10.2f} {lookup:>10.2f}")
+
+if __name__ == "__main__":
+    main()
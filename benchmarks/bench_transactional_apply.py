@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+from all_presets import presets
+from apply_engine import apply_presets, summarize
+from preset import SIM_ATTRIBUTES
+
+# BENCHMARK: TRANSACTIONAL APPLY #
+# Undo entries, viewport redraws and undo cost of a plain apply vs a transactional apply #
+# Also checks that a failing write (locked attribute) leaves the scene exactly as it was #
+#######################################################################################
+
+#Snapshot of every attribute of every node, to compare the scene before and after
+def scene_state():
+    return {name: (node.type, dict(node.attrs)) for name, node in state.scene.nodes.items()}
+
+#Apply to a fresh scene, half of the objects already have nCloth, then undo everything the apply did
+def measure(objects, preset, transactional, undo_enabled=True):
+    fake_maya.build_scene(objects, with_ncloth=False)
+    meshes = cmds.ls("garment*", type="transform")
+    for mesh in meshes[::2]:
+        fake_maya.make_ncloth(mesh)
+    cmds.undoInfo(state=undo_enabled)
+    before = scene_state()
+
+    state.reset_calls()
+    state.redraws = 0
+    start = time.perf_counter()
+    results = apply_presets([(mesh, preset) for mesh in meshes], transactional=transactional)
+    apply_time = (time.perf_counter() - start) * 1000
+    undo_entries = len(state.undo_queue)
+    redraws = state.redraws
+
+    start = time.perf_counter()
+    undos = 0
+    while state.undo_queue:
+        cmds.undo()
+        undos += 1
+    undo_time = (time.perf_counter() - start) * 1000
+    assert scene_state().keys() == before.keys()
+    return results, apply_time, undo_entries, redraws, undos, undo_time
+
+#Lock an attribute the preset changes on the last nCloth node and check a transactional apply changes nothing
+#The last object has no nCloth yet, so the rollback also has to remove the nCloth the apply created
+def check_rollback(objects, preset, undo_enabled):
+    fake_maya.build_scene(objects, with_ncloth=False)
+    meshes = cmds.ls("garment*", type="transform")
+    for mesh in meshes[:-1]:
+        fake_maya.make_ncloth(mesh)
+    locked = cmds.listConnections(meshes[-2] + "Shape", type="nCloth")[0]
+    attr = next(attr for attr in SIM_ATTRIBUTES if preset.sim_values()[attr] != fake_maya.NCLOTH_DEFAULTS[attr])
+    cmds.setAttr(f"{locked}.{attr}", lock=True)
+    cmds.undoInfo(state=undo_enabled)
+    before = scene_state()
+
+    results = apply_presets([(mesh, preset) for mesh in meshes], transactional=True)
+    summary = summarize(results)
+    assert summary["rolled_back"] == len(meshes), summary
+    assert scene_state() == before, f"scene changed after rollback of the locked {locked}.{attr}"
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plain vs transactional apply")
+    parser.add_argument("--objects", type=int, default=500, help="number of meshes the preset is applied to")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated cost of one host call in microseconds")
+    args = parser.parse_args()
+
+    state.call_latency = args.latency / 1e6
+    preset = presets["Heavy Denim"] if "Heavy Denim" in presets else next(iter(presets.values()))
+
+    print(f"{args.objects} objects, preset '{preset.name}'")
+    print(f"{'apply':>14} {'apply ms':>10} {'undo entries':>13} {'redraws':>8} {'undos':>6} {'undo ms':>8}")
+    for label, transactional in (("plain", False), ("transactional", True)):
+        _, apply_time, undo_entries, redraws, undos, undo_time = measure(args.objects, preset, transactional)
+        print(f"{label:>14} {apply_time:>10.1f} {undo_entries:>13} {redraws:>8} {undos:>6} {undo_time:>8.1f}")
+
+    for undo_enabled in (True, False):
+        check_rollback(min(args.objects, 50), preset, undo_enabled)
+        print(f"rollback with undo {'on' if undo_enabled else 'off'}: scene unchanged")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+from ui_manager import UiManager
+
+# BENCHMARK: UI UPDATES #
+# Counts host calls for preset selection and slider edits with the cached UI state model #
+# "uncached" forgets the model before every operation, which reproduces the old full push/full query behaviour #
+#######################################################################################
+
+#Run an operation several times and return (host calls per run, milliseconds per run)
+def measure(operation, repeats, ui, cached):
+    state.reset_calls()
+    start = time.perf_counter()
+    for i in range(repeats):
+        if not cached:
+            ui.ui_model.forget()
+        operation(i)
+    elapsed = time.perf_counter() - start
+    return sum(state.calls.values()) / repeats, elapsed * 1000 / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark host calls made by preset selection and slider edits")
+    parser.add_argument("--repeats", type=int, default=200, help="number of operations per measurement")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated cost of one host call in microseconds")
+    args = parser.parse_args()
+
+    state.env["MAYA_APP_DIR"] = tempfile.mkdtemp(prefix="pam_bench_")
+    ui = UiManager()
+    ui.create_UI()
+    state.call_latency = args.latency / 1e6
+
+    #Cycle through the library so consecutive selections share some values and differ in others
+    names = [name for name in ui.loaded_presets if name != "Default"]
+    select = lambda i: ui.select_preset(names[i % len(names)])
+
+    #Drag one slider through a range of values
+    slider = ui.ncloth_controls["friction"]
+    edit = lambda i: fake_maya.user_edit(slider, (i % 100) / 100.0)
+
+    print(f"{len(names)} presets, {args.repeats} operations, {args.latency:.0f}us per host call")
+    for label, operation in (("select_preset", select), ("slider edit", edit)):
+        uncached_calls, uncached_ms = measure(operation, args.repeats, ui, cached=False)
+        cached_calls, cached_ms = measure(operation, args.repeats, ui, cached=True)
+
+        #Every value the model holds must agree with the controls
+        known = dict(ui.ui_model.values)
+        controls = ui.get_current_settings(refresh=True)
+        assert all(controls[key] == value for key, value in known.items()), "UI model out of step with controls"
+
+        print(f"  {label:14s} uncached: {uncached_calls:6.1f} host calls {uncached_ms:7.3f} ms"
+              f"   cached: {cached_calls:6.1f} host calls {cached_ms:7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+from all_presets import presets
+from json_manager import JsonManager
+from preset import Preset, ATTRIBUTE_RANGES, INT_ATTRIBUTES, SIM_ATTRIBUTES
+import wedge
+
+# BENCHMARK: WEDGING #
+# Random variant generation (one Preset at a time vs one NumPy batch), saving them (one add_preset each vs add_presets) #
+# and applying variant i to duplicate i in one transactional apply #
+#######################################################################################
+
+#Variants built one Preset at a time, as a loop over the sliders would
+def random_variants_loop(base, count, spread=0.1, seed=1):
+    rng = random.Random(seed)
+    variants = {}
+    for i in range(count):
+        data = base.to_dict().copy()
+        data["name"] = f"{base.name} Variant {i:06d}"
+        for attr in SIM_ATTRIBUTES:
+            if attr in INT_ATTRIBUTES:
+                continue
+            low, high = ATTRIBUTE_RANGES[attr]["min"], ATTRIBUTE_RANGES[attr]["max"]
+            data[attr] = round(min(high, max(low, data[attr] + rng.uniform(-spread, spread) * (high - low))), 3)
+        variants[data["name"]] = Preset.from_dict(data)
+    return variants
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wedge variant generation, saving and applying")
+    parser.add_argument("--variants", type=int, default=10000, help="variants generated")
+    parser.add_argument("--saves", type=int, default=50, help="variants saved one at a time for comparison")
+    parser.add_argument("--objects", type=int, default=200, help="duplicates the variants are applied to")
+    args = parser.parse_args()
+
+    base = presets["Heavy Denim"]
+    _, loop_time = timed(lambda: random_variants_loop(base, args.variants))
+    table, batch_time = timed(lambda: wedge.random_variants(base, args.variants, seed=1))
+    variants, convert_time = timed(table.to_presets)
+    print(f"generate {args.variants} variants: loop {loop_time:.1f} ms, vectorized {batch_time:.1f} ms "
+          f"(+{convert_time:.1f} ms to build Preset objects)")
+
+    directory = tempfile.mkdtemp()
+    try:
+        store = JsonManager(directory, snapshot=False)
+        store.save_presets(dict(presets))
+        few = dict(list(variants.items())[:args.saves])
+        _, single_time = timed(lambda: [store.add_preset(name, preset) for name, preset in few.items()])
+        store.save_presets(dict(presets))
+        _, bulk_time = timed(lambda: wedge.save_variants(table, store))
+        assert len(JsonManager(directory, snapshot=False).load_presets()) == len(presets) + args.variants
+        print(f"save: {args.saves} x add_preset {single_time:.1f} ms, add_presets of all {args.variants} {bulk_time:.1f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+    fake_maya.build_scene(1, with_ncloth=False)
+    duplicates, duplicate_time = timed(lambda: wedge.duplicate_for_variants("garment0", args.objects))
+    state.reset_calls()
+    results, apply_time = timed(lambda: wedge.apply_variants(table, duplicates))
+    assert all(result["status"] == "applied" for result in results)
+    node = cmds.listConnections(duplicates[-1] + "Shape", type="nCloth")[0]
+    assert abs(cmds.getAttr(node + ".friction") - table.preset(args.objects - 1).friction) < 1e-9
+    print(f"apply {args.objects} variants to duplicates: {apply_time:.1f} ms, {sum(state.calls.values())} host calls, "
+          f"{len(state.undo_queue) - args.objects} undo step(s) (duplicating took {duplicate_time:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
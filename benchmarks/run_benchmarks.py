@@ -0,0 +1,267 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+#Make the PAM modules and the stand-in maya package importable when run from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_maya
+state = fake_maya.install()
+
+import maya.cmds as cmds
+from all_presets import presets as builtin_presets
+from bench_storage import make_library
+from json_manager import JsonManager
+from ui_manager import UiManager
+
+# BENCHMARK SUITE #
+# Times every hot path against the stand-in maya package at several library sizes and scene sizes #
+# Host calls and milliseconds are compared with benchmarks/baselines.json, a slower or chattier result fails the run #
+#
+#   python benchmarks/run_benchmarks.py                 full suite, checked against the baselines
+#   python benchmarks/run_benchmarks.py --quick         small scales only
+#   python benchmarks/run_benchmarks.py --update        store the results as the new baselines
+#######################################################################################
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+#Library sizes (presets) and scene sizes (nCloth objects) measured, the quick run keeps the smaller ones
+PRESET_SCALES = [10, 1000, 100000]
+NODE_SCALES = [1, 100, 5000]
+QUICK_PRESET_SCALES = [10, 1000]
+QUICK_NODE_SCALES = [1, 100]
+
+#A result fails if it takes longer than baseline x TIME_TOLERANCE (plus TIME_SLACK_MS for very short cases)
+#or makes more host calls than the baseline
+TIME_TOLERANCE = 1.5
+TIME_SLACK_MS = 0.5
+
+#Registered benchmark cases: (name, "presets" or "nodes", function(size) -> (milliseconds, host calls))
+CASES = []
+
+def case(name, scale):
+    def register(func):
+        CASES.append((name, scale, func))
+        return func
+    return register
+
+#Best time of several runs (host calls of the last run), setup runs before each repeat and isn't timed
+def measure(operation, repeats=5, setup=None):
+    best = None
+    for _ in range(repeats):
+        if setup:
+            setup()
+        state.reset_calls()
+        start = time.perf_counter()
+        operation()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sum(state.calls.values())
+
+#Fewer repeats for the large scales so the full suite stays within a few minutes
+def repeats_for(size, small=5):
+    return 1 if size >= 100000 else 2 if size >= 5000 else small
+
+#Temporary library folder holding a synthetic library of the given size (with the built-in presets)
+@contextlib.contextmanager
+def library_folder(size, lazy=False):
+    directory = tempfile.mkdtemp(prefix="pam_suite_")
+    try:
+        library = dict(builtin_presets)
+        library.update(make_library(size))
+        JsonManager(directory, lazy=lazy, snapshot=False).save_presets(library)
+        yield directory, library
+    finally:
+        shutil.rmtree(directory)
+
+#UiManager with its UI built over a lazy library of the given size
+@contextlib.contextmanager
+def ui_with_library(size):
+    with library_folder(size, lazy=True) as (directory, library):
+        with contextlib.redirect_stdout(io.StringIO()):
+            ui = UiManager(json_manager=JsonManager(directory, lazy=True))
+            ui.create_UI()
+        yield ui, library
+
+#######################################################################################
+# CASES: PRESET STORAGE #
+#######################################################################################
+
+@case("JsonManager.load_presets", "presets")
+def load_presets(size):
+    with library_folder(size) as (directory, _):
+        return measure(lambda: JsonManager(directory, snapshot=False).load_presets(), repeats_for(size))
+
+@case("JsonManager.load_presets (lazy)", "presets")
+def load_presets_lazy(size):
+    with library_folder(size, lazy=True) as (directory, _):
+        return measure(lambda: JsonManager(directory, lazy=True, snapshot=False).load_presets(), repeats_for(size))
+
+@case("JsonManager.save_presets", "presets")
+def save_presets(size):
+    with library_folder(size) as (directory, library):
+        store = JsonManager(directory, snapshot=False)
+        return measure(lambda: store.save_presets(library), repeats_for(size))
+
+@case("JsonManager.add_preset", "presets")
+def add_preset(size):
+    with library_folder(size) as (directory, library):
+        store = JsonManager(directory, snapshot=False)
+        store.load_presets()
+        preset = next(iter(library.values()))
+        return measure(lambda: store.add_preset("Suite Preset", preset), repeats_for(size))
+
+#######################################################################################
+# CASES: UI #
+#######################################################################################
+
+@case("UiManager.update_UI", "presets")
+def update_ui(size):
+    with ui_with_library(size) as (ui, _):
+        names = ["Silk", "Heavy Denim"]
+        turn = [0]
+        def select():
+            turn[0] += 1
+            ui.update_UI(ui.loaded_presets[names[turn[0] % 2]])
+        return measure(select, 20)
+
+@case("UiManager.get_current_settings", "presets")
+def get_current_settings(size):
+    with ui_with_library(size) as (ui, _):
+        ui.select_preset("Silk")
+        return measure(ui.get_current_settings, 20)
+
+@case("UiManager.get_current_settings (refresh)", "presets")
+def get_current_settings_refresh(size):
+    with ui_with_library(size) as (ui, _):
+        ui.select_preset("Silk")
+        return measure(lambda: ui.get_current_settings(refresh=True), 20)
+
+@case("UiManager.update_preset_dropdown (full)", "presets")
+def update_preset_dropdown_full(size):
+    with ui_with_library(size) as (ui, _):
+        def clear():
+            for item in ui.menu_items.values():
+                cmds.deleteUI(item)
+            ui.menu_items = {}
+        return measure(lambda: ui.update_preset_dropdown(ui.loaded_presets, ui.ncloth_controls), repeats_for(size), setup=clear)
+
+@case("UiManager.update_preset_dropdown (one added)", "presets")
+def update_preset_dropdown_add(size):
+    with ui_with_library(size) as (ui, _):
+        preset = ui.loaded_presets["Silk"]
+        def add():
+            ui.loaded_presets.pop("Suite Preset", None)
+            ui.update_preset_dropdown(ui.loaded_presets, ui.ncloth_controls)
+            ui.loaded_presets["Suite Preset"] = preset
+        return measure(lambda: ui.update_preset_dropdown(ui.loaded_presets, ui.ncloth_controls), repeats_for(size), setup=add)
+
+#######################################################################################
+# CASES: SCENE #
+#######################################################################################
+
+#First apply to a fresh scene: nCloth is created on half of the objects, the other half already has it
+@case("Preset.apply_preset", "nodes")
+def apply_preset(size):
+    preset = builtin_presets["Heavy Denim"]
+    def scene():
+        objects = fake_maya.build_scene(size, with_ncloth=False)
+        for obj in objects[::2]:
+            fake_maya.make_ncloth(obj)
+        cmds.select(objects, replace=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return measure(preset.apply_preset, repeats_for(size), setup=scene)
+
+#Applying a preset the objects already have (nothing is written)
+@case("Preset.apply_preset (unchanged)", "nodes")
+def apply_preset_unchanged(size):
+    preset = builtin_presets["Heavy Denim"]
+    objects = fake_maya.build_scene(size)
+    cmds.select(objects, replace=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        preset.apply_preset()
+        return measure(preset.apply_preset, repeats_for(size))
+
+#######################################################################################
+# RUN AND GATE #
+#######################################################################################
+
+def run(cases, preset_scales, node_scales, report):
+    results = {}
+    for name, scale, func in cases:
+        for size in (preset_scales if scale == "presets" else node_scales):
+            key = f"{name} [{size} {scale}]"
+            milliseconds, calls = func(size)
+            results[key] = {"ms": round(milliseconds, 3), "calls": calls}
+            report(key, results[key])
+    return results
+
+#Compare results with the baselines, returns a list of regression messages
+def check(results, baselines, tolerance=TIME_TOLERANCE):
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if result["calls"] > baseline["calls"]:
+            regressions.append(f"{key}: {result['calls']} host calls, baseline {baseline['calls']}")
+        if result["ms"] > baseline["ms"] * tolerance + TIME_SLACK_MS:
+            regressions.append(f"{key}: {result['ms']:.2f} ms, baseline {baseline['ms']:.2f} ms")
+    return regressions
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PAM benchmark suite and check it against stored baselines")
+    parser.add_argument("--quick", action="store_true", help="only the small scales")
+    parser.add_argument("--only", default="", help="run only cases whose name contains this text")
+    parser.add_argument("--update", action="store_true", help="write the results to the baselines file (merged with existing ones)")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baselines file")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="allowed slowdown factor before a case fails")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    preset_scales = QUICK_PRESET_SCALES if args.quick else PRESET_SCALES
+    node_scales = QUICK_NODE_SCALES if args.quick else NODE_SCALES
+    cases = [entry for entry in CASES if args.only.lower() in entry[0].lower()]
+    baselines = load_baselines(args.baselines)
+
+    print(f"{'case':64} {'ms':>10} {'calls':>7} {'base ms':>10} {'base calls':>10}")
+    def report(key, result):
+        baseline = baselines.get(key, {})
+        print(f"{key:64} {result['ms']:>10.2f} {result['calls']:>7} {baseline.get('ms', float('nan')):>10.2f} "
+              f"{baseline.get('calls', ''):>10}", flush=True)
+    results = run(cases, preset_scales, node_scales, report)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, 'w') as file:
+            json.dump(dict(sorted(baselines.items())), file, indent=4)
+        print(f"Baselines updated: {args.baselines}")
+        return 0
+
+    regressions = check(results, baselines, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    missing = [key for key in results if key not in baselines]
+    if missing:
+        print(f"{len(missing)} case(s) have no baseline yet, run with --update to record them")
+    print("FAILED" if regressions else "OK")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
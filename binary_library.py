@@ -0,0 +1,208 @@
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+
+#Import classes
+from preset import Preset, INT_ATTRIBUTES, SIM_ATTRIBUTES
+from preset_journal import atomic_write
+
+# BINARY PRESET LIBRARY #
+# Compiled, read-only form of a preset library that is opened with mmap and read in place #
+# Header, fixed-width float64 records (one per preset, SIM_ATTRIBUTES order), entry table, sorted name index, string table #
+# Preset metadata is kept as JSON text in the string table #
+#######################################################################################
+
+#Bump whenever the layout changes, older files are then refused
+BINARY_VERSION = 2
+
+#Magic bytes, version, attributes per record, preset count, offsets of the record block, entry table, name index and string table
+MAGIC = b"PAMLIB\0\0"
+HEADER = struct.Struct("<8sIIQQQQQ")
+
+#One record: every simulation attribute as a float64
+RECORD = struct.Struct("<" + "d" * len(SIM_ATTRIBUTES))
+
+#One entry: (offset, length) in the string table of the library name, the preset name, the description and the metadata JSON
+#A metadata length of 0 means the preset has no metadata
+ENTRY = struct.Struct("<QIQIQIQI")
+
+#One name index slot: row number, slots are sorted by library name (UTF-8 bytes)
+SLOT = struct.Struct("<I")
+
+#Column position of every simulation attribute in a record
+COLUMN = {attr: index for index, attr in enumerate(SIM_ATTRIBUTES)}
+
+#Round a block size up to a multiple of 8 so the record block stays aligned for zero-copy NumPy views
+def _aligned(size):
+    return (size + 7) & ~7
+
+#######################################################################################
+# EXPORT #
+#######################################################################################
+
+#Compile a dictionary of Preset objects into a binary library file (written atomically)
+def write_binary(file_path, presets):
+    presets = list(presets.items())
+
+    #String table, identical strings (e.g. library name == preset name) are stored once
+    strings = bytearray()
+    string_refs = {}
+    def add_string(text):
+        ref = string_refs.get(text)
+        if ref is None:
+            raw = text.encode("utf-8")
+            ref = string_refs[text] = (len(strings), len(raw))
+            strings.extend(raw)
+        return ref
+
+    records = bytearray()
+    entries = bytearray()
+    keys = []
+    for row, (name, preset) in enumerate(presets):
+        records.extend(RECORD.pack(*(float(getattr(preset, attr)) for attr in SIM_ATTRIBUTES)))
+        metadata = (0, 0) if preset.metadata is None else add_string(json.dumps(preset.metadata, sort_keys=True))
+        entries.extend(ENTRY.pack(*add_string(name), *add_string(preset.name), *add_string(preset.description), *metadata))
+        keys.append((name.encode("utf-8"), row))
+
+    index = b"".join(SLOT.pack(row) for _, row in sorted(keys))
+
+    records_offset = _aligned(HEADER.size)
+    entries_offset = records_offset + len(records)
+    index_offset = entries_offset + len(entries)
+    strings_offset = index_offset + len(index)
+    header = HEADER.pack(MAGIC, BINARY_VERSION, len(SIM_ATTRIBUTES), len(presets),
+                         records_offset, entries_offset, index_offset, strings_offset)
+
+    atomic_write(file_path, header.ljust(records_offset, b"\0") + records + entries + index + strings)
+
+#######################################################################################
+# READING #
+#######################################################################################
+
+class BinaryPresetLibrary(Mapping):
+
+    #Open a binary library, only the header is read, everything else is read from the memory map when asked for
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError(f"'{file_path}' is not a PAM binary library")
+        magic, version, attr_count, self.count, self.records_offset, self.entries_offset, self.index_offset, self.strings_offset = \
+            HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != BINARY_VERSION or attr_count != len(SIM_ATTRIBUTES):
+            self.close()
+            raise ValueError(f"'{file_path}' is not a version {BINARY_VERSION} PAM binary library")
+
+    #Release the memory map (the file can't be replaced on Windows while it is open)
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length].decode("utf-8")
+
+    def _key_bytes(self, row):
+        offset, length = ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)[:2]
+        start = self.strings_offset + offset
+        return self.data[start:start + length]
+
+    #Row number of a library name by binary search over the sorted name index, -1 if it isn't in the library
+    def find(self, name):
+        key = name.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            row = SLOT.unpack_from(self.data, self.index_offset + middle * SLOT.size)[0]
+            if self._key_bytes(row) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            row = SLOT.unpack_from(self.data, self.index_offset + low * SLOT.size)[0]
+            if self._key_bytes(row) == key:
+                return row
+        return -1
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.find(name) >= 0
+
+    #Library name of a row
+    def name(self, row):
+        offset, length = ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)[:2]
+        return self._string(offset, length)
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield self.name(row)
+
+    #One attribute of a row, read straight from the record block
+    def value(self, row, attr):
+        return struct.unpack_from("<d", self.data, self.records_offset + row * RECORD.size + COLUMN[attr] * 8)[0]
+
+    #All simulation attributes of a row as a dictionary, whole-number attributes converted back to int
+    def row_values(self, row):
+        values = dict(zip(SIM_ATTRIBUTES, RECORD.unpack_from(self.data, self.records_offset + row * RECORD.size)))
+        for attr in INT_ATTRIBUTES:
+            values[attr] = int(round(values[attr]))
+        return values
+
+    #Description of a row
+    def description(self, row):
+        offset, length = ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)[4:6]
+        return self._string(offset, length)
+
+    #Metadata of a row, None if the preset has none
+    def metadata(self, row):
+        offset, length = ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)[6:8]
+        return json.loads(self._string(offset, length)) if length else None
+
+    #Materialise the preset in one row
+    def preset(self, row):
+        _, _, name_offset, name_length, desc_offset, desc_length, meta_offset, meta_length = \
+            ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)
+        metadata = json.loads(self._string(meta_offset, meta_length)) if meta_length else None
+        return Preset(name=self._string(name_offset, name_length), description=self._string(desc_offset, desc_length),
+                      metadata=metadata, **self.row_values(row))
+
+    def __getitem__(self, name):
+        row = self.find(name) if isinstance(name, str) else -1
+        if row < 0:
+            raise KeyError(name)
+        return self.preset(row)
+
+    #Convert the whole library back to a dictionary of Preset objects (for saving it as JSON)
+    def to_presets(self):
+        return {self.name(row): self.preset(row) for row in range(self.count)}
+
+    #The record block as a read-only (n, 21) float64 NumPy array viewing the memory map (no copy)
+    #The library can't be closed while such a view is alive
+    def array(self):
+        import numpy as np
+        return np.frombuffer(self.data, dtype="<f8", count=self.count * len(SIM_ATTRIBUTES),
+                             offset=self.records_offset).reshape(self.count, len(SIM_ATTRIBUTES))
+
+    #Read-only PresetTable over the record block (copy its values to edit), descriptions and metadata are decoded when first needed
+    def table(self):
+        from preset_table import PresetTable
+        labels = []
+        for row in range(self.count):
+            name_offset, name_length = ENTRY.unpack_from(self.data, self.entries_offset + row * ENTRY.size)[2:4]
+            labels.append(self._string(name_offset, name_length))
+        return PresetTable(list(self), self.array(), labels=labels,
+                           descriptions=lambda: [self.description(row) for row in range(self.count)],
+                           metadata=lambda: [self.metadata(row) for row in range(self.count)])
+
+#######################################################################################
@@ -0,0 +1,978 @@
+import fnmatch
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import types
+from collections import Counter
+
+# FAKE MAYA #
+# In-process stand-in for maya.cmds, maya.mel, maya.utils and maya.api.OpenMaya used to benchmark PAM outside Maya #
+# Simulates nodes, attributes, connections, DG callbacks and UI controls, and counts every host call #
+#######################################################################################
+
+#Default values of the nCloth attributes PAM reads and writes
+NCLOTH_DEFAULTS = {"bounce": 0.0, "friction": 0.1, "stretchResistance": 20.0, "compressionResistance": 10.0,
+                   "bendResistance": 0.1, "bendAngleDropoff": 0.0, "restitutionAngle": 360.0, "rigidity": 0.0,
+                   "deformResistance": 0.0, "restLengthScale": 1.0, "pointMass": 1.0, "tangentialDrag": 0.1,
+                   "damp": 0.0, "stretchDamp": 0.1, "scalingRelation": 0, "pressureMethod": 0, "startPressure": 0.0,
+                   "airTightness": 1.0, "incompressibility": 5.0, "maxIterations": 500, "pushOutRadius": 0.0}
+
+
+#######################################################################################
+# SCENE #
+#######################################################################################
+
+class Node:
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.attrs = dict(NCLOTH_DEFAULTS) if node_type == "nCloth" else {"intermediateObject": 0} if node_type == "mesh" else {}
+        self.locked = set()
+        self.children = []
+        self.links = []
+
+
+class Scene:
+    def __init__(self):
+        self.nodes = {}
+        self.connections = []
+        self.selection = []
+        self.counter = 0
+
+        #Path the scene was opened from or renamed to ("" for an untitled scene)
+        self.file_path = ""
+
+        #Nucleus new nCloth joins, looked up again if it was deleted
+        self.nucleus = None
+
+    #Scene file contents: every node (type, parent, attributes, locked attributes) and every connection, as JSON
+    def to_json(self):
+        nodes = [{"name": node.name, "type": node.type, "parent": node.parent, "attrs": node.attrs, "locked": sorted(node.locked)}
+                 for node in self.nodes.values()]
+        return json.dumps({"nodes": nodes, "connections": self.connections, "counter": self.counter}, indent=1)
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        scene = cls()
+        for entry in data["nodes"]:
+            node = Node(entry["name"], entry["type"], entry["parent"])
+            node.attrs.update(entry["attrs"])
+            node.locked = set(entry["locked"])
+            scene.nodes[node.name] = node
+        for node in scene.nodes.values():
+            if node.parent:
+                scene.nodes[node.parent].children.append(node.name)
+        for src, dst in data["connections"]:
+            scene.connections.append((src, dst))
+            scene.nodes[src.partition(".")[0]].links.append((src, dst))
+            scene.nodes[dst.partition(".")[0]].links.append((src, dst))
+        scene.counter = data.get("counter", 0)
+        return scene
+
+    #Return a unique node name based on the requested one
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip("0123456789") or name
+        while True:
+            self.counter += 1
+            candidate = f"{base}{self.counter}"
+            if candidate not in self.nodes:
+                return candidate
+
+
+#######################################################################################
+# UI #
+#######################################################################################
+
+#Short flag names used by PAM mapped to their long names
+UI_FLAGS = {"l": "label", "v": "value", "tx": "text", "cc": "changeCommand", "c": "command", "p": "parent",
+            "ex": "exists", "q": "query", "e": "edit", "pht": "placeholderText", "ill": "itemListLong",
+            "tcc": "textChangedCallback"}
+
+#Controls that become the parent of the controls created after them
+LAYOUTS = {"workspaceControl", "window", "columnLayout", "rowLayout"}
+
+
+class Control:
+    def __init__(self, name, kind, parent, props):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.props = props
+        self.items = []
+
+
+class Ui:
+    def __init__(self):
+        self.controls = {}
+        self.current_parent = None
+        self.current_menu = None
+        self.counter = 0
+
+    def unique_name(self, name, kind):
+        if name and name not in self.controls:
+            return name
+        while True:
+            self.counter += 1
+            candidate = f"{name or kind}{self.counter}"
+            if candidate not in self.controls:
+                return candidate
+
+    def delete(self, name):
+        control = self.controls.pop(name, None)
+        if control is None:
+            return
+        for child in [c.name for c in self.controls.values() if c.parent == name]:
+            self.delete(child)
+        parent = self.controls.get(control.parent)
+        if parent and name in parent.items:
+            parent.items.remove(name)
+
+
+#Host state shared by all fake modules
+class HostState:
+    def __init__(self):
+        self.scene = Scene()
+        self.ui = Ui()
+        self.calls = Counter()
+        self.call_latency = 0.0
+        self.dialog_answer = "Yes"
+
+        #Paths returned by fileDialog2 (None is the user cancelling)
+        self.dialog_paths = None
+
+        self.callbacks = {}
+        self.next_callback_id = 1
+        self.env = {"MAYA_APP_DIR": tempfile.gettempdir()}
+
+        #Undo queue of (name, [inverse functions]), the open chunk collects inverses until it is closed
+        self.undo_enabled = True
+        self.undo_queue = []
+        self.chunk = None
+        self.chunk_depth = 0
+
+        #Viewport redraws triggered by scene edits while refresh isn't suspended
+        self.refresh_suspended = False
+        self.redraws = 0
+
+        #Functions queued with maya.utils.executeDeferred, run by run_deferred (Maya runs them on the main thread when idle)
+        self.deferred = []
+
+        #Text shown with cmds.warning and cmds.inViewMessage, in order
+        self.warnings = []
+        self.messages = []
+
+    #Record a host call and optionally simulate its round-trip cost
+    def host_call(self, name):
+        self.calls[name] += 1
+        if self.call_latency:
+            end = time.perf_counter() + self.call_latency
+            while time.perf_counter() < end:
+                pass
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    #Record how to revert one undoable edit, each edit is its own undo entry unless a chunk is open
+    def record_undo(self, name, inverse):
+        if not self.undo_enabled:
+            return
+        if self.chunk is not None:
+            self.chunk[1].append(inverse)
+        else:
+            self.undo_queue.append((name, [inverse]))
+
+    #A scene edit redraws the viewport unless refresh is suspended
+    def redraw(self):
+        if not self.refresh_suspended:
+            self.redraws += 1
+
+    def add_callback(self, kind, func, node_type=None):
+        callback_id = self.next_callback_id
+        self.next_callback_id += 1
+        self.callbacks[callback_id] = (kind, func, node_type)
+        return callback_id
+
+    def fire(self, kind, *args, node_type=None):
+        for callback_kind, func, filter_type in list(self.callbacks.values()):
+            if callback_kind == kind and (filter_type is None or filter_type == node_type):
+                func(*args)
+
+
+state = HostState()
+
+
+#Split "node.attr" into its parts
+def _split_plug(plug):
+    node, _, attr = plug.partition(".")
+    return node, attr
+
+
+def _node(name):
+    node = state.scene.nodes.get(name)
+    if node is None:
+        raise RuntimeError(f"No object matches name: {name}")
+    return node
+
+
+#######################################################################################
+# SCENE BUILDING HELPERS #
+#######################################################################################
+
+#Create a node and notify node-added callbacks
+def create_node(node_type, name=None, parent=None):
+    scene = state.scene
+    name = scene.unique_name(name or node_type + "1")
+    node = Node(name, node_type, parent)
+    scene.nodes[name] = node
+    if parent:
+        scene.nodes[parent].children.append(name)
+    state.fire("nodeAdded", MObject(name), node_type=node_type)
+    return name
+
+
+#Connect two plugs and notify connection callbacks
+def connect(src, dst):
+    scene = state.scene
+    scene.connections.append((src, dst))
+    scene.nodes[_split_plug(src)[0]].links.append((src, dst))
+    scene.nodes[_split_plug(dst)[0]].links.append((src, dst))
+    state.fire("connection", MPlug(src), MPlug(dst), True, None)
+
+
+#Remove a node and every connection to it
+def delete_node(name):
+    scene = state.scene
+    node = scene.nodes.get(name)
+    if node is None:
+        return
+    for child in list(node.children):
+        delete_node(child)
+    for src, dst in list(node.links):
+        disconnect(src, dst)
+    state.fire("nodeRemoved", MObject(name), node_type=node.type)
+    if node.parent in scene.nodes:
+        scene.nodes[node.parent].children.remove(name)
+    del scene.nodes[name]
+    if name in scene.selection:
+        scene.selection.remove(name)
+
+
+#Break a connection between two plugs and notify connection callbacks
+def disconnect(src, dst):
+    scene = state.scene
+    scene.connections.remove((src, dst))
+    for plug in (src, dst):
+        links = scene.nodes[_split_plug(plug)[0]].links
+        if (src, dst) in links:
+            links.remove((src, dst))
+    state.fire("connection", MPlug(src), MPlug(dst), False, None)
+
+
+#Create a polygon mesh transform with one shape
+def create_mesh(name):
+    transform = create_node("transform", name)
+    create_node("mesh", transform + "Shape", parent=transform)
+    return transform
+
+
+#Turn a mesh transform into an nCloth object the way createNCloth does: the nCloth node drives a new output mesh,
+#the original shape becomes an intermediate object, and the cloth joins the scene's nucleus (one is created if there is none)
+def make_ncloth(transform):
+    scene = state.scene
+    shapes = [n for n in scene.nodes[transform].children if scene.nodes[n].type == "mesh"]
+    if not shapes or any(_connected(shape, "nCloth") for shape in shapes):
+        return None
+    if scene.nucleus not in scene.nodes:
+        scene.nucleus = next(iter(_nuclei()), None) or create_node("nucleus", "nucleus1")
+    nucleus = scene.nucleus
+    ncloth_transform = create_node("transform", "nCloth1")
+    ncloth = create_node("nCloth", "nClothShape1", parent=ncloth_transform)
+    output = create_node("mesh", "outputCloth1", parent=transform)
+    connect(shapes[0] + ".worldMesh[0]", ncloth + ".inputMesh")
+    connect(ncloth + ".outputMesh", output + ".inMesh")
+    index = len(scene.nodes[nucleus].links) // 2
+    connect(ncloth + ".currentState", f"{nucleus}.inputActive[{index}]")
+    connect(f"{nucleus}.outputObjects[{index}]", ncloth + ".nextState")
+    scene.nodes[shapes[0]].attrs["intermediateObject"] = 1
+    return ncloth
+
+
+#Turn a mesh transform into a passive collider the way makeCollideNCloth does
+def make_collider(transform):
+    scene = state.scene
+    shapes = [n for n in scene.nodes[transform].children if scene.nodes[n].type == "mesh"]
+    if not shapes:
+        return None
+    rigid_transform = create_node("transform", "nRigid1")
+    rigid = create_node("nRigid", "nRigidShape1", parent=rigid_transform)
+    connect(shapes[0] + ".worldMesh[0]", rigid + ".inputMesh")
+    return rigid
+
+
+#Build a synthetic scene of meshes, optionally with nCloth already applied
+def build_scene(count, with_ncloth=True, prefix="garment"):
+    reset_scene()
+    meshes = []
+    for i in range(count):
+        transform = create_mesh(f"{prefix}{i}")
+        if with_ncloth:
+            make_ncloth(transform)
+        meshes.append(transform)
+    return meshes
+
+
+def reset_scene():
+    state.scene = Scene()
+    state.undo_queue = []
+    state.chunk = None
+    state.chunk_depth = 0
+    state.fire("sceneNew")
+
+
+def _connected(name, node_type=None):
+    scene = state.scene
+    found = []
+    for src, dst in scene.nodes[name].links:
+        src_node, dst_node = _split_plug(src)[0], _split_plug(dst)[0]
+        other = dst_node if src_node == name else src_node
+        if node_type is None or scene.nodes[other].type == node_type:
+            found.append(other)
+    return found
+
+
+#######################################################################################
+# maya.cmds #
+#######################################################################################
+
+cmds = types.ModuleType("maya.cmds")
+
+
+def _command(func):
+    name = func.__name__
+
+    def wrapper(*args, **kwargs):
+        state.host_call(name)
+        return func(*args, **kwargs)
+
+    wrapper.__name__ = name
+    setattr(cmds, name, wrapper)
+    return wrapper
+
+
+def _flag(kwargs, *names, default=None):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default
+
+
+@_command
+def ls(*args, **kwargs):
+    scene = state.scene
+    if _flag(kwargs, "selection", "sl"):
+        return list(scene.selection)
+    node_type = _flag(kwargs, "type")
+    names = []
+    patterns = [a for arg in args for a in ([arg] if isinstance(arg, str) else arg)]
+
+    #Plain names are looked up directly instead of matched against every node
+    if patterns and not any(char in pattern for pattern in patterns for char in "*?["):
+        nodes = [(name, scene.nodes[name]) for name in dict.fromkeys(patterns) if name in scene.nodes]
+        return [name for name, node in nodes if not node_type or node.type == node_type]
+
+    for name, node in scene.nodes.items():
+        if node_type and node.type != node_type:
+            continue
+        if patterns and not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+            continue
+        names.append(name)
+    return names
+
+
+@_command
+def select(*args, **kwargs):
+    scene = state.scene
+    if _flag(kwargs, "clear", "cl"):
+        scene.selection = []
+        return
+    names = [a for arg in args for a in ([arg] if isinstance(arg, str) else arg)]
+    for name in names:
+        _node(name)
+    if _flag(kwargs, "add"):
+        scene.selection.extend(n for n in names if n not in scene.selection)
+    else:
+        scene.selection = names
+
+
+@_command
+def objExists(name):
+    return name.partition(".")[0] in state.scene.nodes
+
+
+@_command
+def nodeType(name):
+    return _node(name).type
+
+
+@_command
+def listRelatives(*args, **kwargs):
+    scene = state.scene
+    names = [a for arg in args for a in ([arg] if isinstance(arg, str) else arg)]
+    result = []
+    for name in names:
+        node = _node(name)
+        if _flag(kwargs, "parent", "p"):
+            if node.parent and node.parent not in result:
+                result.append(node.parent)
+            continue
+        children = node.children
+        if _flag(kwargs, "shapes", "s"):
+            children = [n for n in children if scene.nodes[n].type != "transform"]
+        if _flag(kwargs, "type"):
+            children = [n for n in children if scene.nodes[n].type == _flag(kwargs, "type")]
+        result.extend(children)
+    return result or None
+
+
+@_command
+def listConnections(*args, **kwargs):
+    scene = state.scene
+    names = [a for arg in args for a in ([arg] if isinstance(arg, str) else arg)]
+    node_type = _flag(kwargs, "type", "t")
+    source = _flag(kwargs, "source", "s", default=True)
+    destination = _flag(kwargs, "destination", "d", default=True)
+    with_connections = _flag(kwargs, "connections", "c", default=False)
+    plugs = _flag(kwargs, "plugs", "p", default=False)
+    result = []
+    for name in names:
+        node_name, attr = _split_plug(name)
+        for src, dst in _node(node_name).links:
+            pairs = []
+            if destination and _split_plug(src)[0] == node_name and (not attr or _split_plug(src)[1] == attr):
+                pairs.append((src, dst))
+            if source and _split_plug(dst)[0] == node_name and (not attr or _split_plug(dst)[1] == attr):
+                pairs.append((dst, src))
+            for this, other in pairs:
+                other_node = _split_plug(other)[0]
+                if node_type and scene.nodes[other_node].type != node_type:
+                    continue
+                if with_connections:
+                    result.append(this)
+                result.append(other if plugs else other_node)
+    return result or None
+
+
+@_command
+def getAttr(plug, **kwargs):
+    node_name, attr = _split_plug(plug)
+    node = _node(node_name)
+    if attr not in node.attrs:
+        raise RuntimeError(f"No object matches name: {plug}")
+    return node.attrs[attr]
+
+
+@_command
+def setAttr(plug, *values, **kwargs):
+    _set_plug(plug, values[0] if values else None, lock=_flag(kwargs, "lock", "l"))
+
+
+def _set_plug(plug, value, lock=None):
+    node_name, attr = _split_plug(plug)
+    node = _node(node_name)
+    if lock is not None:
+        (node.locked.add if lock else node.locked.discard)(attr)
+        if value is None:
+            return
+    if attr in node.locked:
+        raise RuntimeError(f"The attribute '{plug}' is locked or connected and cannot be modified.")
+    old_value = node.attrs.get(attr)
+    node.attrs[attr] = value
+    state.record_undo("setAttr", lambda: node.attrs.__setitem__(attr, old_value))
+    state.redraw()
+
+
+@_command
+def createNode(node_type, name=None, parent=None, **kwargs):
+    return create_node(node_type, _flag(kwargs, "n", default=name), _flag(kwargs, "p", default=parent))
+
+
+@_command
+def connectAttr(src, dst, **kwargs):
+    connect(src, dst)
+
+
+@_command
+def delete(*args, **kwargs):
+    for arg in args:
+        for name in ([arg] if isinstance(arg, str) else arg):
+            delete_node(name)
+
+
+#Scene files are the JSON from Scene.to_json: open, save, rename and query the scene name
+@_command
+def file(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        if _flag(kwargs, "sceneName", "sn"):
+            return state.scene.file_path
+        return None
+    if _flag(kwargs, "open", "o"):
+        if not os.path.exists(args[0]):
+            raise RuntimeError(f"File not found: {args[0]}")
+        with open(args[0], 'r') as scene_file:
+            scene = Scene.from_json(scene_file.read())
+        scene.file_path = args[0]
+        state.scene = scene
+        state.undo_queue = []
+        state.chunk = None
+        state.chunk_depth = 0
+        state.fire("sceneOpen")
+        return args[0]
+    rename = _flag(kwargs, "rename", "rn")
+    if rename:
+        state.scene.file_path = rename
+        return rename
+    if _flag(kwargs, "save", "s"):
+        if not state.scene.file_path:
+            raise RuntimeError("The scene has not been named, use file -rename first.")
+        with open(state.scene.file_path, 'w') as scene_file:
+            scene_file.write(state.scene.to_json())
+        return state.scene.file_path
+    return None
+
+
+#Duplicate a mesh transform (the copy has no nCloth, as with Maya's default duplicate)
+@_command
+def duplicate(*args, **kwargs):
+    name = _flag(kwargs, "name", "n")
+    copies = []
+    for original in [a for arg in args for a in ([arg] if isinstance(arg, str) else arg)]:
+        _node(original)
+        copy = create_mesh(name or original)
+        state.record_undo("duplicate", lambda copy=copy: delete_node(copy))
+        copies.append(copy)
+    state.redraw()
+    return copies
+
+
+@_command
+def rename(old, new):
+    scene = state.scene
+    node = scene.nodes.pop(old)
+    node.name = new
+    scene.nodes[new] = node
+    for child in node.children:
+        scene.nodes[child].parent = new
+    if node.parent:
+        siblings = scene.nodes[node.parent].children
+        siblings[siblings.index(old)] = new
+    scene.connections = [(_rename_plug(src, old, new), _rename_plug(dst, old, new)) for src, dst in scene.connections]
+    for other in scene.nodes.values():
+        other.links = [(_rename_plug(src, old, new), _rename_plug(dst, old, new)) for src, dst in other.links]
+    state.fire("nameChanged", MObject(new), old)
+    return new
+
+
+def _rename_plug(plug, old, new):
+    node_name, attr = _split_plug(plug)
+    return f"{new}.{attr}" if node_name == old else plug
+
+
+@_command
+def undoInfo(**kwargs):
+    if _flag(kwargs, "query", "q"):
+        return state.undo_enabled
+    if _flag(kwargs, "openChunk", "ock"):
+        state.chunk_depth += 1
+        if state.chunk_depth == 1:
+            state.chunk = (_flag(kwargs, "chunkName", "cn", default="chunk"), [])
+    elif _flag(kwargs, "closeChunk", "cck"):
+        if state.chunk_depth:
+            state.chunk_depth -= 1
+        if not state.chunk_depth and state.chunk is not None:
+            if state.chunk[1]:
+                state.undo_queue.append(state.chunk)
+            state.chunk = None
+    elif _flag(kwargs, "state", "st") is not None:
+        state.undo_enabled = bool(_flag(kwargs, "state", "st"))
+        if not state.undo_enabled:
+            state.undo_queue = []
+
+
+#Revert the last undo entry (a whole chunk counts as one)
+@_command
+def undo():
+    if not state.undo_queue:
+        raise RuntimeError("There are no more commands to undo.")
+    name, inverses = state.undo_queue.pop()
+    for inverse in reversed(inverses):
+        inverse()
+    state.redraw()
+
+
+@_command
+def refresh(**kwargs):
+    suspend = _flag(kwargs, "suspend", "su")
+    if suspend is not None:
+        state.refresh_suspended = bool(suspend)
+    else:
+        state.redraws += 1
+
+
+@_command
+def warning(message):
+    state.warnings.append(message)
+
+
+@_command
+def inViewMessage(**kwargs):
+    message = _flag(kwargs, "assistMessage", "amg")
+    if message is not None:
+        state.messages.append(message)
+
+
+@_command
+def confirmDialog(**kwargs):
+    return state.dialog_answer
+
+
+@_command
+def fileDialog2(**kwargs):
+    return state.dialog_paths
+
+
+@_command
+def internalVar(**kwargs):
+    if _flag(kwargs, "userPresetsDir", "ups"):
+        return os.path.join(state.env["MAYA_APP_DIR"], "presets") + "/"
+    return state.env["MAYA_APP_DIR"] + "/"
+
+
+#Generic UI command: create, edit, query and exists for every control type PAM uses
+def _ui_command(kind):
+    def command(*args, **kwargs):
+        state.host_call(kind)
+        ui = state.ui
+        kwargs = {UI_FLAGS.get(key, key): value for key, value in kwargs.items()}
+        name = args[0] if args else None
+
+        if kwargs.pop("exists", False):
+            control = ui.controls.get(name)
+            return control is not None and control.kind == kind
+        if kwargs.pop("query", False):
+            return _query(_control(name, kind), kwargs)
+        if kwargs.pop("edit", False):
+            _edit(_control(name, kind), kwargs)
+            return None
+        return _create(kind, name, kwargs)
+
+    command.__name__ = kind
+    setattr(cmds, kind, command)
+    return command
+
+
+def _control(name, kind=None):
+    control = state.ui.controls.get(name)
+    if control is None or (kind and control.kind != kind):
+        raise RuntimeError(f"Object '{name}' not found.")
+    return control
+
+
+def _create(kind, name, props):
+    ui = state.ui
+    if kind == "menuItem":
+        parent = props.pop("parent", None) or ui.current_menu
+    else:
+        parent = ui.current_parent
+    name = ui.unique_name(name, kind)
+    control = Control(name, kind, parent, props)
+    ui.controls[name] = control
+    if kind == "menuItem":
+        menu = _control(parent)
+        menu.items.append(name)
+        if len(menu.items) == 1:
+            menu.props["value"] = props.get("label")
+    if kind == "optionMenu":
+        ui.current_menu = name
+    if kind in LAYOUTS:
+        ui.current_parent = name
+    return name
+
+
+def _edit(control, props):
+    if control.kind == "optionMenu" and "value" in props:
+        labels = [state.ui.controls[item].props.get("label") for item in control.items]
+        if props["value"] not in labels:
+            raise RuntimeError(f"Item not found: {props['value']}")
+    control.props.update(props)
+
+
+def _query(control, flags):
+    flag = next(iter(flags))
+    if flag == "itemListLong":
+        return list(control.items) or None
+    default = {"text": "", "value": 0.0 if control.kind.startswith(("float", "int")) else None}.get(flag)
+    return control.props.get(flag, default)
+
+
+for _kind in ("workspaceControl", "window", "columnLayout", "rowLayout", "text", "button", "separator", "optionMenu",
+              "menuItem", "textField", "scrollField", "floatSliderGrp", "intSliderGrp"):
+    _ui_command(_kind)
+
+
+@_command
+def setParent(name):
+    ui = state.ui
+    if name == "..":
+        parent = ui.controls.get(ui.current_parent)
+        ui.current_parent = parent.parent if parent else None
+    else:
+        ui.current_parent = name
+
+
+@_command
+def deleteUI(*names, **kwargs):
+    for name in names:
+        _control(name)
+        state.ui.delete(name)
+
+
+#Simulate the user changing a control: set its value and run its textChangedCallback/changeCommand with the new value
+def user_edit(name, value):
+    control = _control(name)
+    control.props["text" if control.kind in ("textField", "scrollField") else "value"] = value
+    for flag in ("textChangedCallback", "changeCommand"):
+        callback = control.props.get(flag)
+        if callback:
+            callback(value)
+
+
+#######################################################################################
+# maya.mel #
+#######################################################################################
+
+mel = types.ModuleType("maya.mel")
+
+_SET_ATTR = re.compile(r'setAttr\s+"([^"]+)"\s+([^;]+);')
+
+
+def _eval(command):
+    state.host_call("mel.eval")
+    command = command.strip()
+    if command.startswith("getenv"):
+        return state.env.get(command.split()[1], "")
+    if command.startswith("createNCloth"):
+        nuclei = _nuclei()
+        created = [node for node in (make_ncloth(obj) for obj in state.scene.selection) if node]
+        for node in created:
+            _record_created(node)
+        _record_created_nuclei([node for node in _nuclei() if node not in nuclei])
+        if created:
+            state.redraw()
+        return created
+    if command.startswith("makeCollideNCloth"):
+        created = [make_collider(obj) for obj in state.scene.selection]
+        return [node for node in created if node]
+    for plug, value in _SET_ATTR.findall(command):
+        value = value.strip()
+        _set_plug(plug, int(value) if re.fullmatch(r"-?\d+", value) else float(value))
+    return None
+
+
+#Undo of createNCloth removes the nCloth transform and the output mesh it added and shows the original shape again
+def _record_created(ncloth):
+    links = state.scene.nodes[ncloth].links
+    outputs = [_split_plug(dst)[0] for src, dst in links if src == ncloth + ".outputMesh"]
+    inputs = [_split_plug(src)[0] for src, dst in links if dst == ncloth + ".inputMesh"]
+    transform = state.scene.nodes[ncloth].parent
+
+    def remove():
+        for name in outputs + [transform]:
+            delete_node(name)
+        for name in inputs:
+            if name in state.scene.nodes:
+                state.scene.nodes[name].attrs["intermediateObject"] = 0
+
+    state.record_undo("createNCloth", remove)
+
+
+def _nuclei():
+    return [name for name, node in state.scene.nodes.items() if node.type == "nucleus"]
+
+
+#Undo of createNCloth also removes the nucleus it had to create
+def _record_created_nuclei(nuclei):
+    if nuclei:
+        state.record_undo("createNCloth", lambda: [delete_node(name) for name in nuclei])
+
+
+mel.eval = _eval
+
+
+#######################################################################################
+# maya.api.OpenMaya #
+#######################################################################################
+
+om = types.ModuleType("maya.api.OpenMaya")
+
+
+class MObject:
+    def __init__(self, name=None):
+        self.name = name
+
+    def isNull(self):
+        return self.name is None
+
+
+class MPlug:
+    def __init__(self, plug):
+        self.plug = plug
+
+    def node(self):
+        return MObject(_split_plug(self.plug)[0])
+
+    def name(self):
+        return self.plug
+
+    def partialName(self, *args, **kwargs):
+        return _split_plug(self.plug)[1]
+
+    def asDouble(self):
+        node_name, attr = _split_plug(self.plug)
+        return float(_node(node_name).attrs[attr])
+
+    def asInt(self):
+        node_name, attr = _split_plug(self.plug)
+        return int(_node(node_name).attrs[attr])
+
+
+class MSelectionList:
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        _node(name)
+        self.items.append(name)
+        return self
+
+    def length(self):
+        return len(self.items)
+
+    def getDependNode(self, index):
+        return MObject(self.items[index])
+
+
+class MFnDependencyNode:
+    def __init__(self, obj):
+        self.obj = obj
+
+    def name(self):
+        return self.obj.name
+
+    @property
+    def typeName(self):
+        return _node(self.obj.name).type
+
+    def findPlug(self, attr, want_networked):
+        node = _node(self.obj.name)
+        if attr not in node.attrs:
+            raise RuntimeError(f"(kInvalidParameter): Cannot find plug {attr}")
+        return MPlug(f"{self.obj.name}.{attr}")
+
+
+class MDGMessage:
+    @staticmethod
+    def addNodeAddedCallback(func, node_type="dependNode", client_data=None):
+        return state.add_callback("nodeAdded", lambda obj: func(obj, client_data), _type_filter(node_type))
+
+    @staticmethod
+    def addNodeRemovedCallback(func, node_type="dependNode", client_data=None):
+        return state.add_callback("nodeRemoved", lambda obj: func(obj, client_data), _type_filter(node_type))
+
+    @staticmethod
+    def addConnectionCallback(func, client_data=None):
+        return state.add_callback("connection", lambda src, dst, made, _: func(src, dst, made, client_data))
+
+
+class MNodeMessage:
+    @staticmethod
+    def addNameChangedCallback(obj, func, client_data=None):
+        return state.add_callback("nameChanged", lambda node, old: func(node, old, client_data))
+
+
+class MSceneMessage:
+    kAfterNew = "sceneNew"
+    kAfterOpen = "sceneOpen"
+    kAfterImport = "sceneImport"
+
+    @staticmethod
+    def addCallback(message, func, client_data=None):
+        return state.add_callback(message, lambda: func(client_data))
+
+
+class MMessage:
+    @staticmethod
+    def removeCallbacks(callback_ids):
+        for callback_id in callback_ids:
+            state.callbacks.pop(callback_id, None)
+
+    @staticmethod
+    def removeCallback(callback_id):
+        state.callbacks.pop(callback_id, None)
+
+
+def _type_filter(node_type):
+    return None if node_type == "dependNode" else node_type
+
+
+for _name, _value in list(globals().items()):
+    if _name.startswith("M") and isinstance(_value, type):
+        setattr(om, _name, _value)
+
+
+#######################################################################################
+# maya.utils #
+#######################################################################################
+
+utils = types.ModuleType("maya.utils")
+
+
+#Queue a function for the main thread, may be called from any thread
+def executeDeferred(func, *args, **kwargs):
+    state.deferred.append((func, args, kwargs))
+
+
+utils.executeDeferred = executeDeferred
+
+
+#Run every queued deferred function, as Maya does when the main thread goes idle
+def run_deferred():
+    while state.deferred:
+        func, args, kwargs = state.deferred.pop(0)
+        func(*args, **kwargs)
+
+
+#######################################################################################
+# INSTALL #
+#######################################################################################
+
+#Register the fake modules as maya, maya.cmds, maya.mel and maya.api.OpenMaya so PAM modules import them
+def install():
+    maya = types.ModuleType("maya")
+    api = types.ModuleType("maya.api")
+    maya.cmds = cmds
+    maya.mel = mel
+    maya.api = api
+    maya.utils = utils
+    api.OpenMaya = om
+    sys.modules.update({"maya": maya, "maya.cmds": cmds, "maya.mel": mel, "maya.api": api, "maya.api.OpenMaya": om,
+                        "maya.utils": utils})
+    return state
+
+#######################################################################################
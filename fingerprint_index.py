@@ -0,0 +1,56 @@
+#Import classes
+from preset import fingerprint
+
+# FINGERPRINT INDEX CLASS #
+# Maps preset fingerprints to library names so exact-match checks and duplicate detection are a single hash lookup #
+#######################################################################################
+
+class FingerprintIndex:
+
+    def __init__(self, presets=None):
+
+        #Fingerprint -> names of the presets holding those settings
+        self.names = {}
+
+        #Name -> fingerprint, needed to remove or replace an entry
+        self.fingerprints = {}
+
+        for name, preset in (presets or {}).items():
+            self.add(name, preset)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    #Add or replace one preset
+    def add(self, name, preset):
+        self.remove(name)
+        key = preset.fingerprint()
+        self.fingerprints[name] = key
+        self.names.setdefault(key, []).append(name)
+
+    #Remove one preset (does nothing if it isn't indexed)
+    def remove(self, name):
+        key = self.fingerprints.pop(name, None)
+        if key is None:
+            return
+        names = self.names[key]
+        names.remove(name)
+        if not names:
+            del self.names[key]
+
+    #Independent copy, changing one never changes the other
+    def copy(self):
+        index = FingerprintIndex()
+        index.names = {key: list(names) for key, names in self.names.items()}
+        index.fingerprints = dict(self.fingerprints)
+        return index
+
+    #Return the names of all presets matching a settings dictionary (or preset values)
+    def lookup(self, settings):
+        return list(self.names.get(fingerprint(settings), []))
+
+    #Return every group of two or more presets that share the same settings
+    def duplicates(self):
+        return [list(names) for names in self.names.values() if len(names) > 1]
+
+#######################################################################################
@@ -0,0 +1,259 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# INSTRUMENTATION #
+# Opt-in recording of every maya.cmds / mel.eval call, attributed to the user operation that caused it (apply, save...) #
+# enable() swaps the module attributes for timing wrappers and disable() puts the originals back, so when it is off #
+# the host calls are untouched and an instrumented operation costs one global check #
+#######################################################################################
+
+#Set this environment variable to record from startup, the results are written to MAYA_APP_DIR when Maya exits
+INSTRUMENT_ENV = "PAM_INSTRUMENT"
+
+#Host calls made outside any instrumented operation are recorded under this operation name
+NO_OPERATION = "(none)"
+
+#Trace events kept for the Chrome trace, later events are counted but dropped to bound memory
+MAX_TRACE_EVENTS = 200000
+
+#Recorder collecting the statistics while instrumentation is on, None when it is off
+_recorder = None
+
+#Original cmds functions and mel.eval, restored by disable()
+_originals = {}
+
+#######################################################################################
+# RECORDER #
+#######################################################################################
+
+#Power-of-two latency bucket of a duration in seconds: bucket b holds durations below 2^b microseconds
+def latency_bucket(seconds):
+    return int(seconds * 1e6).bit_length()
+
+#Characters sent to the host: every string argument, including strings inside lists (the MEL text for mel.eval)
+def payload_size(args, kwargs):
+    size = 0
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, (list, tuple)):
+            size += sum(len(item) for item in value if isinstance(item, str))
+    return size
+
+class Stats:
+
+    #Count, total time, payload and latency histogram of one kind of call
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.payload = 0
+        self.histogram = {}
+
+    def add(self, seconds, payload=0):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.payload += payload
+        bucket = latency_bucket(seconds)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def as_dict(self):
+        return {"count": self.count, "total_ms": self.seconds * 1000, "max_ms": self.max_seconds * 1000,
+                "mean_us": self.seconds * 1e6 / self.count if self.count else 0.0, "payload_chars": self.payload,
+                "histogram_us": {f"<{2 ** bucket}": count for bucket, count in sorted(self.histogram.items())}}
+
+class Recorder:
+
+    def __init__(self, trace=True):
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.perf_counter()
+
+        #Operation name -> Stats of the whole operation, (operation, command) -> Stats of its host calls
+        self.operations = {}
+        self.calls = {}
+
+        #Chrome trace events (complete events) and the number dropped past MAX_TRACE_EVENTS
+        self.events = []
+        self.dropped = 0
+
+    #Operations running on this thread, innermost last
+    def stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def _event(self, name, category, start, seconds, args=None):
+        if not self.trace:
+            return
+        if len(self.events) >= MAX_TRACE_EVENTS:
+            self.dropped += 1
+            return
+        event = {"name": name, "cat": category, "ph": "X", "ts": (start - self.started) * 1e6, "dur": seconds * 1e6,
+                 "pid": 1, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    #One host call finished, it belongs to the innermost running operation
+    def host_call(self, command, start, seconds, payload):
+        stack = self.stack()
+        operation = stack[-1] if stack else NO_OPERATION
+        with self.lock:
+            stats = self.calls.get((operation, command))
+            if stats is None:
+                stats = self.calls[(operation, command)] = Stats()
+            stats.add(seconds, payload)
+            self._event(command, "host", start, seconds, {"operation": operation, "payload": payload})
+
+    #One operation finished
+    def operation(self, name, start, seconds):
+        with self.lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = Stats()
+            stats.add(seconds)
+            self._event(name, "operation", start, seconds)
+
+#######################################################################################
+# SWITCHING ON AND OFF #
+#######################################################################################
+
+def _wrap(command, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder
+        if recorder is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.host_call(command, start, time.perf_counter() - start, payload_size(args, kwargs))
+    wrapper.__pam_original__ = func
+    return wrapper
+
+#Start recording, every public maya.cmds function and mel.eval is replaced by a timing wrapper
+#trace=False keeps only the statistics (no per-call events for the Chrome trace)
+def enable(trace=True):
+    global _recorder
+    import maya.cmds as cmds
+    import maya.mel as mel
+
+    if _recorder is None:
+        for name in dir(cmds):
+            func = getattr(cmds, name)
+            if name.startswith("_") or not callable(func) or hasattr(func, "__pam_original__"):
+                continue
+            _originals[(cmds, name)] = func
+            setattr(cmds, name, _wrap(name, func))
+        _originals[(mel, "eval")] = mel.eval
+        mel.eval = _wrap("mel.eval", mel.eval)
+    _recorder = Recorder(trace)
+    return _recorder
+
+#Stop recording and put the original functions back, returns the recorder holding what was recorded
+def disable():
+    global _recorder
+    recorder, _recorder = _recorder, None
+    for (module, name), func in _originals.items():
+        setattr(module, name, func)
+    _originals.clear()
+    return recorder
+
+def is_enabled():
+    return _recorder is not None
+
+#######################################################################################
+# OPERATIONS #
+#######################################################################################
+
+#Attribute the host calls made inside the block to a user operation (nested operations attribute to the innermost)
+@contextmanager
+def operation(name):
+    recorder = _recorder
+    if recorder is None:
+        yield
+        return
+    stack = recorder.stack()
+
+    #An operation calling itself (e.g. Apply calling Preset.apply_preset) is recorded once
+    if stack and stack[-1] == name:
+        yield
+        return
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stack.pop()
+        recorder.operation(name, start, time.perf_counter() - start)
+
+#Decorator form of operation(), costs a single check while instrumentation is off
+def instrumented(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with operation(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+#######################################################################################
+# REPORTS #
+#######################################################################################
+
+#Everything recorded so far as a dictionary: per operation its own stats and the stats of each host command it called
+def report(recorder=None):
+    recorder = recorder or _recorder
+    if recorder is None:
+        return {}
+    with recorder.lock:
+        result = {name: {"operation": stats.as_dict(), "host_calls": {}} for name, stats in recorder.operations.items()}
+        for (name, command), stats in sorted(recorder.calls.items()):
+            entry = result.setdefault(name, {"operation": None, "host_calls": {}})
+            entry["host_calls"][command] = stats.as_dict()
+    for entry in result.values():
+        entry["total_host_calls"] = sum(stats["count"] for stats in entry["host_calls"].values())
+        entry["total_host_ms"] = sum(stats["total_ms"] for stats in entry["host_calls"].values())
+    return result
+
+def export_json(file_path, recorder=None):
+    with open(file_path, 'w') as file:
+        json.dump(report(recorder), file, indent=4)
+
+#Write a Chrome trace (open in chrome://tracing or Perfetto), operations and host calls as nested slices per thread
+def export_chrome_trace(file_path, recorder=None):
+    recorder = recorder or _recorder
+    events = [] if recorder is None else list(recorder.events)
+    metadata = {"dropped_events": recorder.dropped if recorder else 0}
+    with open(file_path, 'w') as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": metadata}, file)
+
+#Write the JSON report (pam_instrumentation.json) and the Chrome trace (pam_trace.json) into a folder
+def export_all(directory, recorder=None):
+    export_json(os.path.join(directory, "pam_instrumentation.json"), recorder)
+    export_chrome_trace(os.path.join(directory, "pam_trace.json"), recorder)
+
+#Short text summary for the Script Editor, one line per operation with its busiest host commands
+def summary_text(recorder=None, top=3):
+    lines = []
+    for name, entry in sorted(report(recorder).items()):
+        own = entry["operation"]
+        header = f"{name}: {own['count']} run(s), {own['total_ms']:.1f} ms" if own else f"{name}:"
+        lines.append(f"{header}, {entry['total_host_calls']} host call(s) taking {entry['total_host_ms']:.1f} ms")
+        busiest = sorted(entry["host_calls"].items(), key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+        for command, stats in busiest:
+            lines.append(f"    {command}: {stats['count']} call(s), {stats['total_ms']:.2f} ms, {stats['payload_chars']} chars")
+    return "\n".join(lines)
+
+#######################################################################################
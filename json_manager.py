@@ -1,9 +1,15 @@
+import hashlib
 import json
 import os
-import maya.mel as mel
 
 #Import classes
-from preset import Preset 
+from preset_schema import validate_preset, validate_presets
+from maya_paths import maya_app_dir
+from preset_journal import COMPACT_AFTER, PresetJournal, atomic_write
+from fingerprint_index import FingerprintIndex
+from lazy_presets import LRU_SIZE, LazyPresetFile, LazyPresets, write_library
+from preset_snapshot import PresetSnapshot
+from instrumentation import instrumented
 
 # JSON MANAGER CLASS #
 # Handles loading, saving and managing presets in JSON file #
@@ -12,13 +18,22 @@ from preset import Preset
 class JsonManager:
     
     #Initialise the JsonManager class
-    def __init__(self, file_path=None):
+    #With journal=True single preset changes are appended to presets.journal instead of rewriting presets.json
+    #With lazy=True the library is indexed by byte offset and presets are only parsed when accessed (at most cache_size kept)
+    #With snapshot=True the parsed library (offset index in lazy mode) is cached in a binary file next to presets.json for the next session
+    #With create=False a missing presets.json is not created and loads as an empty library (read-only shared libraries)
+    def __init__(self, file_path=None, journal=False, lazy=False, cache_size=LRU_SIZE, snapshot=True, create=True):
 
         self.is_new_file = False
 
+        #Name -> problems of every preset entry that didn't fit the schema on the last load (see preset_schema)
+        #Entries listed here that are missing from the library could not be loaded, the others were repaired (converted or clamped)
+        #In lazy mode entries are only checked when they are read, so this fills up as presets are accessed
+        self.load_errors = {}
+
         #Use provided file path or if none then use default Maya directory 
         if file_path is None: 
-             self.file_path = mel.eval("getenv MAYA_APP_DIR ")
+             self.file_path = maya_app_dir()
 
         else:
             self.file_path = file_path
@@ -28,42 +43,309 @@ class JsonManager:
 
          
         #Create a new JSON file at that location if it doesn't already exist
-        if not os.path.exists(self.file_path):
+        self.create = create
+        if create and not os.path.exists(self.file_path):
              
             self.is_new_file = True
             with open(self.file_path, 'w') as file:
                 json.dump({}, file, indent=4)
-        
-    
+
+        #Journal of changes since the last snapshot (journal storage mode only)
+        self.journal = None
+        if journal:
+            self.journal = PresetJournal(os.path.splitext(self.file_path)[0] + ".journal")
+
+        #In-memory copy of the parsed presets, plus the file stamp (mtime, size) and content hash it was parsed from
+        #The hash object is kept so appending to the journal can extend it without re-reading the files
+        self._cache = None
+        self._cache_stamp = None
+        self._cache_hash = None
+
+        #Fingerprint index of the cached library and the cache dictionary it was built from
+        self._fingerprints = None
+        self._fingerprints_source = None
+
+        #Lazy loading mode: offset index of the file, the library dictionary built on it and the file stamp it matches
+        self.lazy = lazy
+        self.cache_size = cache_size
+        self._lazy_source = None
+        self._lazy = None
+        self._lazy_stamp = None
+
+        #Warm-start snapshot, keyed by the hash of the file contents (see preset_snapshot)
+        self.snapshot = None
+        if snapshot:
+            self.snapshot = PresetSnapshot(os.path.splitext(self.file_path)[0] + (".offsets" if lazy else ".snapshot"))
+
+#######################################################################################
+# CACHE #
+#######################################################################################
+
+    #Cheap check for changes to the JSON file (and journal), modification time and size from a stat call
+    def _file_stamp(self):
+        stat = os.stat(self.file_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self.journal:
+            stamp += (self.journal.stamp(),)
+        return stamp
+
+    #Store presets as the cached library along with the hash object of the file contents they match
+    def _update_cache(self, presets, content_hash):
+        self._cache = dict(presets)
+        self.load_errors = {}
+        self._cache_hash = content_hash
+        self._cache_stamp = self._file_stamp()
+
+    #Forget the cached library so the next load re-reads the file
+    def invalidate_cache(self):
+        self._cache = None
+        self._cache_stamp = None
+        self._cache_hash = None
+        self._lazy = None
+
+    #Parse the raw JSON file contents (and journal records) into a dictionary of Preset objects and the load errors
+    def _parse_presets(self, raw, journal_raw=b""):
+
+        #An empty file holds no presets
+        presets_data = json.loads(raw) if raw.strip() else {}
+        if self.journal:
+            self.journal.replay(presets_data, journal_raw)
+
+        #A corrupted preset is reported in the load errors instead of stopping the other presets from loading
+        return validate_presets(presets_data)
+
+#######################################################################################
+# LOAD AND SAVE #
+#######################################################################################
+
+    #Parsed library and load errors for these file contents, from the warm-start snapshot if it was made from the same contents
+    def _snapshot_presets(self, raw, journal_raw, digest):
+        parsed = self._from_snapshot(self.snapshot.load(digest=digest)) if self.snapshot else None
+        if parsed is None:
+            parsed = self._parse_presets(raw, journal_raw)
+            if self.snapshot:
+                presets, errors = parsed
+                self.snapshot.save({"presets": {name: preset.to_dict() for name, preset in presets.items()}, "errors": errors},
+                                   digest, self._file_stamp()[:2])
+        return parsed
+
+    #(presets, load errors) from snapshot data, None if it isn't a snapshot of a library
+    #The presets go through the schema again (valid entries take its fast path), the snapshot file is not trusted
+    @staticmethod
+    def _from_snapshot(data):
+        if type(data) is not dict or type(data.get("presets")) is not dict or type(data.get("errors")) is not dict:
+            return None
+        return validate_presets(data["presets"])[0], data["errors"]
+
+    #Lazy mode library: a LazyPresets dictionary over the offset index with journal records replayed on top
+    def _lazy_presets(self):
+
+        stamp = self._file_stamp()
+        if self._lazy is None or stamp != self._lazy_stamp:
+            if self._lazy_source is None:
+                self._lazy_source = LazyPresetFile(self.file_path, self.cache_size, self.snapshot)
+            else:
+                self._lazy_source.check()
+
+            #Entries of the file are checked as they are read, journal records are checked here
+            self.load_errors = self._lazy_source.errors
+            presets = LazyPresets(self._lazy_source)
+            if self.journal:
+                for op, name, data in self.journal.records(self.journal.read()):
+                    self.load_errors.pop(name, None)
+                    if op == "delete":
+                        presets.pop(name, None)
+                        continue
+                    preset, problems = validate_preset(data, name)
+                    if problems:
+                        self.load_errors[name] = problems
+                    if preset is None:
+                        presets.pop(name, None)
+                    else:
+                        presets[name] = preset
+
+            self._lazy = presets
+            self._lazy_stamp = stamp
+
+        return self._lazy
+
+    #Return the cached library, re-reading the file only when its mtime/size changed and re-parsing only if its contents did
+    def _cached_presets(self):
+        if not self.create and not os.path.exists(self.file_path):
+            return {}
+        if self.lazy:
+            return self._lazy_presets()
+
+        stamp = self._file_stamp()
+        if self._cache is None or stamp != self._cache_stamp:
+            with open(self.file_path, 'rb') as file:
+                raw = file.read()
+            journal_raw = self.journal.read() if self.journal else b""
+
+            content_hash = hashlib.sha1(raw + journal_raw)
+            if self._cache is None or content_hash.digest() != self._cache_hash.digest():
+                self._cache, self.load_errors = self._snapshot_presets(raw, journal_raw, content_hash.digest())
+            self._cache_hash = content_hash
+            self._cache_stamp = stamp
+
+        return self._cache
+
     #Load all presets from the JSON file and return as a dictionary of Preset objects 
+    @instrumented("load_library")
     def load_presets(self):
-            
-        with open(self.file_path, 'r') as file:
-            presets_data = json.load(file)
-            presets= {}
-            for name, values in presets_data.items():
-                try:
-                    presets[name] = Preset.from_dict(values)
-
-                #Stops presets from not loading if there is a corrupted preset, otherwise all presets will fail to load
-                except (KeyError, TypeError, ValueError):
-                    continue
-            return presets
+
+        #Callers are free to add/remove entries in the returned dictionary without touching the cache
+        #In lazy mode the copy shares the offset index and parsed-preset cache, so no preset is parsed here
+        return self._cached_presets().copy()
 
     #Save a dictionary of Preset objects to the JSON File        
+    #The file is replaced atomically, in journal mode this also folds the journal into the new snapshot
+    @instrumented("write_library")
     def save_presets(self, presets):
+        if self.lazy:
+            self._save_lazy(presets)
+            return
+
         presets_data = {name: preset.to_dict() for name, preset in presets.items()}
+        raw = json.dumps(presets_data, indent=4).encode("utf-8")
+
+        atomic_write(self.file_path, raw)
+        if self.journal:
+            self.journal.clear()
+
+        #What was just written is already parsed, so keep it as the cache instead of reading it back
+        self._update_cache(presets, hashlib.sha1(raw))
+
+    #Lazy mode save, streamed to disk with unchanged presets copied as raw bytes (never holds the whole document)
+    def _save_lazy(self, presets):
+        offsets, digest = write_library(self.file_path, presets)
+        if self.journal:
+            self.journal.clear()
+
+        #The offset index is updated from what was written instead of scanning the new file
+        if self._lazy_source is None:
+            self._lazy_source = LazyPresetFile(self.file_path, self.cache_size, self.snapshot)
+        elif isinstance(presets, LazyPresets) and presets.source is self._lazy_source:
+            self._lazy_source.written(offsets, changed=presets.overlay, digest=digest)
+        else:
+            self._lazy_source.written(offsets, digest=digest)
+
+        previous = self._lazy
+        self._lazy = LazyPresets(self._lazy_source)
+        self._lazy_stamp = self._file_stamp()
+
+        #Carry the fingerprint index over when only the presets set on the saved dictionary changed, so it isn't rebuilt by parsing every preset
+        fingerprints = self._fingerprints if previous is not None and self._fingerprints_source is previous else None
+        self._fingerprints_source = None
+        if fingerprints is not None and isinstance(presets, LazyPresets) and presets.source is self._lazy_source:
+            for name in [name for name in fingerprints.fingerprints if name not in presets]:
+                fingerprints.remove(name)
+            for name, preset in presets.overlay.items():
+                fingerprints.add(name, preset)
+            if all(name in fingerprints.fingerprints for name in presets):
+                self._fingerprints_source = self._lazy
+
+    #Fold the journal into a fresh presets.json snapshot
+    def compact(self):
+        self.save_presets(self.load_presets())
+
+    #Append one change to the journal and apply it to the cache, compacting once the journal grows too long
+    def _append_to_journal(self, op, name, preset=None):
+        presets = self._cached_presets()
+        record = self.journal.append(PresetJournal.encode(op, name, preset.to_dict() if preset else None))
+        self.load_errors.pop(name, None)
+
+        if preset:
+            presets[name] = preset
+        else:
+            presets.pop(name, None)
+
+        #The cache was changed in place, so keep its fingerprint index in step
+        if self._fingerprints_source is presets:
+            if preset:
+                self._fingerprints.add(name, preset)
+            else:
+                self._fingerprints.remove(name)
+
+        #The cache hash covers snapshot + journal bytes, so the appended record just extends it
+        if self.lazy:
+            self._lazy_stamp = self._file_stamp()
+        else:
+            self._cache_hash.update(record)
+            self._cache_stamp = self._file_stamp()
 
-        with open(self.file_path, 'w') as file:
-            json.dump(presets_data, file, indent=4)
+        if self.journal.count >= COMPACT_AFTER:
+            self.compact()
+
+    #A second manager on the same library with the same options, sharing nothing with this one (for use on another thread)
+    def reopen(self):
+        return JsonManager(os.path.dirname(self.file_path), journal=self.journal is not None, lazy=self.lazy,
+                           cache_size=self.cache_size, snapshot=self.snapshot is not None, create=self.create)
+
+    #Fingerprint -> names index of the library, rebuilt only when the cached library is replaced
+    def fingerprint_index(self):
+        presets = self._cached_presets()
+        if self._fingerprints_source is not presets:
+            self._fingerprints = FingerprintIndex(presets)
+            self._fingerprints_source = presets
+        return self._fingerprints
+
+    #Load the library as a columnar PresetTable (NumPy is only imported when a table is asked for)
+    def load_table(self):
+        from preset_table import PresetTable
+        return PresetTable.from_presets(self._cached_presets())
+
+    #Save a PresetTable, replacing the whole library
+    def save_table(self, table):
+        self.save_presets(table.to_presets())
+
+    #Default path of the compiled binary library, next to presets.json
+    def binary_path(self):
+        return os.path.splitext(self.file_path)[0] + ".pamlib"
+
+    #Compile the library into the memory-mapped binary format (see binary_library), returns the file path
+    def export_binary(self, file_path=None):
+        from binary_library import write_binary
+        file_path = file_path or self.binary_path()
+        write_binary(file_path, self._cached_presets())
+        return file_path
+
+    #Open a binary library for reading, presets and attributes are read straight from the memory map
+    def open_binary(self, file_path=None):
+        from binary_library import BinaryPresetLibrary
+        return BinaryPresetLibrary(file_path or self.binary_path())
+
+    #Replace the JSON library with the contents of a binary library
+    def import_binary(self, file_path=None):
+        with self.open_binary(file_path) as library:
+            self.save_presets(library.to_presets())
 
     #Adds/updates preset in the JSON File
     def add_preset(self, name, preset):
+        if self.journal:
+            self._append_to_journal("put", name, preset)
+            return
 
         presets = self.load_presets() or {}
 
         presets[name] = preset
         self.save_presets(presets)
+
+    #Adds/updates many presets (name -> Preset) with a single write of the JSON File (the journal is folded in too)
+    def add_presets(self, new_presets):
+        presets = self.load_presets() or {}
+        presets.update(new_presets.items())
+        self.save_presets(presets)
+
+    #Removes a preset from the JSON File
+    def delete_preset(self, name):
+        if self.journal:
+            self._append_to_journal("delete", name)
+            return
+
+        presets = self.load_presets()
+        presets.pop(name, None)
+        self.save_presets(presets)
         
 
-#######################################################################################
\ No newline at end of file
+#######################################################################################
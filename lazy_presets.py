@@ -0,0 +1,348 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+#Import classes
+from preset_journal import open_temp
+from preset_schema import SchemaError, validate_preset
+from preset_snapshot import file_digest
+
+# LAZY PRESET LIBRARY #
+# Reads presets.json as a name -> byte range index and only parses a preset when it is accessed #
+# The index comes from one streaming pass over a memory map, parsed presets are kept in a bounded LRU cache #
+#######################################################################################
+
+#Number of parsed presets kept in memory per library file
+LRU_SIZE = 256
+
+_OPEN = re.compile(rb'\s*\{')
+_CLOSE = re.compile(rb'\s*\}')
+_KEY = re.compile(rb'\s*"([^"\\]*(?:\\.[^"\\]*)*)"\s*:\s*', re.S)
+_SEPARATOR = re.compile(rb'\s*([,}])')
+
+#A JSON object without nested objects (every preset entry), matched in one regex call
+_FLAT_OBJECT = re.compile(rb'\{[^"{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}]*)*\}', re.S)
+
+#Strings and brackets, for the rare value that holds nested objects or arrays
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]', re.S)
+_SCALAR = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[^,}\s]+', re.S)
+
+#######################################################################################
+# OFFSET INDEX #
+#######################################################################################
+
+#Return the byte offset just past the JSON value starting at start
+def _value_end(data, start):
+
+    #Fast path for files written by PAM (indent=4): an entry closes on a new line indented by four spaces
+    #JSON strings never contain a raw new line, so without another "{" in between this is the entry's closing brace
+    if data[start:start + 1] == b"{":
+        close = data.find(b"\n    }", start)
+        if close != -1 and data.find(b"{", start + 1, close) == -1:
+            return close + 6
+
+    flat = _FLAT_OBJECT.match(data, start)
+    if flat:
+        return flat.end()
+
+    if data[start:start + 1] in (b"{", b"["):
+        depth = 0
+        for token in _TOKEN.finditer(data, start):
+            if token.group() in (b"{", b"["):
+                depth += 1
+            elif token.group() in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    return token.end()
+
+    scalar = _SCALAR.match(data, start)
+    if not scalar:
+        raise ValueError(f"Malformed preset library at byte {start}")
+    return scalar.end()
+
+#Build {name: (start, end)} byte ranges of every preset in a JSON library without parsing the presets
+#Entries whose value isn't a JSON object can't be presets and are left out (as the eager loader skips them)
+def scan_offsets(data):
+    offsets = {}
+    opening = _OPEN.match(data, 0)
+    if not opening:
+        raise ValueError("Preset library is not a JSON object")
+
+    position = opening.end()
+    if _CLOSE.match(data, position):
+        return offsets
+
+    while True:
+        key = _KEY.match(data, position)
+        if not key:
+            raise ValueError(f"Malformed preset library at byte {position}")
+
+        name = key.group(1)
+        name = json.loads(b'"' + name + b'"') if b"\\" in name else name.decode("utf-8")
+
+        start = key.end()
+        end = _value_end(data, start)
+        if data[start:start + 1] == b"{":
+            offsets[name] = (start, end)
+        else:
+            offsets.pop(name, None)
+
+        separator = _SEPARATOR.match(data, end)
+        if not separator:
+            raise ValueError(f"Malformed preset library at byte {end}")
+        position = separator.end()
+        if separator.group(1) == b"}":
+            return offsets
+
+#######################################################################################
+# LIBRARY FILE #
+#######################################################################################
+
+class LazyPresetFile:
+
+    #Index one JSON library file, keeping up to cache_size parsed presets
+    #snapshot is an optional PresetSnapshot the offset index is stored in, so an unchanged file isn't scanned again next session
+    def __init__(self, file_path, cache_size=LRU_SIZE, snapshot=None):
+        self.file_path = file_path
+        self.cache_size = cache_size
+        self.snapshot = snapshot
+
+        #Name -> (start, end) byte range of the preset in the file
+        self.offsets = {}
+
+        #(mtime, size) of the file the offsets belong to
+        self.stamp = None
+
+        #Least recently used presets are dropped first
+        self.cache = OrderedDict()
+
+        #Name -> schema problems of the presets parsed so far that had any (see preset_schema), entries are only checked when read
+        self.errors = {}
+
+        self.scan()
+
+    def _current_stamp(self):
+        stat = os.stat(self.file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    #Build the offset index with one pass over a memory map of the file (only touched pages are read into memory)
+    #The map is closed again so the file can be replaced while the library is open
+    def scan(self):
+        self.stamp = self._current_stamp()
+        self.cache.clear()
+        self.errors.clear()
+        if not self.stamp[1]:
+            self.offsets = {}
+            return
+
+        if self.snapshot:
+            offsets = self.snapshot.load(digest=lambda: file_digest(self.file_path), stamp=self.stamp)
+            if type(offsets) is dict:
+                self.offsets = offsets
+                return
+
+        with open(self.file_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self.offsets = scan_offsets(data)
+
+        if self.snapshot:
+            self.snapshot.save(self.offsets, file_digest(self.file_path), self.stamp)
+
+    #Re-index if the file changed on disk since the last scan, returns True if it did
+    def check(self):
+        if self._current_stamp() != self.stamp:
+            self.scan()
+            return True
+        return False
+
+    #Record that the file was just rewritten with the given offsets, presets in changed (all if None) are dropped from the cache
+    #digest is the SHA-1 of what was written, used to store the new offsets in the snapshot
+    def written(self, offsets, changed=None, digest=None):
+        self.offsets = offsets
+        self.stamp = self._current_stamp()
+        if self.snapshot and digest is not None:
+            self.snapshot.save(offsets, digest, self.stamp)
+        if changed is None:
+            self.cache.clear()
+            self.errors.clear()
+        else:
+            for name in changed:
+                self.cache.pop(name, None)
+                self.errors.pop(name, None)
+
+    def _read(self, name):
+        start, end = self.offsets[name]
+        with open(self.file_path, 'rb') as file:
+            file.seek(start)
+            return file.read(end - start)
+
+    #Raw JSON bytes of one preset as stored in the file
+    def raw(self, name):
+        self.check()
+        return self._read(name)
+
+    #Preset from the raw JSON of one entry, its schema problems are recorded in errors (SchemaError if it can't be loaded)
+    def _parse(self, name, raw):
+        preset, problems = validate_preset(json.loads(raw), name)
+        if problems:
+            self.errors[name] = problems
+        if preset is None:
+            raise SchemaError(problems)
+        return preset
+
+    #Parsed Preset for one name, from the cache or the file
+    def preset(self, name):
+        self.check()
+        preset = self.cache.get(name)
+        if preset is not None:
+            self.cache.move_to_end(name)
+            return preset
+
+        preset = self._parse(name, self._read(name))
+        self.cache[name] = preset
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return preset
+
+    #Yield (name, Preset) for many names through one open file, presets not already cached are parsed without entering the cache
+    #The preset is None for names missing from the file or holding corrupted entries
+    def iter_presets(self, names):
+        self.check()
+        with open(self.file_path, 'rb') as file:
+            for name in names:
+                preset = self.cache.get(name)
+                if preset is None and name in self.offsets:
+                    start, end = self.offsets[name]
+                    file.seek(start)
+                    try:
+                        preset = self._parse(name, file.read(end - start))
+                    except (KeyError, TypeError, ValueError):
+                        preset = None
+                yield name, preset
+
+#######################################################################################
+# LAZY PRESET DICTIONARY #
+#######################################################################################
+
+class LazyPresets(MutableMapping):
+
+    #Dictionary of Preset objects backed by a LazyPresetFile
+    #Presets set on the dictionary are held in an overlay until the library is saved, everything else is read on access
+    def __init__(self, source, names=None, overlay=None):
+        self.source = source
+
+        #Library names in order (values unused, a dictionary keeps insertion order)
+        self.names = dict.fromkeys(source.offsets) if names is None else names
+
+        #Name -> Preset set on this dictionary and not yet read back from the file
+        self.overlay = {} if overlay is None else overlay
+
+    def __getitem__(self, name):
+        if name in self.overlay:
+            return self.overlay[name]
+        if name not in self.names:
+            raise KeyError(name)
+        try:
+            return self.source.preset(name)
+
+        #A corrupted entry behaves as a missing one, as it would have been skipped by the eager loader
+        except (KeyError, TypeError, ValueError):
+            raise KeyError(name)
+
+    def __setitem__(self, name, preset):
+        self.overlay[name] = preset
+        self.names[name] = None
+
+    def __delitem__(self, name):
+        del self.names[name]
+        self.overlay.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    #Presets in library order, corrupted entries are skipped
+    #Used by whole-library passes (similarity table, fingerprint index), so the file is opened once and the LRU cache is left alone
+    def items(self):
+        overlay = dict(self.overlay)
+        for name, preset in self.source.iter_presets(list(self.names)):
+            preset = overlay.get(name, preset)
+            if preset is not None:
+                yield name, preset
+
+    def values(self):
+        for _, preset in self.items():
+            yield preset
+
+    #Independent dictionary over the same file and cache (names and overlay are copied, presets are not parsed)
+    def copy(self):
+        return LazyPresets(self.source, dict(self.names), dict(self.overlay))
+
+    #Raw JSON bytes of a preset if it is unchanged from the file, None if it was set on this dictionary
+    def raw(self, name):
+        if name in self.overlay or name not in self.source.offsets:
+            return None
+        return self.source.raw(name)
+
+#######################################################################################
+# STREAMING SAVE #
+#######################################################################################
+
+#Write a dictionary of presets as a JSON library (same layout as json.dump with indent=4)
+#Returns its offsets index and the SHA-1 digest of the written file
+#Unchanged presets of a LazyPresets dictionary are copied as raw bytes without being parsed
+#The file is written through a temporary file and replaced atomically
+def write_library(file_path, presets):
+    source = presets.source if isinstance(presets, LazyPresets) else None
+    if source:
+        source.check()
+
+    offsets = {}
+    content_hash = hashlib.sha1()
+    file, temp_path = open_temp(file_path)
+    source_file = None
+    try:
+        source_file = open(source.file_path, 'rb') if source else None
+        with file:
+            write = lambda raw: (file.write(raw), content_hash.update(raw))
+            write(b"{")
+            position = 1
+            for index, name in enumerate(presets):
+                value = None
+                if source and name not in presets.overlay and name in source.offsets:
+                    start, end = source.offsets[name]
+                    source_file.seek(start)
+                    value = source_file.read(end - start)
+                else:
+                    value = json.dumps(presets[name].to_dict(), indent=4).replace("\n", "\n    ").encode("utf-8")
+
+                prefix = (b",\n    " if index else b"\n    ") + json.dumps(name).encode("utf-8") + b": "
+                write(prefix)
+                position += len(prefix)
+                offsets[name] = (position, position + len(value))
+                write(value)
+                position += len(value)
+
+            write(b"\n}" if offsets else b"}")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    finally:
+        if source_file:
+            source_file.close()
+
+    return offsets, content_hash.digest()
+
+#######################################################################################
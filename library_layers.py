@@ -0,0 +1,226 @@
+import os
+import threading
+from collections.abc import MutableMapping
+from concurrent.futures import Future, wait
+
+#Import classes
+from all_presets import presets as builtin_presets
+from json_manager import JsonManager
+
+# LAYERED PRESET LIBRARIES #
+# Merges the built-in presets with studio, project and user libraries, later layers override earlier ones #
+# Every layer is loaded on its own worker thread, a layer that doesn't answer in time is skipped instead of blocking the UI #
+#######################################################################################
+
+#Environment variables holding the directory of each shared library (the folder containing presets.json)
+STUDIO_LIBRARY_ENV = "PAM_STUDIO_LIBRARY"
+PROJECT_LIBRARY_ENV = "PAM_PROJECT_LIBRARY"
+
+#Seconds to wait for all layers together before merging what has arrived
+LAYER_TIMEOUT = 2.0
+
+class LibraryLayer:
+
+    #One read-only library directory, name is used in reports ("studio", "project")
+    def __init__(self, name, directory):
+        self.name = name
+        self.directory = directory
+        self.file_path = os.path.join(directory, "presets.json")
+        self._store = None
+
+    #(mtime, size) of the library file, None if it doesn't exist
+    def stamp(self):
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    #Parse the library, the file is never created or written to
+    def load(self):
+        if self._store is None:
+            self._store = JsonManager(self.directory, snapshot=False, create=False)
+        return self._store.load_presets()
+
+class UserLayer:
+
+    #The artist's own library, the writable JsonManager the UI saves to
+    def __init__(self, json_manager):
+        self.name = "user"
+        self.store = json_manager
+
+    def stamp(self):
+        return self.store._file_stamp()
+
+    def load(self):
+        return self.store.load_presets()
+
+#Shared layers configured through the environment, in precedence order (missing variables are left out)
+def configured_layers(environ=None):
+    environ = os.environ if environ is None else environ
+    layers = []
+    for name, variable in (("studio", STUDIO_LIBRARY_ENV), ("project", PROJECT_LIBRARY_ENV)):
+        directory = environ.get(variable, "").strip()
+        if directory:
+            layers.append(LibraryLayer(name, directory))
+    return layers
+
+#######################################################################################
+# MERGED PRESET DICTIONARY #
+#######################################################################################
+
+class LayeredPresets(MutableMapping):
+
+    #Dictionary of Preset objects merged from several layers, each name is read from the layer that holds it on access
+    #Merging only combines the name maps, so a lazy layer (see LazyPresets) isn't parsed to be merged
+    #Presets set on the dictionary are held in an overlay, the layers themselves are never changed
+    def __init__(self, owners, overlay=None):
+
+        #Name -> presets of the layer it comes from (None for presets set on the dictionary), in merged order
+        self.owners = owners
+        self.overlay = {} if overlay is None else overlay
+
+    def __getitem__(self, name):
+        if name in self.overlay:
+            return self.overlay[name]
+        return self.owners[name][name]
+
+    def __setitem__(self, name, preset):
+        self.overlay[name] = preset
+        self.owners.setdefault(name, None)
+
+    def __delitem__(self, name):
+        del self.owners[name]
+        self.overlay.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.owners)
+
+    def __len__(self):
+        return len(self.owners)
+
+    def __contains__(self, name):
+        return name in self.owners
+
+    #Presets in merged order, each layer is read in one pass through its own items() (corrupted lazy entries are skipped)
+    def items(self):
+        layers = {}
+        for name, owner in self.owners.items():
+            if name not in self.overlay:
+                layers.setdefault(id(owner), (owner, set()))[1].add(name)
+        presets = dict(self.overlay)
+        for owner, names in layers.values():
+            presets.update((name, preset) for name, preset in owner.items() if name in names)
+        for name in self.owners:
+            preset = presets.get(name)
+            if preset is not None:
+                yield name, preset
+
+    def values(self):
+        for _, preset in self.items():
+            yield preset
+
+    #Independent dictionary over the same layers (names and overlay are copied, presets are not parsed)
+    def copy(self):
+        return LayeredPresets(dict(self.owners), dict(self.overlay))
+
+#######################################################################################
+# LAYERED LIBRARY #
+#######################################################################################
+
+class LayeredLibrary:
+
+    #layers: shared layers lowest precedence first (defaults to configured_layers()), user_store: the writable user JsonManager
+    #The built-in presets sit below every layer and the user library above them
+    def __init__(self, user_store, layers=None, timeout=LAYER_TIMEOUT):
+        self.layers = (configured_layers() if layers is None else list(layers)) + [UserLayer(user_store)]
+        self.user_store = user_store
+        self.timeout = timeout
+
+        #Layer name -> (change stamp, presets) of its last successful load
+        self.cache = {}
+
+        #Layer name -> load still running from an earlier call (a hung share is never asked twice at once)
+        self.pending = {}
+
+        #Layer names that timed out or failed on the last load, and the layer each merged preset came from
+        self.unavailable = []
+        self.sources = {}
+
+        #Stamps the last merge was built from, and that merge
+        self._merged_stamps = None
+        self._merged = None
+
+    #Runs on a worker thread: returns (stamp, presets), presets is None when the cached copy is still current
+    def _load_layer(self, layer):
+        stamp = layer.stamp()
+        cached = self.cache.get(layer.name)
+        if cached is not None and cached[0] == stamp:
+            return stamp, None
+        return stamp, ({} if stamp is None else layer.load())
+
+    #Start loading a layer on its own daemon thread, a load hung on an unreachable share never keeps Maya from exiting
+    def _submit(self, layer):
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self._load_layer(layer))
+            except BaseException as error:
+                future.set_exception(error)
+
+        threading.Thread(target=run, name=f"PAMLibrary-{layer.name}", daemon=True).start()
+        return future
+
+    #Load every layer in parallel and merge them, returns a new dictionary the caller may change (see LayeredPresets)
+    #Layers that don't finish within the timeout (or fail) use their last loaded presets, or are left out if there are none
+    def load(self):
+        futures = {}
+        for layer in self.layers:
+            future = self.pending.get(layer.name)
+            if future is None:
+                future = self.pending[layer.name] = self._submit(layer)
+            futures[layer.name] = future
+        wait(list(futures.values()), timeout=self.timeout)
+
+        self.unavailable = []
+        for name, future in futures.items():
+            if not future.done():
+                self.unavailable.append(name)
+                continue
+            del self.pending[name]
+            try:
+                stamp, presets = future.result()
+            except (OSError, ValueError):
+                self.unavailable.append(name)
+                continue
+            if presets is not None:
+                self.cache[name] = (stamp, presets)
+
+        #Merging is skipped too when no layer changed
+        stamps = [(layer.name, self.cache[layer.name][0]) for layer in self.layers if layer.name in self.cache]
+        if stamps != self._merged_stamps:
+            owners = dict.fromkeys(builtin_presets, builtin_presets)
+            sources = dict.fromkeys(builtin_presets, "built-in")
+            for layer in self.layers:
+                if layer.name in self.cache:
+                    layer_presets = self.cache[layer.name][1]
+                    owners.update(dict.fromkeys(layer_presets, layer_presets))
+                    sources.update(dict.fromkeys(layer_presets, layer.name))
+            self._merged, self.sources, self._merged_stamps = LayeredPresets(owners), sources, stamps
+
+        return self._merged.copy()
+
+    #Name of the layer a preset came from ("built-in", "studio", "project" or "user"), None if it isn't in the library
+    def layer_of(self, name):
+        return self.sources.get(name)
+
+    #Drop the loads still running (a load hung on an unreachable share is left to finish on its daemon thread)
+    def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending = {}
+
+#######################################################################################
@@ -1,4 +1,6 @@
+import maya.cmds as cmds
 import maya.mel as mel
+import atexit
 import sys
 import os
 
@@ -14,19 +16,52 @@ sys.path.append(new_file_path)
 
 #Import classes
 from json_manager import JsonManager
+from sqlite_manager import SqliteManager
 from ui_manager import UiManager
+from startup_profile import PROFILE_ENV, StartupProfile
+from library_layers import LayeredLibrary, configured_layers
+import instrumentation
+
+#Environment variable choosing the preset store: "json" (presets.json, the default), "journal" (presets.json with single
+#changes appended to presets.journal and folded in every COMPACT_AFTER records) or "sqlite" (presets.db)
+#A new presets.db is filled from the presets.json next to it, so switching keeps the library
+STORE_ENV = "PAM_STORE"
 
 #Defines and initialise PAM Tool
 def main():
 
-    #Initilise JSON and load saved presets
-    json_manager = JsonManager()
-    presets = json_manager.load_presets()
+    #PAM_INSTRUMENT=1 records every host call per user operation, written to the Maya directory when Maya exits
+    if os.environ.get(instrumentation.INSTRUMENT_ENV) and not instrumentation.is_enabled():
+        instrumentation.enable()
+        atexit.register(instrumentation.export_all, file_path)
+
+    #Every startup phase is timed, PAM_PROFILE=1 shows the times once the UI is open
+    profile = StartupProfile()
+
+    #Initilise the preset store once, the UI uses this same instance (presets are indexed lazily, parsed on access)
+    with profile.phase("open library"):
+        store = os.environ.get(STORE_ENV, "").strip().lower()
+        if store == "sqlite":
+            json_manager = SqliteManager(file_path)
+        else:
+            json_manager = JsonManager(file_path, journal=store == "journal", lazy=True)
+
+    #Studio and project libraries (PAM_STUDIO_LIBRARY / PAM_PROJECT_LIBRARY) are merged under the user's, loaded in parallel
+    library = None
+    layers = configured_layers()
+    if layers:
+        library = LayeredLibrary(json_manager, layers)
 
     #Initialise and display main UI
-    ui_manager = UiManager()
-    ui_manager.create_UI()
+    with profile.phase("init"):
+        ui_manager = UiManager(json_manager=json_manager, profile=profile, library=library)
+    with profile.phase("build UI"):
+        ui_manager.create_UI()
+
+    if os.environ.get(PROFILE_ENV):
+        cmds.inViewMessage(assistMessage=profile.report(), position="topCenter", fade=True)
+    return ui_manager
 
 #Run main only if this script is executed directly
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
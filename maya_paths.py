@@ -0,0 +1,16 @@
+import maya.mel as mel
+
+# MAYA PATHS #
+# Maya environment lookups shared by the whole tool, each MEL call is made once per session #
+#######################################################################################
+
+_maya_app_dir = None
+
+#Return the Maya user directory (MAYA_APP_DIR), asking Maya only the first time
+def maya_app_dir():
+    global _maya_app_dir
+    if _maya_app_dir is None:
+        _maya_app_dir = mel.eval("getenv MAYA_APP_DIR ")
+    return _maya_app_dir
+
+#######################################################################################
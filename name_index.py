@@ -0,0 +1,136 @@
+import bisect
+import itertools
+
+# NAME INDEX #
+# Case-insensitive prefix and substring search over preset names, kept in step with the library by add/remove #
+# Prefixes are a binary search in a sorted list, substrings are narrowed by a trigram index before checking names #
+# Both structures are only built once a search needs them #
+#######################################################################################
+
+class NameIndex:
+
+    def __init__(self, names=()):
+
+        #Every indexed name in the order it was added (library order) -> lowercase name
+        self.names = {name: name.lower() for name in names}
+
+        #Sorted (lowercase name, name) pairs for prefix search, built on the first prefix search
+        self._sorted_names = None
+
+        #Lowercase trigram -> names containing it for substring search, built on the first substring search
+        self._trigrams = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    @staticmethod
+    def _split(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @property
+    def sorted_names(self):
+        if self._sorted_names is None:
+            self._sorted_names = sorted((key, name) for name, key in self.names.items())
+        return self._sorted_names
+
+    @property
+    def trigrams(self):
+        if self._trigrams is None:
+            self._trigrams = {}
+            for name, key in self.names.items():
+                for trigram in self._split(key):
+                    self._trigrams.setdefault(trigram, set()).add(name)
+        return self._trigrams
+
+    #Returns True if the name wasn't indexed yet
+    def add(self, name):
+        if name in self.names:
+            return False
+        key = name.lower()
+        self.names[name] = key
+        if self._sorted_names is not None:
+            bisect.insort(self._sorted_names, (key, name))
+        if self._trigrams is not None:
+            for trigram in self._split(key):
+                self._trigrams.setdefault(trigram, set()).add(name)
+        return True
+
+    def remove(self, name):
+        key = self.names.pop(name, None)
+        if key is None:
+            return
+        if self._sorted_names is not None:
+            position = bisect.bisect_left(self._sorted_names, (key, name))
+            del self._sorted_names[position]
+        if self._trigrams is not None:
+            for trigram in self._split(key):
+                names = self._trigrams.get(trigram)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del self._trigrams[trigram]
+
+    #Add and remove names so the index holds exactly the given names, returns the names that were added
+    def sync(self, names):
+        for name in [name for name in self.names if name not in names]:
+            self.remove(name)
+        return [name for name in names if self.add(name)]
+
+#######################################################################################
+# SEARCH #
+#######################################################################################
+
+    #Names starting with text, in alphabetical order
+    def prefix(self, text, limit=None):
+        text = text.lower()
+        matches = []
+        position = bisect.bisect_left(self.sorted_names, (text, ""))
+        while position < len(self.sorted_names) and self.sorted_names[position][0].startswith(text):
+            matches.append(self.sorted_names[position][1])
+            if limit is not None and len(matches) >= limit:
+                break
+            position += 1
+        return matches
+
+    #Names containing text anywhere (library order for short text, alphabetical once the trigram index is used)
+    def substring(self, text, limit=None):
+        text = text.lower()
+        if len(text) < 3:
+            candidates = self.names
+        else:
+            #Only names holding every trigram of the text can contain it, start from the rarest trigram
+            sets = sorted((self.trigrams.get(trigram, set()) for trigram in self._split(text)), key=len)
+            candidates = sorted(set.intersection(*sets), key=self.names.get)
+
+        matches = []
+        for name in candidates:
+            if text in self.names[name]:
+                matches.append(name)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    #Names matching the text, prefix matches first then other substring matches (all names for empty text)
+    def search(self, text, limit=None):
+        if not text:
+            return list(itertools.islice(self.names, limit))
+
+        matches = self.prefix(text, limit)
+        if limit is not None and len(matches) >= limit:
+            return matches
+
+        found = set(matches)
+        remaining = None if limit is None else limit - len(matches)
+        for name in self.substring(text):
+            if name not in found:
+                matches.append(name)
+                if remaining is not None:
+                    remaining -= 1
+                    if not remaining:
+                        break
+        return matches
+
+#######################################################################################
@@ -0,0 +1,165 @@
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+# NCLOTH INDEX #
+# Scene-wide map from transforms and mesh shapes to their nCloth/nRigid nodes #
+# Built once per scene and kept current by DG callbacks, so lookups are a dictionary read #
+#######################################################################################
+
+#Simulation node types tracked by the index (nCloth objects and passive colliders)
+TRACKED_TYPES = ["nCloth", "nRigid"]
+
+class NClothIndex:
+
+    def __init__(self):
+
+        #Object (transform or mesh shape) -> {node type: [simulation nodes]}
+        self.objects = {}
+
+        #Simulation node -> (node type, objects it was indexed under), used to drop stale entries
+        self.members = {}
+
+        #Simulation nodes whose connections changed since the last lookup
+        self.dirty = set()
+
+        #Set when the whole index has to be rebuilt (new/opened scene, renames)
+        self.stale = True
+
+        self.callback_ids = []
+
+#######################################################################################
+# BUILDING #
+#######################################################################################
+
+    #Rebuild the whole index from the scene
+    def build(self):
+        self.objects = {}
+        self.members = {}
+        self.dirty.clear()
+
+        for node_type in TRACKED_TYPES:
+            for sim_node in cmds.ls(type=node_type) or []:
+                self._add_node(sim_node, node_type)
+
+        self.stale = False
+
+    #Index one simulation node under every mesh shape connected to it and the transforms of those shapes
+    def _add_node(self, sim_node, node_type):
+        shapes = cmds.listConnections(sim_node, type="mesh", shapes=True) or []
+        transforms = []
+        if shapes:
+            transforms = cmds.listRelatives(shapes, parent=True) or []
+
+        objects = list(dict.fromkeys(shapes + transforms))
+        for obj in objects:
+            sim_nodes = self.objects.setdefault(obj, {}).setdefault(node_type, [])
+            if sim_node not in sim_nodes:
+                sim_nodes.append(sim_node)
+
+        self.members[sim_node] = (node_type, objects)
+
+    #Remove every entry of one simulation node
+    def _remove_node(self, sim_node):
+        node_type, objects = self.members.pop(sim_node, (None, []))
+        for obj in objects:
+            sim_nodes = self.objects.get(obj, {}).get(node_type, [])
+            if sim_node in sim_nodes:
+                sim_nodes.remove(sim_node)
+
+    #Bring the index up to date, re-querying only simulation nodes touched by callbacks
+    def refresh(self):
+        if self.stale:
+            self.build()
+            return
+
+        while self.dirty:
+            sim_node = self.dirty.pop()
+            node_type = self.members.get(sim_node, (None,))[0]
+            self._remove_node(sim_node)
+
+            if cmds.objExists(sim_node):
+                self._add_node(sim_node, node_type or cmds.nodeType(sim_node))
+
+#######################################################################################
+# LOOKUPS #
+#######################################################################################
+
+    #Return the simulation nodes of one type attached to a transform or mesh shape
+    def sim_nodes(self, obj, node_type):
+        if self.stale or self.dirty:
+            self.refresh()
+        return list(self.objects.get(obj, {}).get(node_type, []))
+
+    #Return the nCloth nodes attached to a transform or mesh shape
+    def ncloth_nodes(self, obj):
+        return self.sim_nodes(obj, "nCloth")
+
+    #Return the passive collider (nRigid) nodes attached to a transform or mesh shape
+    def collider_nodes(self, obj):
+        return self.sim_nodes(obj, "nRigid")
+
+    #Return every indexed nCloth node in the scene
+    def all_ncloth_nodes(self):
+        if self.stale or self.dirty:
+            self.refresh()
+        return [sim_node for sim_node, (node_type, _) in self.members.items() if node_type == "nCloth"]
+
+#######################################################################################
+# CALLBACKS #
+#######################################################################################
+
+    #Register DG and scene callbacks that keep the index current
+    def install_callbacks(self):
+        if self.callback_ids:
+            return
+
+        for node_type in TRACKED_TYPES:
+            self.callback_ids.append(om.MDGMessage.addNodeAddedCallback(self._on_node_changed, node_type))
+            self.callback_ids.append(om.MDGMessage.addNodeRemovedCallback(self._on_node_changed, node_type))
+
+        self.callback_ids.append(om.MDGMessage.addConnectionCallback(self._on_connection_changed))
+        self.callback_ids.append(om.MNodeMessage.addNameChangedCallback(om.MObject(), self._on_name_changed))
+
+        for message in (om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen, om.MSceneMessage.kAfterImport):
+            self.callback_ids.append(om.MSceneMessage.addCallback(message, self._on_scene_changed))
+
+    #Remove all callbacks registered by this index
+    def remove_callbacks(self):
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+
+    #Node added or removed, its entries are re-queried on the next lookup
+    def _on_node_changed(self, node, *args):
+        self.dirty.add(om.MFnDependencyNode(node).name())
+
+    #Connection made or broken, only matters when one side is a tracked simulation node
+    def _on_connection_changed(self, src_plug, dst_plug, made, *args):
+        for plug in (src_plug, dst_plug):
+            dep_node = om.MFnDependencyNode(plug.node())
+            if dep_node.typeName in TRACKED_TYPES:
+                self.dirty.add(dep_node.name())
+
+    #Renaming an indexed node changes the keys of the index, so rebuild lazily
+    def _on_name_changed(self, node, previous_name, *args):
+        if previous_name in self.objects or previous_name in self.members:
+            self.stale = True
+
+    def _on_scene_changed(self, *args):
+        self.stale = True
+
+#######################################################################################
+# SHARED INDEX #
+#######################################################################################
+
+_index = None
+
+#Return the index shared by the whole tool, creating it and registering its callbacks on first use
+def get_index():
+    global _index
+    if _index is None:
+        _index = NClothIndex()
+        _index.install_callbacks()
+    return _index
+
+#######################################################################################
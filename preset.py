@@ -1,15 +1,57 @@
+import hashlib
 import maya.cmds as cmds
-import maya.mel as mel
+
+from apply_engine import apply_presets, summarize
+from instrumentation import instrumented
+
+#nCloth simulation attributes managed by PAM (every preset field except name and description)
+SIM_ATTRIBUTES = ["bounce", "friction", "stretchResistance", "compressionResistance", "bendResistance", "bendAngleDropoff",
+                  "restitutionAngle", "rigidity", "deformResistance", "restLengthScale", "pointMass", "tangentialDrag",
+                  "damp", "stretchDamp", "scalingRelation", "pressureMethod", "startPressure", "airTightness",
+                  "incompressibility", "maxIterations", "pushOutRadius"]
+
+#Simulation attributes holding whole numbers (option menu indices and the iteration count)
+INT_ATTRIBUTES = ["scalingRelation", "pressureMethod", "maxIterations"]
+
+#Range of every simulation attribute as shown in the UI (slider min/max, option menu index range)
+ATTRIBUTE_RANGES = {"bounce": {"min": 0.0, "max": 1.0}, "friction": {"min": 0.0, "max": 4.0},
+                    "stretchResistance": {"min": 0, "max": 200}, "compressionResistance": {"min": 0, "max": 200},
+                    "bendResistance": {"min": 0, "max": 200}, "bendAngleDropoff": {"min": 0, "max": 1},
+                    "restitutionAngle": {"min": 0, "max": 720.0}, "rigidity": {"min": 0, "max": 10},
+                    "deformResistance": {"min": 0, "max": 10}, "restLengthScale": {"min": 0, "max": 2},
+                    "pointMass": {"min": 0, "max": 50}, "tangentialDrag": {"min": 0, "max": 1},
+                    "damp": {"min": 0, "max": 10}, "stretchDamp": {"min": 0, "max": 10},
+                    "scalingRelation": {"min": 0, "max": 2}, "pressureMethod": {"min": 0, "max": 1},
+                    "startPressure": {"min": -1, "max": 1}, "airTightness": {"min": 0.0, "max": 1.0},
+                    "incompressibility": {"min": 0.0, "max": 200.0}, "maxIterations": {"min": 0, "max": 5000},
+                    "pushOutRadius": {"min": -1, "max": 10}}
+
+#Decimal places kept when fingerprinting, matches the precision of the UI sliders
+FINGERPRINT_PRECISION = 3
+
+#Value of a simulation attribute as a whole number of UI precision steps, two values display identically when these are equal
+def quantize(value):
+    return int(round(float(value) * 10 ** FINGERPRINT_PRECISION))
+
+#Stable fingerprint of a settings dictionary (or preset values) with every simulation attribute quantised to the UI precision
+#Settings that display identically in the UI get the same fingerprint, so float noise never breaks a match
+def fingerprint(settings):
+    quantized = [quantize(settings[attr]) for attr in SIM_ATTRIBUTES]
+    return hashlib.sha1(repr(quantized).encode("ascii")).hexdigest()[:16]
 
 # PRESET CLASS #
 #######################################################################################
 class Preset:
+
+    #Extra data carried with the preset (e.g. the attributes of an imported Maya preset PAM doesn't manage), None for most presets
+    metadata = None
+
     def __init__(self, name, description, bounce, friction, 
                  stretchResistance, compressionResistance, bendResistance, 
                  bendAngleDropoff, restitutionAngle, rigidity, deformResistance,
                  restLengthScale, pointMass, tangentialDrag, damp, stretchDamp,
                  scalingRelation, pressureMethod, startPressure, airTightness, incompressibility,
-                 maxIterations, pushOutRadius):
+                 maxIterations, pushOutRadius, metadata=None):
         
         #Initialising all simulation attributes 
         self.name = name
@@ -37,25 +79,43 @@ class Preset:
         self.maxIterations = maxIterations
         self.pushOutRadius = pushOutRadius
 
+        #Only stored when there is some, so presets without metadata keep their dictionary (and file entry) unchanged
+        if metadata is not None:
+            self.metadata = metadata
+
 
 #######################################################################################
 # CONVERT PRESET DATA TO AND FROM DICTIONARIES #
 #######################################################################################
 
-    #Converts preset object attributes to a dictionary
+    #Converts preset object attributes to a dictionary (metadata is only included when the preset has some)
     def to_dict(self):
         return self.__dict__
     
-    #Create a preset object from a dictionary of attributes
+    #Create a preset object from a dictionary of attributes, checked against the schema (see preset_schema)
+    #Values are coerced and clamped to the UI ranges, data that can't be repaired raises SchemaError (a ValueError)
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        from preset_schema import SchemaError, validate_preset
+        preset, problems = validate_preset(data)
+        if preset is None:
+            raise SchemaError(problems)
+        return preset
+
+    #Returns only the simulation attributes as a dictionary (attribute name -> value)
+    def sim_values(self):
+        return {attr: getattr(self, attr) for attr in SIM_ATTRIBUTES}
+
+    #Returns the preset's fingerprint, see fingerprint()
+    def fingerprint(self):
+        return fingerprint(self.__dict__)
     
 #######################################################################################
 # APPLY PRESET #
 #######################################################################################
 
     # Apply selected presets modified nCloth attributes to the selected mesh 
+    @instrumented("apply")
     def apply_preset(self):
         #Get currently selected objects in the scene
         selection = cmds.ls(selection=True)
@@ -70,47 +130,32 @@ class Preset:
         selection_str = ", ".join(selection)
         confirmation = cmds.confirmDialog(title="Confirm Action", message=f"Are you sure you'd like to apply Preset '{self.name}' to {selection_str}?", button=['Yes','No'], defaultButton='Yes', cancelButton='No', dismissString='No')
         if confirmation == 'Yes': 
-            for obj in selection:
-                cmds.select(obj, replace=True) 
-
-                #Use MEL command to apply nCloth to the selected mesh/es for nCloth simulation (if mesh isn't already nCloth)
-                mel.eval("createNCloth 0")
-
-                #Get all shape nodes of the object
-                shapes = cmds.listRelatives(obj, shapes=True) or []
-                for shape in shapes:
-
-                    #Find any connected nCloth nodes
-                    connections = cmds.listConnections(shape, type="nCloth") or []
-
-                    #Apply all preset attributes to the nCloth node
-                    for ncloth_node in connections: 
-                        cmds.setAttr(ncloth_node + ".bounce", self.bounce)
-                        cmds.setAttr(ncloth_node + ".friction", self.friction)
-                        cmds.setAttr(ncloth_node + ".stretchResistance", self.stretchResistance)
-                        cmds.setAttr(ncloth_node + ".compressionResistance", self.compressionResistance)
-                        cmds.setAttr(ncloth_node + ".bendResistance", self.bendResistance)
-                        cmds.setAttr(ncloth_node + ".bendAngleDropoff", self.bendAngleDropoff)
-                        cmds.setAttr(ncloth_node + ".restitutionAngle", self.restitutionAngle)
-                        cmds.setAttr(ncloth_node + ".rigidity", self.rigidity)
-                        cmds.setAttr(ncloth_node + ".deformResistance", self.deformResistance)
-                        cmds.setAttr(ncloth_node + ".restLengthScale", self.restLengthScale)
-                        cmds.setAttr(ncloth_node + ".pointMass", self.pointMass) 
-                        cmds.setAttr(ncloth_node + ".tangentialDrag", self.tangentialDrag)
-                        cmds.setAttr(ncloth_node + ".damp", self.damp)
-                        cmds.setAttr(ncloth_node + ".stretchDamp", self.stretchDamp)
-                        cmds.setAttr(ncloth_node + ".scalingRelation", self.scalingRelation)
-                        cmds.setAttr(ncloth_node + ".pressureMethod", self.pressureMethod)
-                        cmds.setAttr(ncloth_node + ".startPressure", self.startPressure)
-                        cmds.setAttr(ncloth_node + ".airTightness", self.airTightness)
-                        cmds.setAttr(ncloth_node + ".incompressibility", self.incompressibility)
-                        cmds.setAttr(ncloth_node + ".maxIterations", self.maxIterations)
-                        cmds.setAttr(ncloth_node + ".pushOutRadius", self.pushOutRadius)
+
+            #Apply nCloth (if the mesh isn't already nCloth) and the preset attributes, only plugs that differ are written
+            #The whole apply is one undo step, if any write fails nothing is changed
+            results = self.apply_to(selection, transactional=True)
+            summary = summarize(results)
+            if summary["rolled_back"]:
+                failed = next(result for result in results if result["status"] == "rolled_back")
+                cmds.warning(f"Could not apply preset '{self.name}', no changes were made: {failed['error']}")
+            else:
+                cmds.inViewMessage(assistMessage=f"Applied '{self.name}' to {summary['nodes']} object(s), "
+                                   f"{summary['written']} attribute(s) written, {summary['skipped']} already matched",
+                                   position="topCenter", fade=True)
+
+            for result in results:
+                if result["status"] == "error":
+                    cmds.warning(f"Could not apply preset '{self.name}' to {result['node']}: {result['error']}")
 
         #User has cancelled the action
         else: 
             return
 
+    #Apply this preset to the given objects without using the selection or showing any dialogs
+    #Returns one result dictionary per object (see apply_engine.apply_presets)
+    def apply_to(self, nodes, create_missing=True, transactional=False):
+        return apply_presets([(node, self) for node in nodes], create_missing=create_missing, transactional=transactional)
+
 #######################################################################################
 # SAVE PRESET #
 #######################################################################################
@@ -118,7 +163,9 @@ class Preset:
     #Class method used so the class can be called directly since we do not have a class instance 
 
     @staticmethod
-    def save_preset(settings_dict, json_manager, ncloth_controls, update_dropdown_func, presets):
+    @instrumented("save")
+    #fingerprints is the index the duplicate check runs on, the store's own index if not given (see UiManager.fingerprint_index)
+    def save_preset(settings_dict, json_manager, ncloth_controls, update_dropdown_func, presets, fingerprints=None):
 
         #Ensures new name of custom preset has no leading or trailing spaces
         new_name = settings_dict.get("name", "").strip()
@@ -138,7 +185,17 @@ class Preset:
             cmds.warning(f"Preset '{new_name}' already exists! Please choose another name.")
             return
         
-        confirmation = cmds.confirmDialog(title="Confirm Save", message=f"Are you sure you want to save: '{new_name}'?", button=["Yes", "No"], dismissString="No")
+        message = f"Are you sure you want to save: '{new_name}'?"
+
+        #Flag presets that already hold exactly these settings (single hash lookup in the library's fingerprint index)
+        if fingerprints is None:
+            fingerprints = json_manager.fingerprint_index()
+        duplicates = fingerprints.lookup(settings_dict)
+        if duplicates:
+            cmds.warning(f"Preset '{new_name}' has the same settings as: {', '.join(duplicates)}")
+            message += f"\n\nIt has the same settings as: {', '.join(duplicates)}"
+
+        confirmation = cmds.confirmDialog(title="Confirm Save", message=message, button=["Yes", "No"], dismissString="No")
 
         if confirmation == "Yes":
 
@@ -149,9 +206,7 @@ class Preset:
 
             json_manager.add_preset(new_name, preset)
 
-            #Loading presets after adding otherwise it breaks
-            presets = json_manager.load_presets()
-
+            #The dictionary already holds the new preset (reloading the store would drop presets from shared library layers)
             update_dropdown_func(presets, ncloth_controls)
         else:
             return
@@ -161,6 +216,7 @@ class Preset:
 #######################################################################################
 
     @classmethod
+    @instrumented("delete")
     def delete_preset(cls, preset_name, loaded_presets, json_manager, ncloth_controls, update_dropdown_func):
 
         #Ensures preset name has no leading or trailing spaces
@@ -182,9 +238,9 @@ class Preset:
 
         if confirmation == "Yes":
 
-            #Remove preset from dictionary
+            #Remove preset from dictionary and from the saved library
             loaded_presets.pop(preset_name)
-            json_manager.save_presets(loaded_presets)
+            json_manager.delete_preset(preset_name)
 
             #Update dropdown menu of presets
             update_dropdown_func(loaded_presets, ncloth_controls)
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+
+# PRESET JOURNAL #
+# Append-only log of preset changes, one JSON record per line, replayed on top of the presets.json snapshot #
+#######################################################################################
+
+#Fold the journal into a fresh snapshot once it holds this many records
+COMPACT_AFTER = 200
+
+#Umask of the process, read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+#Create a uniquely named temporary file next to file_path, to be renamed over it, returns (open binary file, temporary path)
+#The background writer and the main thread may write the same file (e.g. a snapshot) at once, so the name is never shared
+#The file gets the mode of the file it replaces (or of a new file), mkstemp alone would leave it readable by its owner only
+def open_temp(file_path):
+    directory, name = os.path.split(os.path.abspath(file_path))
+    descriptor, temp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    try:
+        os.chmod(temp_path, mode)
+        return os.fdopen(descriptor, 'wb'), temp_path
+    except BaseException:
+        os.close(descriptor)
+        os.remove(temp_path)
+        raise
+
+#Write bytes to a file through a temporary file and an atomic rename, so a crash never leaves a half-written file
+def atomic_write(file_path, raw):
+    file, temp_path = open_temp(file_path)
+    try:
+        with file:
+            file.write(raw)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+class PresetJournal:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+        #Number of records currently in the journal, known after a replay or append
+        self.count = 0
+
+        #Set when the journal ends in a truncated record, the next append starts on a fresh line
+        self.torn_tail = False
+
+    #Encode one change as a journal line, data is the preset dictionary for "put" and None for "delete"
+    @staticmethod
+    def encode(op, name, data=None):
+        return (json.dumps({"op": op, "name": name, "data": data}, separators=(",", ":")) + "\n").encode("utf-8")
+
+    #Append one encoded record and flush it to disk before returning, returns the bytes actually written
+    def append(self, record):
+        if self.torn_tail:
+            record = b"\n" + record
+            self.torn_tail = False
+
+        with open(self.file_path, 'ab') as file:
+            file.write(record)
+            file.flush()
+            os.fsync(file.fileno())
+        self.count += 1
+        return record
+
+    #Read the raw journal contents (empty if there is no journal yet)
+    def read(self):
+        try:
+            with open(self.file_path, 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return b""
+
+    #Yield the (op, name, data) of every complete journal record in order
+    def records(self, raw):
+        self.count = 0
+        self.torn_tail = bool(raw) and not raw.endswith(b"\n")
+        for line in raw.splitlines():
+            try:
+                record = json.loads(line)
+                op, name = record["op"], record["name"]
+            #A crash while appending can leave a truncated last line, it never reached disk completely so it is ignored
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            self.count += 1
+            yield op, name, record.get("data")
+
+    #Apply journal records in order to a dictionary of raw preset data
+    def replay(self, presets_data, raw):
+        for op, name, data in self.records(raw):
+            if op == "put":
+                presets_data[name] = data
+            elif op == "delete":
+                presets_data.pop(name, None)
+        return presets_data
+
+    #Empty the journal once its records are folded into the snapshot
+    def clear(self):
+        if os.path.exists(self.file_path):
+            atomic_write(self.file_path, b"")
+        self.count = 0
+        self.torn_tail = False
+
+    #(mtime, size) of the journal file, None if it doesn't exist
+    def stamp(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+#######################################################################################
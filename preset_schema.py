@@ -0,0 +1,201 @@
+import math
+
+#Import classes
+from preset import Preset, ATTRIBUTE_RANGES, INT_ATTRIBUTES, SIM_ATTRIBUTES
+
+# PRESET SCHEMA #
+# Every preset field with its type and range, defined once and checked by one validating function #
+# Values are coerced to the field type and clamped to the UI range, entries that can't be repaired are rejected with their errors #
+#######################################################################################
+
+#Simulation attributes shown as option menus, an index outside the menu is an error instead of being clamped
+CHOICE_ATTRIBUTES = ["scalingRelation", "pressureMethod"]
+
+#Field name -> type, min, max and whether out of range values are rejected, in Preset constructor order
+#Optional fields may be left out (or null), the preset then doesn't store them
+SCHEMA = {"name": {"type": str}, "description": {"type": str}}
+for _attr in SIM_ATTRIBUTES:
+    SCHEMA[_attr] = {"type": int if _attr in INT_ATTRIBUTES else float, "min": ATTRIBUTE_RANGES[_attr]["min"],
+                     "max": ATTRIBUTE_RANGES[_attr]["max"], "choice": _attr in CHOICE_ATTRIBUTES}
+SCHEMA["metadata"] = {"type": dict, "optional": True}
+
+class SchemaError(ValueError):
+
+    #Raised by Preset.from_dict for data that doesn't fit the schema, problems holds every error found in the entry
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+#######################################################################################
+# COERCION (SLOW PATH) #
+#######################################################################################
+
+#Returned by the coercion helpers for values that can't be repaired, the entry is then rejected
+_INVALID = object()
+_MISSING = object()
+
+#Value for a string field that isn't a string, the preset name falls back to its library key and a missing description to ""
+def _coerce_str(value, field, default, problems):
+    if value is _MISSING or value is None:
+        if default is not None:
+            problems.append(f"{field}: missing, using '{default}'")
+            return default
+        problems.append(f"{field}: missing")
+        return _INVALID
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        problems.append(f"{field}: {value!r} is not text, converted")
+        return str(value)
+    problems.append(f"{field}: {value!r} is not text")
+    return _INVALID
+
+#Number for a float field that isn't an int or float, numeric strings are converted
+def _coerce_float(value, field, problems):
+    if value is _MISSING:
+        problems.append(f"{field}: missing")
+        return _INVALID
+
+    #Subclasses of float (e.g. NumPy floats) are numbers already
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            number = None
+        if number is not None and math.isfinite(number):
+            problems.append(f"{field}: {value!r} is text, converted to {number}")
+            return number
+    problems.append(f"{field}: {value!r} is not a number")
+    return _INVALID
+
+#Whole number for an int field that isn't an int, whole floats and numeric strings are converted
+def _coerce_int(value, field, problems):
+    if value is _MISSING:
+        problems.append(f"{field}: missing")
+        return _INVALID
+    number = value
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            number = None
+    if isinstance(number, float) and number.is_integer():
+        problems.append(f"{field}: {value!r} converted to {int(number)}")
+        return int(number)
+    problems.append(f"{field}: {value!r} is not a whole number")
+    return _INVALID
+
+#Value outside the UI range: clamped, or rejected for option menu indices (and NaN or infinity)
+def _out_of_range(value, field, low, high, choice, problems):
+    if value is _INVALID:
+        return value
+    if choice or not math.isfinite(value):
+        problems.append(f"{field}: {value!r} is outside {low}..{high}")
+        return _INVALID
+    #Clamped to a bound but kept the value's own type (an int bound must not turn a float field into an int)
+    clamped = type(value)(min(max(value, low), high))
+    problems.append(f"{field}: {value!r} is outside {low}..{high}, clamped to {clamped}")
+    return clamped
+
+#######################################################################################
+# VALIDATOR #
+#######################################################################################
+
+#Required fields in schema order, an entry holding exactly these (as every library written by PAM does) takes the fast check
+_ORDER = tuple(field for field in SCHEMA if not SCHEMA[field].get("optional"))
+_OPTIONAL = tuple(field for field in SCHEMA if SCHEMA[field].get("optional"))
+
+#Accepted types, min and max of every required field in _ORDER (no range for text)
+#Float fields accept ints too, their bounds are floats which keeps the usual float to float comparison about twice as fast as mixed
+_CHECKS = []
+for _field in _ORDER:
+    _spec = SCHEMA[_field]
+    if _spec["type"] is str:
+        _CHECKS.append(((str,), None, None))
+    elif _spec["type"] is int:
+        _CHECKS.append(((int,), _spec["min"], _spec["max"]))
+    else:
+        _CHECKS.append(((float, int), float(_spec["min"]), float(_spec["max"])))
+_CHECKS = tuple(_CHECKS)
+
+#Validate one entry: returns (Preset or None, problems)
+#The preset is None when the entry was rejected, problems also lists values that were converted or clamped (empty for a valid entry)
+#key is the entry's name in the library, used when the data has no name
+def validate_preset(data, key=None):
+    if type(data) is dict and tuple(data) == _ORDER:
+        for value, (types, low, high) in zip(data.values(), _CHECKS):
+            if type(value) not in types or (low is not None and not low <= value <= high):
+                return repair(data, key)
+        preset = object.__new__(Preset)
+        preset.__dict__ = data.copy()
+        return preset, ()
+    return repair(data, key)
+
+#Field by field check for anything the fast check didn't accept (optional fields included)
+#Coerces what it can and collects every problem, the entry is rejected if a required field can't be repaired
+def repair(data, key=None):
+    if type(data) is not dict:
+        return None, [f"entry is {type(data).__name__}, not an object"]
+    problems = []
+    values = {}
+    optional = {}
+    for field, spec in SCHEMA.items():
+        value = data.get(field, _MISSING)
+        if spec.get("optional"):
+            if value is _MISSING or value is None:
+                continue
+            if type(value) is not spec["type"]:
+                problems.append(f"{field}: {value!r} is not a {spec['type'].__name__}, ignored")
+                continue
+            optional[field] = value
+            continue
+
+        if spec["type"] is str:
+            if type(value) is not str:
+                default = key if field == "name" else "" if field == "description" else None
+                value = _coerce_str(value, field, default, problems)
+            values[field] = value
+            continue
+
+        if spec["type"] is int:
+            if type(value) is not int:
+                value = _coerce_int(value, field, problems)
+        elif type(value) not in (float, int):
+            value = _coerce_float(value, field, problems)
+        if value is _INVALID or not spec["min"] <= value <= spec["max"]:
+            value = _out_of_range(value, field, spec["min"], spec["max"], spec.get("choice", False), problems)
+        values[field] = value
+
+    if len(data) != len(_ORDER):
+        unknown = [name for name in data if name not in SCHEMA]
+        if unknown:
+            problems.append("unknown field(s) ignored: " + ", ".join(map(str, unknown)))
+    if any(value is _INVALID for value in values.values()):
+        return None, problems
+
+    preset = object.__new__(Preset)
+    values.update(optional)
+    preset.__dict__ = values
+    return preset, problems
+
+#Validate a dictionary of raw preset data (name -> dictionary) in one pass
+#Returns (name -> Preset of the accepted entries, name -> problems of every entry that had any)
+def validate_presets(presets_data):
+    presets = {}
+    errors = {}
+    for name, data in presets_data.items():
+        preset, problems = validate_preset(data, name)
+        if preset is not None:
+            presets[name] = preset
+        if problems:
+            errors[name] = problems
+    return presets, errors
+
+#Short description of load errors for a warning, presets are the accepted entries (anything else in errors was rejected)
+def describe_errors(errors, presets, limit=3):
+    rejected = sum(1 for name in errors if name not in presets)
+    shown = "; ".join(f"'{name}': {problems[0]}" for name, problems in list(errors.items())[:limit])
+    more = f" (and {len(errors) - limit} more)" if len(errors) > limit else ""
+    return f"{len(errors)} preset(s) had problems, {rejected} could not be loaded: {shown}{more}"
+
+#######################################################################################
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import struct
+
+from preset_journal import atomic_write
+
+# PRESET SNAPSHOT #
+# Versioned cache of a parsed library, keyed by the hash of the JSON it was parsed from #
+# Lets the next session skip parsing presets.json when the file hasn't changed #
+# The data is stored as JSON, never pickled: the cache sits next to libraries other users may be able to write #
+#######################################################################################
+
+#Bump whenever the cached data changes shape (e.g. new Preset fields), older snapshots are then ignored
+SNAPSHOT_VERSION = 3
+
+#Magic bytes, format version, SHA-1 of the source contents, source (mtime, size)
+MAGIC = b"PAMSNAP\0"
+HEADER = struct.Struct("<8sI20sqq")
+
+#SHA-1 digest of a file, read in blocks
+def file_digest(file_path):
+    content_hash = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            content_hash.update(block)
+    return content_hash.digest()
+
+class PresetSnapshot:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    #Return (digest, stamp) from the snapshot header, None if there is no snapshot of this version
+    def header(self):
+        try:
+            with open(self.file_path, 'rb') as file:
+                raw = file.read(HEADER.size)
+        except OSError:
+            return None
+        if len(raw) < HEADER.size:
+            return None
+        magic, version, digest, mtime, size = HEADER.unpack(raw)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            return None
+        return digest, (mtime, size)
+
+    #Return the cached data (decoded JSON) if the snapshot was made from this source, None otherwise
+    #The caller checks the data's shape, anyone able to write the file could have put something else there
+    #A matching file stamp is trusted without hashing, digest is only called (if a function) when the stamp differs
+    def load(self, digest=None, stamp=None):
+        header = self.header()
+        if header is None:
+            return None
+
+        if stamp is None or header[1] != tuple(stamp):
+            if callable(digest):
+                digest = digest()
+            if digest is None or header[0] != digest:
+                return None
+
+        try:
+            with open(self.file_path, 'rb') as file:
+                file.seek(HEADER.size)
+                return json.loads(file.read())
+
+        #A damaged snapshot is just a cache miss
+        except Exception:
+            return None
+
+    #Store data (plain JSON types) parsed from a source with this digest and stamp
+    def save(self, data, digest, stamp):
+        header = HEADER.pack(MAGIC, SNAPSHOT_VERSION, digest, *stamp)
+        try:
+            atomic_write(self.file_path, header + json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+        #The snapshot only speeds up the next start, failing to write it must not break saving presets
+        except OSError:
+            pass
+
+#######################################################################################
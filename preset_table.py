@@ -0,0 +1,215 @@
+import sys
+import numpy as np
+
+#Import classes
+from preset import Preset, ATTRIBUTE_RANGES, INT_ATTRIBUTES, SIM_ATTRIBUTES
+
+# PRESET TABLE CLASS #
+# Columnar view of a preset library: one float64 row of simulation attributes per preset #
+# Filtering, sorting, statistics and bulk edits run as NumPy operations instead of Python loops #
+#######################################################################################
+
+#Column position of every simulation attribute in the values array
+COLUMN = {attr: index for index, attr in enumerate(SIM_ATTRIBUTES)}
+
+#Minimum and span of every attribute's UI range, used to put all attributes on a 0-1 scale for similarity search
+RANGE_MIN = np.array([ATTRIBUTE_RANGES[attr]["min"] for attr in SIM_ATTRIBUTES], dtype=np.float64)
+RANGE_SPAN = np.array([ATTRIBUTE_RANGES[attr]["max"] - ATTRIBUTE_RANGES[attr]["min"] for attr in SIM_ATTRIBUTES], dtype=np.float64)
+
+class PresetTable:
+
+    #names: library names (dictionary keys), values: (n, 21) array in SIM_ATTRIBUTES order
+    #labels: each preset's own name field (defaults to the library name)
+    #descriptions: list of strings, or a function returning that list which is only called when descriptions are first needed
+    #metadata: list of each preset's metadata (None for presets without any), or a function returning it, as descriptions
+    def __init__(self, names, values, labels=None, descriptions=None, metadata=None):
+
+        #Interned so repeated names (library name == preset name) share one string object
+        self.names = [sys.intern(name) for name in names]
+        self.labels = self.names if labels is None else [sys.intern(label) for label in labels]
+
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.names), len(SIM_ATTRIBUTES))
+
+        self._descriptions = descriptions
+        self._metadata = metadata
+        self._rows = None
+        self._normalized = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    #Library name -> row number, built on first use
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = {name: row for row, name in enumerate(self.names)}
+        return self._rows
+
+    #Description column, loaded on first access
+    @property
+    def descriptions(self):
+        if self._descriptions is None:
+            self._descriptions = [""] * len(self.names)
+        elif callable(self._descriptions):
+            self._descriptions = list(self._descriptions())
+        return self._descriptions
+
+    #Metadata column, loaded on first access
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = [None] * len(self.names)
+        elif callable(self._metadata):
+            self._metadata = list(self._metadata())
+        return self._metadata
+
+    #Bytes used by the numeric block (names and descriptions not included)
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+#######################################################################################
+# CONVERSION TO AND FROM PRESETS #
+#######################################################################################
+
+    #Build a table from a dictionary of Preset objects (as returned by load_presets)
+    #Names, descriptions and metadata are copied out, the table holds no reference to the Preset objects
+    @classmethod
+    def from_presets(cls, presets):
+        presets = list(presets.items())
+        values = np.array([[getattr(preset, attr) for attr in SIM_ATTRIBUTES] for _, preset in presets], dtype=np.float64)
+        metadata = [preset.metadata for _, preset in presets]
+        return cls([name for name, _ in presets], values.reshape(len(presets), len(SIM_ATTRIBUTES)),
+                   labels=[preset.name for _, preset in presets],
+                   descriptions=[preset.description for _, preset in presets],
+                   metadata=metadata if any(item is not None for item in metadata) else None)
+
+    #Return the simulation values of one row as a dictionary with whole-number attributes converted back to int
+    def row_values(self, row):
+        values = dict(zip(SIM_ATTRIBUTES, self.values[row].tolist()))
+        for attr in INT_ATTRIBUTES:
+            values[attr] = int(round(values[attr]))
+        return values
+
+    #Materialise one preset by library name or row number
+    def preset(self, key):
+        row = self.rows[key] if isinstance(key, str) else key
+        metadata = self.metadata[row] if self._metadata is not None else None
+        return Preset(name=self.labels[row], description=self.descriptions[row], metadata=metadata, **self.row_values(row))
+
+    #Convert the whole table back to a dictionary of Preset objects
+    def to_presets(self):
+        return {name: self.preset(row) for row, name in enumerate(self.names)}
+
+#######################################################################################
+# SIMILARITY SEARCH #
+#######################################################################################
+
+    #Values scaled by each attribute's UI range so a full slider sweep counts the same for every attribute
+    @property
+    def normalized(self):
+        if self._normalized is None:
+            self._normalized = (self.values - RANGE_MIN) / RANGE_SPAN
+        return self._normalized
+
+    #Distance from a settings dictionary (UI settings or preset values) to every preset in the table
+    #Root mean square of the range-normalised differences: 0 is identical, 1 is every attribute at opposite ends
+    def distances(self, settings):
+        query = (np.array([settings[attr] for attr in SIM_ATTRIBUTES], dtype=np.float64) - RANGE_MIN) / RANGE_SPAN
+        return np.sqrt(np.mean(np.square(self.normalized - query), axis=1))
+
+    #Return the k presets closest to the settings as a list of (library name, distance), closest first
+    def nearest(self, settings, k=1, exclude=()):
+        distances = self.distances(settings)
+        for name in exclude:
+            if name in self.rows:
+                distances[self.rows[name]] = np.inf
+
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        closest = np.argpartition(distances, k - 1)[:k]
+        closest = closest[np.argsort(distances[closest], kind="stable")]
+        return [(self.names[row], float(distances[row])) for row in closest if np.isfinite(distances[row])]
+
+    #Closest preset to every row of an (m, 21) array of settings, returns one (library name, distance) per row
+    #Queries are handled a block at a time as one matrix product against the whole table, (None, inf) when nothing is left to match
+    def nearest_many(self, values, exclude=(), block=256):
+        queries = (np.asarray(values, dtype=np.float64).reshape(-1, len(SIM_ATTRIBUTES)) - RANGE_MIN) / RANGE_SPAN
+        table = self.normalized
+        excluded = [self.rows[name] for name in exclude if name in self.rows]
+        if len(table) - len(set(excluded)) <= 0:
+            return [(None, float("inf"))] * len(queries)
+
+        #|q - t|^2 = |q|^2 + |t|^2 - 2 q.t
+        table_squares = np.einsum("ij,ij->i", table, table)
+        matches = []
+        for start in range(0, len(queries), block):
+            query = queries[start:start + block]
+            squares = np.einsum("ij,ij->i", query, query)[:, None] + table_squares[None, :] - 2.0 * (query @ table.T)
+            squares[:, excluded] = np.inf
+            closest = np.argmin(squares, axis=1)
+
+            #Exact distance for the chosen rows (the expansion above loses precision near zero)
+            distances = np.sqrt(np.mean(np.square(table[closest] - query), axis=1))
+            matches.extend((self.names[row], float(distance)) for row, distance in zip(closest.tolist(), distances.tolist()))
+        return matches
+
+#######################################################################################
+# VECTORIZED OPERATIONS #
+#######################################################################################
+
+    #Return one attribute as a column view (edits to it change the table)
+    def column(self, attr):
+        return self.values[:, COLUMN[attr]]
+
+    #Return the rows selected by a boolean mask or index array as a new table
+    def select(self, rows):
+        rows = np.arange(len(self))[rows]
+        descriptions = self._descriptions
+        if descriptions is not None:
+            descriptions = lambda: [self.descriptions[row] for row in rows]
+        metadata = self._metadata
+        if metadata is not None:
+            metadata = lambda: [self.metadata[row] for row in rows]
+        return PresetTable([self.names[row] for row in rows], self.values[rows],
+                           labels=[self.labels[row] for row in rows], descriptions=descriptions, metadata=metadata)
+
+    #Return the presets whose attribute lies within [low, high]
+    def filter(self, attr, low=-np.inf, high=np.inf):
+        column = self.column(attr)
+        return self.select((column >= low) & (column <= high))
+
+    #Return a new table sorted by an attribute
+    def sort_by(self, attr, descending=False):
+        order = np.argsort(self.column(attr), kind="stable")
+        return self.select(order[::-1] if descending else order)
+
+    #Minimum, maximum, mean and standard deviation of every attribute
+    def stats(self):
+        if not len(self):
+            return {}
+        minimum, maximum = self.values.min(axis=0), self.values.max(axis=0)
+        mean, std = self.values.mean(axis=0), self.values.std(axis=0)
+        return {attr: {"min": float(minimum[i]), "max": float(maximum[i]), "mean": float(mean[i]), "std": float(std[i])}
+                for i, attr in enumerate(SIM_ATTRIBUTES)}
+
+    #Set an attribute for every row (or the rows in mask) from a scalar or array, whole-number attributes are rounded
+    #With a mask, values may hold one entry per selected row or one per table row
+    def set_values(self, attr, values, mask=None):
+        values = np.asarray(values, dtype=np.float64)
+        if attr in INT_ATTRIBUTES:
+            values = np.round(values)
+        column = self.column(attr)
+        self._normalized = None
+        if mask is None:
+            column[:] = values
+        else:
+            if values.ndim and values.shape[0] == len(self):
+                values = values[mask]
+            column[mask] = values
+
+#######################################################################################
@@ -0,0 +1,311 @@
+import atexit
+import threading
+import time
+
+#Import classes
+from preset import fingerprint
+from preset_journal import COMPACT_AFTER
+
+# BACKGROUND PRESET WRITER #
+# Saves and deletes return straight away, a worker thread writes them to the library once changes stop arriving #
+# A burst of changes becomes one atomic write (temporary file + rename, see JsonManager.save_presets) #
+#######################################################################################
+
+#Seconds without new changes before they are written
+DEBOUNCE_SECONDS = 0.5
+
+#Seconds to wait before trying again after a failed write
+RETRY_SECONDS = 5.0
+
+class PresetWriter:
+
+    #store is the JsonManager the writes go to, it must only be used by this writer (see JsonManager.reopen)
+    #on_status is called on Maya's main thread (through maya.utils.executeDeferred) whenever the status changes
+    def __init__(self, store, delay=DEBOUNCE_SECONDS, on_status=None):
+        self.store = store
+        self.delay = delay
+        self.on_status = on_status
+
+        #Name -> Preset to save, or None to delete, in the order they were made (later changes to a name replace earlier ones)
+        self.pending = {}
+        self.last_change = 0.0
+        self.retry_at = 0.0
+
+        self.writing = False
+        self.flush_requested = False
+        self.stopping = False
+
+        #Number of writes made, time of the last one and the error of the last failed one
+        self.writes = 0
+        self.last_write = None
+        self.error = None
+
+        self.condition = threading.Condition()
+        self.thread = None
+
+        #False once the writer thread has ended (or before it starts), flush stops waiting for a thread that is gone
+        self.running = False
+
+        #Changes taken from pending by the write in progress, put back if the thread dies while writing them
+        self.in_flight = None
+
+        #Held by the writer thread while it uses the store, anything reading the store from another thread takes it too
+        self.store_lock = threading.Lock()
+
+        #Copy of the store's fingerprint index as of the last write, replaced after every write and never changed
+        #Duplicate checks read it with the queued changes on top, so they never wait for a write (see WriterFingerprintIndex)
+        self.snapshot = None
+
+        #Anything still pending is written before Maya exits
+        atexit.register(self.flush)
+
+#######################################################################################
+# CHANGES #
+#######################################################################################
+
+    #Queue a preset to be saved (same signature as JsonManager.add_preset)
+    def add_preset(self, name, preset):
+        self._change(name, preset)
+
+    #Queue many presets (name -> Preset) to be saved, written together with any other queued change
+    def add_presets(self, presets):
+        for name, preset in presets.items():
+            self._change(name, preset, notify=False)
+        self._notify()
+
+    #Queue a preset to be deleted (same signature as JsonManager.delete_preset)
+    def delete_preset(self, name):
+        self._change(name, None)
+
+    def _change(self, name, preset, notify=True):
+        with self.condition:
+            self.pending.pop(name, None)
+            self.pending[name] = preset
+            self.last_change = time.monotonic()
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, name="PAMPresetWriter", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+        if notify:
+            self._notify()
+
+    #Fingerprint index of the library including the changes still queued, lookups return straight away during a write
+    def fingerprint_index(self):
+        return WriterFingerprintIndex(self)
+
+    #(index snapshot, queued changes) read together, changes made to a name since the snapshot replace it
+    #Only the first call before any write builds the snapshot from the store (waiting for the store if a write is running)
+    def _index_view(self):
+        with self.condition:
+            if self.snapshot is not None:
+                changes = dict(self.in_flight or {})
+                changes.update(self.pending)
+                return self.snapshot, changes
+        with self.store_lock:
+            snapshot = self.store.fingerprint_index().copy()
+        with self.condition:
+            if self.snapshot is None:
+                self.snapshot = snapshot
+        return self._index_view()
+
+    #The library with every queued change written, waits for the writer
+    def load_presets(self):
+        self.flush()
+        with self.store_lock:
+            return self.store.load_presets()
+
+#######################################################################################
+# WRITER THREAD #
+#######################################################################################
+
+    #Thread body, whatever ends it the in-progress changes are queued again and anyone waiting in flush is woken
+    def _run(self):
+        try:
+            self._write_loop()
+        finally:
+            with self.condition:
+                if self.in_flight:
+                    self.in_flight.update(self.pending)
+                    self.pending, self.in_flight = self.in_flight, None
+                self.writing = False
+                self.running = False
+                self.condition.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+
+                #Wait until changes stop arriving for the debounce delay, unless a flush wants them written now
+                while not self.flush_requested and not self.stopping:
+                    remaining = max(self.last_change + self.delay, self.retry_at) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                changes, self.pending = self.pending, {}
+                self.in_flight = changes
+                self.flush_requested = False
+                self.writing = True
+            self._notify()
+
+            #Any failure is retried (sqlite3 "database is locked", a preset that can't be serialised...), it must not end the thread
+            error = None
+            try:
+                snapshot = self._write(changes)
+            except Exception as exception:
+                error = exception
+
+            with self.condition:
+                self.in_flight = None
+                self.writing = False
+                if error is None:
+                    self.snapshot = snapshot
+                    self.writes += 1
+                    self.last_write = time.time()
+                    self.error = None
+                else:
+                    #Changes made while writing are newer than the failed ones, so they are put back on top
+                    changes.update(self.pending)
+                    self.pending = changes
+                    self.error = str(error)
+                    self.retry_at = time.monotonic() + RETRY_SECONDS
+                self.condition.notify_all()
+            self._notify()
+
+    #Apply queued changes to the library and save it once (journal mode appends each change instead, unless there are many)
+    #Stores that update rows in place (SqliteManager) take all the changes in one transaction
+    #Returns a copy of the store's fingerprint index after the write, the next snapshot
+    def _write(self, changes):
+        with self.store_lock:
+            if hasattr(self.store, "apply_changes"):
+                self.store.apply_changes(changes)
+            elif self.store.journal and len(changes) < COMPACT_AFTER:
+                for name, preset in changes.items():
+                    if preset is None:
+                        self.store.delete_preset(name)
+                    else:
+                        self.store.add_preset(name, preset)
+            else:
+                presets = self.store.load_presets()
+                for name, preset in changes.items():
+                    if preset is None:
+                        presets.pop(name, None)
+                    else:
+                        presets[name] = preset
+                self.store.save_presets(presets)
+
+            #Copied here, on the writer thread, so duplicate checks on the main thread never build or copy it
+            return self.store.fingerprint_index().copy()
+
+    #Write everything queued now and wait for it, returns True if nothing is left unwritten
+    #Returns early (False) if the write fails, the writer thread has ended or the timeout in seconds runs out
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            if not self.pending and not self.writing:
+                return True
+            self.flush_requested = True
+            self.retry_at = 0.0
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                if not self.running:
+                    return False
+                if self.error and not self.writing and not self.flush_requested:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    #Write what is queued, stop the thread and drop the exit hook (called when the tool's window is closed)
+    def close(self, timeout=None):
+        self.flush(timeout)
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        atexit.unregister(self.flush)
+
+#######################################################################################
+# STATUS #
+#######################################################################################
+
+    #"idle", "pending", "writing" or "error"
+    def state(self):
+        if self.writing:
+            return "writing"
+        if self.error:
+            return "error"
+        if self.pending:
+            return "pending"
+        return "idle"
+
+    #Status for the UI: state, number of queued changes, number of writes, time of the last write and the last error
+    def status(self):
+        with self.condition:
+            return {"state": self.state(), "pending": len(self.pending), "writes": self.writes,
+                    "last_write": self.last_write, "error": self.error}
+
+    #One line describing the status, shown under the preset buttons
+    def status_text(self):
+        status = self.status()
+        if status["state"] == "writing":
+            return "Saving presets..."
+        if status["state"] == "error":
+            return f"Saving presets failed, retrying: {status['error']}"
+        if status["state"] == "pending":
+            return f"{status['pending']} change(s) waiting to be saved"
+        if status["last_write"] is None:
+            return ""
+        return "All changes saved " + time.strftime("%H:%M:%S", time.localtime(status["last_write"]))
+
+    #Pass the new status to on_status on the main thread
+    def _notify(self):
+        if self.on_status is None:
+            return
+        import maya.utils
+        maya.utils.executeDeferred(self.on_status, self.status())
+
+#######################################################################################
+
+class WriterFingerprintIndex:
+
+    #The writer's index snapshot with its queued saves and deletes on top (same lookup and duplicates as FingerprintIndex)
+    #Reads only take the writer's condition for as long as it takes to copy the queue, never the store lock
+    def __init__(self, writer):
+        self.writer = writer
+
+    #Snapshot with the queued changes applied, for the whole-index queries
+    def _merged(self):
+        snapshot, changes = self.writer._index_view()
+        if not changes:
+            return snapshot
+        index = snapshot.copy()
+        for name, preset in changes.items():
+            if preset is None:
+                index.remove(name)
+            else:
+                index.add(name, preset)
+        return index
+
+    def __len__(self):
+        return len(self._merged())
+
+    def lookup(self, settings):
+        snapshot, changes = self.writer._index_view()
+        key = fingerprint(settings)
+        names = [name for name in snapshot.names.get(key, ()) if name not in changes]
+        names += [name for name, preset in changes.items() if preset is not None and preset.fingerprint() == key]
+        return names
+
+    def duplicates(self):
+        return self._merged().duplicates()
+
+#######################################################################################
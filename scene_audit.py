@@ -0,0 +1,96 @@
+import numpy as np
+
+#Import classes
+from preset import SIM_ATTRIBUTES, quantize
+from apply_engine import read_attributes
+from ncloth_index import get_index
+from fingerprint_index import FingerprintIndex
+
+# SCENE AUDIT #
+# Reads every nCloth node in the scene in one batch and reports which preset each one matches #
+# Exact matches come from the fingerprint index, everything else is mapped to its nearest preset in one NumPy pass #
+#######################################################################################
+
+#Library entries that are not real presets and are never reported as a match
+EXCLUDED_PRESETS = ["Custom", "Default"]
+
+#Audit nCloth nodes against a library, returns one result dictionary per node:
+#{"node", "preset" (library name or None), "match" ("exact", "nearest" or None), "distance", "deviations" {attr: (node value, preset value)}}
+#nodes defaults to every nCloth node in the scene, fingerprints/table can be passed in to reuse the caller's indexes
+def audit_scene(presets, nodes=None, fingerprints=None, table=None):
+    if nodes is None:
+        nodes = get_index().all_ncloth_nodes()
+    if not nodes:
+        return []
+
+    #One batched read of every preset attribute on every node
+    values = read_attributes(nodes, SIM_ATTRIBUTES)
+
+    if fingerprints is None:
+        fingerprints = FingerprintIndex(presets)
+
+    results = []
+    unmatched = []
+    for node in nodes:
+        exact = [name for name in fingerprints.lookup(values[node]) if name in presets and name not in EXCLUDED_PRESETS]
+        if exact:
+            results.append({"node": node, "preset": exact[0], "match": "exact", "distance": 0.0, "deviations": {}})
+        else:
+            results.append({"node": node, "preset": None, "match": None, "distance": None, "deviations": {}})
+            unmatched.append(results[-1])
+
+    #Nodes without an exact match are mapped to their nearest preset together
+    if unmatched:
+        if table is None:
+            from preset_table import PresetTable
+            table = PresetTable.from_presets(presets)
+
+        node_values = np.array([[values[result["node"]][attr] for attr in SIM_ATTRIBUTES] for result in unmatched], dtype=np.float64)
+        for result, (name, distance) in zip(unmatched, table.nearest_many(node_values, exclude=EXCLUDED_PRESETS)):
+            if name is None:
+                continue
+            result["preset"] = name
+            result["match"] = "nearest"
+            result["distance"] = distance
+            result["deviations"] = deviations(values[result["node"]], presets[name].sim_values())
+
+    return results
+
+#Attributes whose node value differs from the preset value at the UI precision, as {attr: (node value, preset value)}
+def deviations(node_values, preset_values):
+    return {attr: (node_values[attr], preset_values[attr]) for attr in SIM_ATTRIBUTES
+            if quantize(node_values[attr]) != quantize(preset_values[attr])}
+
+#Number of nodes per match kind
+def summarize_audit(results):
+    summary = {"nodes": len(results), "exact": 0, "nearest": 0, "unmatched": 0}
+    for result in results:
+        summary[result["match"] or "unmatched"] += 1
+    return summary
+
+#Human readable report, one line per node followed by its deviating attributes
+def format_report(results):
+    lines = []
+    for result in results:
+        if result["match"] == "exact":
+            lines.append(f"{result['node']}: {result['preset']}")
+        elif result["match"] == "nearest":
+            lines.append(f"{result['node']}: closest to {result['preset']} ({result['distance']:.3f} away), "
+                         f"{len(result['deviations'])} attribute(s) differ")
+            for attr, (node_value, preset_value) in result["deviations"].items():
+                lines.append(f"    {attr}: {node_value:g} (preset {preset_value:g})")
+        else:
+            lines.append(f"{result['node']}: no preset to compare with")
+    return "\n".join(lines)
+
+#One line naming the nodes that don't match a preset exactly, None if every node does (the full detail stays in the results)
+def describe_mismatches(results, limit=5):
+    mismatched = [result for result in results if result["match"] != "exact"]
+    if not mismatched:
+        return None
+    shown = ", ".join(f"{result['node']} ({'closest to ' + result['preset'] if result['match'] else 'no preset'})"
+                      for result in mismatched[:limit])
+    more = f" (and {len(mismatched) - limit} more)" if len(mismatched) > limit else ""
+    return f"{len(mismatched)} nCloth node(s) don't match a preset exactly: {shown}{more}"
+
+#######################################################################################
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+
+#Import classes
+from preset import INT_ATTRIBUTES, SIM_ATTRIBUTES
+from preset_schema import validate_preset
+from json_manager import JsonManager
+from maya_paths import maya_app_dir
+from fingerprint_index import FingerprintIndex
+
+# SQLITE MANAGER CLASS #
+# Stores presets in a local SQLite file behind the same load/save/add interface as JsonManager #
+# One row per preset keyed by name, so lookups, upserts and deletes only touch that row #
+#######################################################################################
+
+#Preset fields stored as columns, the library name (dictionary key) is the separate primary key column
+#Metadata (optional, see Preset) is stored as JSON text, NULL for presets without any
+FIELDS = ["name", "description"] + SIM_ATTRIBUTES
+COLUMNS = ["key"] + FIELDS + ["metadata"]
+
+class SqliteManager:
+
+    #Initialise the SqliteManager class, file_path is the directory holding presets.db (Maya directory by default)
+    def __init__(self, file_path=None):
+
+        self.is_new_file = False
+
+        #Name -> problems of every row that didn't fit the schema on the last load, as JsonManager.load_errors
+        self.load_errors = {}
+
+        #Same interface as JsonManager, changes always go straight to their row (see PresetWriter)
+        self.journal = None
+
+        #Use provided file path or if none then use default Maya directory
+        if file_path is None:
+            file_path = maya_app_dir()
+        self.file_path = os.path.join(file_path, "presets.db")
+
+        if not os.path.exists(self.file_path):
+            self.is_new_file = True
+
+        #The background writer opens its manager on the main thread and uses it on its own (one thread at a time, see reopen)
+        self.connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+
+        #Cached library and the database version it was read at, see load_presets
+        self._cache = None
+        self._cache_version = None
+
+        #Fingerprint index of the cached library and the cache dictionary it was built from
+        self._fingerprints = None
+        self._fingerprints_source = None
+
+        #A new database picks up the presets.json that lives next to it, so switching backends keeps the library
+        if self.is_new_file and self.migrate_from_json():
+            self.is_new_file = False
+
+    #Create the presets table with an index on every numeric attribute (INT_ATTRIBUTES as INTEGER, the rest REAL)
+    def _create_tables(self):
+        column_defs = ["key TEXT PRIMARY KEY", "name TEXT NOT NULL DEFAULT ''", "description TEXT NOT NULL DEFAULT ''"]
+        for attr in SIM_ATTRIBUTES:
+            column_defs.append(f"{attr} {'INTEGER' if attr in INT_ATTRIBUTES else 'REAL'} NOT NULL")
+        column_defs.append("metadata TEXT")
+
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS presets ({', '.join(column_defs)})")
+            for attr in SIM_ATTRIBUTES:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_presets_{attr} ON presets ({attr})")
+
+            #Databases made before presets had metadata get the column added
+            existing = [row[1] for row in self.connection.execute("PRAGMA table_info(presets)")]
+            if "metadata" not in existing:
+                self.connection.execute("ALTER TABLE presets ADD COLUMN metadata TEXT")
+
+    #Close the database connection
+    def close(self):
+        self.connection.close()
+
+    #A second manager on the same database with its own connection (for use on another thread, see PresetWriter)
+    def reopen(self):
+        return SqliteManager(os.path.dirname(self.file_path))
+
+    #Change stamp of the database for LayeredLibrary: (mtime, size) of the file and of its write-ahead log
+    def _file_stamp(self):
+        stamp = ()
+        for path in (self.file_path, self.file_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                stamp += (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp += (None, None)
+        return stamp
+
+#######################################################################################
+# ROW CONVERSION #
+#######################################################################################
+
+    #Rows are keyed by library name, which can differ from the preset's own name field (e.g. "Custom")
+    @staticmethod
+    def _to_row(name, preset):
+        data = preset.to_dict()
+        metadata = data.get("metadata")
+        return [name] + [data[field] for field in FIELDS] + [None if metadata is None else json.dumps(metadata)]
+
+    #Preset for one row and its schema problems (the preset is None if the row can't be loaded), see preset_schema
+    @staticmethod
+    def _from_row(row):
+        data = dict(zip(FIELDS, row[1:-1]))
+        if row[-1] is not None:
+            try:
+                data["metadata"] = json.loads(row[-1])
+            except ValueError:
+                data["metadata"] = row[-1]
+        return validate_preset(data, row[0])
+
+#######################################################################################
+# LOAD AND SAVE #
+#######################################################################################
+
+    #Return the cached library, re-read only after another connection commits a change (PRAGMA data_version)
+    def _cached_presets(self):
+        version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if self._cache is None or version != self._cache_version:
+            rows = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM presets ORDER BY rowid")
+            self._cache = {}
+            self.load_errors = {}
+            for row in rows:
+                preset, problems = self._from_row(row)
+                if preset is not None:
+                    self._cache[row[0]] = preset
+                if problems:
+                    self.load_errors[row[0]] = problems
+            self._cache_version = version
+        return self._cache
+
+    #Load all presets from the database and return as a dictionary of Preset objects
+    def load_presets(self):
+        return dict(self._cached_presets())
+
+    #Replace the whole library with a dictionary of Preset objects in one transaction
+    def save_presets(self, presets):
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self.connection:
+            self.connection.execute("DELETE FROM presets")
+            self.connection.executemany(f"INSERT INTO presets ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                                        [self._to_row(name, preset) for name, preset in presets.items()])
+        self._cache = dict(presets)
+        self.load_errors = {}
+
+    #Adds/updates a single preset row
+    def add_preset(self, name, preset):
+        placeholders = ", ".join("?" * len(COLUMNS))
+        updates = ", ".join(f"{column}=excluded.{column}" for column in COLUMNS[1:])
+        with self.connection:
+            self.connection.execute(f"INSERT INTO presets ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                                    f"ON CONFLICT(key) DO UPDATE SET {updates}", self._to_row(name, preset))
+        self.load_errors.pop(name, None)
+        if self._cache is not None:
+            self._cache[name] = preset
+            if self._fingerprints_source is self._cache:
+                self._fingerprints.add(name, preset)
+
+    #Adds/updates many presets (name -> Preset) in one transaction
+    def add_presets(self, presets):
+        placeholders = ", ".join("?" * len(COLUMNS))
+        updates = ", ".join(f"{column}=excluded.{column}" for column in COLUMNS[1:])
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO presets ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                                        f"ON CONFLICT(key) DO UPDATE SET {updates}",
+                                        [self._to_row(name, preset) for name, preset in presets.items()])
+        for name in presets:
+            self.load_errors.pop(name, None)
+        if self._cache is not None:
+            self._cache.update(presets.items())
+            if self._fingerprints_source is self._cache:
+                for name, preset in presets.items():
+                    self._fingerprints.add(name, preset)
+
+    #Removes a single preset row
+    def delete_preset(self, name):
+        with self.connection:
+            self.connection.execute("DELETE FROM presets WHERE key = ?", (name,))
+        self.load_errors.pop(name, None)
+        if self._cache is not None:
+            self._cache.pop(name, None)
+            if self._fingerprints_source is self._cache:
+                self._fingerprints.remove(name)
+
+    #Saves (name -> Preset) and deletes (name -> None) queued by PresetWriter, written in one transaction
+    def apply_changes(self, changes):
+        saves = {name: preset for name, preset in changes.items() if preset is not None}
+        with self.connection:
+            self.connection.executemany("DELETE FROM presets WHERE key = ?", [(name,) for name in changes if name not in saves])
+            self.add_presets(saves)
+        for name in changes:
+            if name not in saves:
+                self.load_errors.pop(name, None)
+                if self._cache is not None:
+                    self._cache.pop(name, None)
+                    if self._fingerprints_source is self._cache:
+                        self._fingerprints.remove(name)
+
+#######################################################################################
+# QUERIES #
+#######################################################################################
+
+    #Return one preset by name without loading the library, None if it doesn't exist (or can't be loaded)
+    def get_preset(self, name):
+        row = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM presets WHERE key = ?", (name,)).fetchone()
+        return self._from_row(row)[0] if row else None
+
+    #Return the names of presets whose attribute lies within [low, high] (uses the attribute's index)
+    def find_presets(self, attr, low, high):
+        if attr not in SIM_ATTRIBUTES:
+            raise ValueError(f"Unknown preset attribute '{attr}'")
+        rows = self.connection.execute(f"SELECT key FROM presets WHERE {attr} BETWEEN ? AND ? ORDER BY {attr}", (low, high))
+        return [row[0] for row in rows]
+
+    #Fingerprint -> names index of the library, rebuilt only when the cached library is replaced
+    def fingerprint_index(self):
+        presets = self._cached_presets()
+        if self._fingerprints_source is not presets:
+            self._fingerprints = FingerprintIndex(presets)
+            self._fingerprints_source = presets
+        return self._fingerprints
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM presets").fetchone()[0]
+
+#######################################################################################
+# MIGRATION #
+#######################################################################################
+
+    #Copy every preset from an existing presets.json (in json_dir, next to presets.db by default) into the database
+    #Existing rows with the same name are overwritten, returns the number of presets migrated
+    def migrate_from_json(self, json_dir=None):
+        if json_dir is None:
+            json_dir = os.path.dirname(self.file_path)
+        if not os.path.exists(os.path.join(json_dir, "presets.json")):
+            return 0
+
+        presets = JsonManager(json_dir, snapshot=False).load_presets()
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self.connection:
+            self.connection.executemany(f"INSERT OR REPLACE INTO presets ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                                        [self._to_row(name, preset) for name, preset in presets.items()])
+        self._cache = None
+        return len(presets)
+
+#######################################################################################
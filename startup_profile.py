@@ -0,0 +1,46 @@
+import time
+from contextlib import contextmanager
+
+# STARTUP PROFILE #
+# Times each phase of opening the PAM dock so slow steps can be found (shown when PAM_PROFILE is set) #
+#######################################################################################
+
+#Environment variable that shows the startup profile when PAM opens (PAM_PROFILE=1), the phases are always timed
+PROFILE_ENV = "PAM_PROFILE"
+
+class StartupProfile:
+
+    def __init__(self):
+
+        #(phase name, seconds) in the order the phases finished, nested phases are named "outer/inner"
+        self.phases = []
+
+        #Names of the phases currently running
+        self._running = []
+
+    #Time the code inside a with block as one phase
+    @contextmanager
+    def phase(self, name):
+        self._running.append(name)
+        path = "/".join(self._running)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((path, time.perf_counter() - start))
+            self._running.pop()
+
+    #Total seconds of the top level phases
+    def total(self):
+        return sum(seconds for name, seconds in self.phases if "/" not in name)
+
+    #Phase name -> milliseconds
+    def as_dict(self):
+        return {name: seconds * 1000 for name, seconds in self.phases}
+
+    #One line summary, e.g. "PAM: Started in 41.2 ms (open library 0.3 ms, init/load presets 12.0 ms, init 14.1 ms, ...)"
+    def report(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases)
+        return f"PAM: Started in {self.total() * 1000:.1f} ms ({phases})"
+
+#######################################################################################
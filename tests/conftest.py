@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+#Make the PAM modules, the stand-in maya package and the benchmark data generators importable when run from the repository
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, "benchmarks"))
+
+import fake_maya
+state = fake_maya.install()
+
+#Fresh scene with undo on before every test
+@pytest.fixture(autouse=True)
+def host():
+    fake_maya.reset_scene()
+    state.undo_enabled = True
+    state.dialog_answer = "Yes"
+    state.dialog_paths = None
+    state.deferred = []
+    state.warnings = []
+    state.messages = []
+    yield state
@@ -0,0 +1,91 @@
+import maya.cmds as cmds
+import pytest
+
+import fake_maya
+from all_presets import presets
+import apply_engine
+from apply_engine import UNDO_CHUNK, apply_presets, summarize
+from preset import SIM_ATTRIBUTES
+
+PRESET = presets["Heavy Denim"]
+
+#An attribute the preset changes on a default nCloth node
+CHANGED = [attr for attr in SIM_ATTRIBUTES if PRESET.sim_values()[attr] != fake_maya.NCLOTH_DEFAULTS[attr]]
+
+#Every node with its attribute values (values compare as numbers, a restored int plug may come back as a float)
+def scene_state(host):
+    return {name: dict(node.attrs) for name, node in host.scene.nodes.items()}
+
+def ncloth(mesh):
+    return cmds.listConnections(mesh + "Shape", type="nCloth")[0]
+
+def test_transactional_apply_is_one_undo_step(host):
+    meshes = fake_maya.build_scene(3)
+    results = apply_presets([(mesh, PRESET) for mesh in meshes], transactional=True)
+    assert summarize(results)["written"] == 3 * len(CHANGED)
+    assert [name for name, _ in host.undo_queue] == [UNDO_CHUNK]
+
+    cmds.undo()
+    assert cmds.getAttr(f"{ncloth(meshes[0])}.{CHANGED[0]}") == fake_maya.NCLOTH_DEFAULTS[CHANGED[0]]
+
+#The first plug written is locked, so the apply fails before its chunk records any edit
+#The rollback must not undo the edit the user made before the apply
+@pytest.mark.parametrize("undo_enabled", [True, False])
+def test_failure_before_first_write_keeps_previous_edit(host, undo_enabled):
+    meshes = fake_maya.build_scene(2)
+    cmds.undoInfo(state=undo_enabled)
+    cmds.setAttr(f"{ncloth(meshes[1])}.friction", 3.3)
+    cmds.setAttr(f"{ncloth(meshes[0])}.{CHANGED[0]}", lock=True)
+    queue = list(host.undo_queue)
+
+    results = apply_presets([(mesh, PRESET) for mesh in meshes], transactional=True)
+    assert summarize(results)["rolled_back"] == 2
+    assert cmds.getAttr(f"{ncloth(meshes[1])}.friction") == 3.3
+    assert host.undo_queue == queue
+
+#A plug late in the batch is locked, every earlier write and the nCloth created by the apply are rolled back
+@pytest.mark.parametrize("undo_enabled", [True, False])
+def test_failure_after_writes_restores_scene(host, undo_enabled):
+    meshes = fake_maya.build_scene(3, with_ncloth=False)
+    for mesh in meshes[:-1]:
+        fake_maya.make_ncloth(mesh)
+    cmds.setAttr(f"{ncloth(meshes[1])}.{CHANGED[-1]}", lock=True)
+    cmds.undoInfo(state=undo_enabled)
+    before = scene_state(host)
+
+    results = apply_presets([(mesh, PRESET) for mesh in meshes], transactional=True)
+    assert summarize(results)["rolled_back"] == 3
+    assert scene_state(host) == before
+    assert not host.refresh_suspended
+
+#Applying from the UI reports in the viewport, not on stdout
+def test_apply_preset_reports_in_view(host, capsys):
+    meshes = fake_maya.build_scene(2)
+    cmds.select(meshes)
+    PRESET.apply_preset()
+    assert host.messages == [f"Applied '{PRESET.name}' to 2 object(s), {2 * len(CHANGED)} attribute(s) written, "
+                             f"{2 * (len(SIM_ATTRIBUTES) - len(CHANGED))} already matched"]
+    assert capsys.readouterr().out == ""
+
+#createNCloth hides the input shapes and makes a nucleus when the scene has none, a rolled back apply undoes both
+@pytest.mark.parametrize("undo_enabled", [True, False])
+def test_rollback_undoes_ncloth_creation(host, monkeypatch, undo_enabled):
+    meshes = fake_maya.build_scene(2, with_ncloth=False)
+    cmds.undoInfo(state=undo_enabled)
+    before = scene_state(host)
+
+    write_attributes = apply_engine.write_attributes
+    calls = []
+    def fail_first_write(writes):
+        calls.append(writes)
+        if len(calls) == 1:
+            assert cmds.ls(type="nucleus") and cmds.getAttr(meshes[0] + "Shape.intermediateObject") == 1
+            raise RuntimeError("write failed")
+        return write_attributes(writes)
+    monkeypatch.setattr(apply_engine, "write_attributes", fail_first_write)
+
+    results = apply_presets([(mesh, PRESET) for mesh in meshes], transactional=True)
+    assert summarize(results)["rolled_back"] == 2
+    assert scene_state(host) == before
+    assert cmds.ls(type="nucleus") == []
+    assert [cmds.getAttr(mesh + "Shape.intermediateObject") for mesh in meshes] == [0, 0]
@@ -0,0 +1,36 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from all_presets import presets
+from lazy_presets import write_library
+from preset_journal import atomic_write
+
+#Two threads replacing the same file at once each write through their own temporary file
+def test_concurrent_atomic_writes(tmp_path):
+    file_path = str(tmp_path / "snapshot.bin")
+    contents = [bytes([index]) * 100000 for index in range(8)]
+    threads = [threading.Thread(target=atomic_write, args=(file_path, raw)) for raw in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(file_path, 'rb') as file:
+        assert file.read() in contents
+    assert os.listdir(tmp_path) == ["snapshot.bin"]
+
+#The replaced file keeps its mode, and a failed write leaves no temporary file behind
+def test_write_library_keeps_mode_and_cleans_up(tmp_path):
+    file_path = str(tmp_path / "presets.json")
+    write_library(file_path, dict(presets))
+    os.chmod(file_path, 0o644)
+    write_library(file_path, dict(presets))
+    assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o644
+
+    broken = dict(presets, Broken=object())
+    with pytest.raises(AttributeError):
+        write_library(file_path, broken)
+    assert os.listdir(tmp_path) == ["presets.json"]
@@ -0,0 +1,40 @@
+import json
+
+import batch_cli
+
+def run(capsys, tmp_path, library, *extra):
+    scene = tmp_path / "shot.json"
+    scene.write_text("{}")
+    code = batch_cli.main(["--fake-maya", "--library", str(library), "--rule", "*=Silk", "--output", str(tmp_path / "out"),
+                           "--workers", "1", *extra, str(scene)])
+    return code, capsys.readouterr().err.strip().splitlines()
+
+#A missing or unreadable library is reported once, before any worker starts
+def test_missing_library(capsys, tmp_path):
+    code, errors = run(capsys, tmp_path, tmp_path / "nowhere")
+    assert code == 2
+    assert len(errors) == 1 and "No presets.json" in errors[0]
+
+def test_corrupt_library(capsys, tmp_path):
+    (tmp_path / "library").mkdir()
+    (tmp_path / "library" / "presets.json").write_text('{"Silk": {')
+    code, errors = run(capsys, tmp_path, tmp_path / "library" / "presets.json")
+    assert code == 2
+    assert len(errors) == 1 and "not valid JSON" in errors[0]
+
+    (tmp_path / "library" / "presets.json").write_text(json.dumps(["Silk"]))
+    code, errors = run(capsys, tmp_path, tmp_path / "library")
+    assert code == 2
+    assert len(errors) == 1 and "not a preset library" in errors[0]
+
+def failing_initializer(*args):
+    raise RuntimeError("maya.standalone could not start")
+
+#Workers that can't start end the run with a one-line error instead of a BrokenProcessPool traceback
+def test_broken_pool(capsys, tmp_path, monkeypatch):
+    (tmp_path / "library").mkdir()
+    (tmp_path / "library" / "presets.json").write_text("{}")
+    monkeypatch.setattr(batch_cli, "initialize_worker", failing_initializer)
+    code, errors = run(capsys, tmp_path, tmp_path / "library")
+    assert code == 1
+    assert errors[-1].startswith("PAM: A worker process failed to start or died")
@@ -0,0 +1,20 @@
+from all_presets import presets
+from binary_library import BinaryPresetLibrary, write_binary
+from preset import Preset
+
+TAGGED = Preset(**dict(presets["Silk"].to_dict(), name="Tagged Silk", metadata={"source": "silk.mel", "tags": ["shirt"]}))
+
+#Metadata survives compiling and reading a binary library, presets without it stay without
+def test_metadata_round_trip(tmp_path):
+    file_path = str(tmp_path / "presets.pamlib")
+    library = dict(presets, **{"Tagged Silk": TAGGED})
+    write_binary(file_path, library)
+
+    with BinaryPresetLibrary(file_path) as binary:
+        assert binary["Tagged Silk"].to_dict() == TAGGED.to_dict()
+        assert "metadata" not in binary["Silk"].to_dict()
+        restored = binary.to_presets()
+        table = binary.table()
+        assert table.preset("Tagged Silk").metadata == TAGGED.metadata
+        del table
+    assert {name: preset.to_dict() for name, preset in restored.items()} == {name: preset.to_dict() for name, preset in library.items()}
@@ -0,0 +1,47 @@
+from all_presets import presets
+from fingerprint_index import FingerprintIndex
+from preset import Preset
+
+def variant(name, base="Silk", **values):
+    return Preset(**dict(presets[base].to_dict(), name=name, **values))
+
+def test_lookup():
+    index = FingerprintIndex(presets)
+    assert len(index) == len(presets)
+    assert index.lookup(presets["Silk"].sim_values()) == ["Silk"]
+    assert index.lookup(variant("Other", bounce=0.987654).to_dict()) == []
+
+#Float noise below the UI precision still matches
+def test_lookup_ignores_float_noise():
+    index = FingerprintIndex(presets)
+    settings = presets["Silk"].sim_values()
+    settings["friction"] += 1e-6
+    assert index.lookup(settings) == ["Silk"]
+
+#Adding a name again replaces its entry, removing drops it (unknown names are ignored)
+def test_add_replace_remove():
+    index = FingerprintIndex({"Silk": presets["Silk"]})
+    index.add("Copy", variant("Copy"))
+    assert index.lookup(presets["Silk"].to_dict()) == ["Silk", "Copy"]
+    assert index.duplicates() == [["Silk", "Copy"]]
+
+    changed = variant("Copy", bounce=0.123)
+    index.add("Copy", changed)
+    assert len(index) == 2
+    assert index.lookup(presets["Silk"].to_dict()) == ["Silk"]
+    assert index.lookup(changed.to_dict()) == ["Copy"]
+    assert index.duplicates() == []
+
+    index.remove("Copy")
+    index.remove("Missing")
+    assert len(index) == 1 and index.lookup(changed.to_dict()) == []
+    assert index.fingerprints == {"Silk": presets["Silk"].fingerprint()}
+
+def test_copy_is_independent():
+    index = FingerprintIndex(presets)
+    copy = index.copy()
+    copy.add("Copy", variant("Copy"))
+    index.remove("Silk")
+    assert copy.lookup(presets["Silk"].to_dict()) == ["Silk", "Copy"]
+    assert index.lookup(presets["Silk"].to_dict()) == []
+    assert len(copy) == len(presets) + 1
@@ -0,0 +1,96 @@
+import json
+import os
+
+import maya.cmds as cmds
+import maya.mel as mel
+import pytest
+
+import fake_maya
+import instrumentation
+from all_presets import presets
+from instrumentation import NO_OPERATION, instrumented, operation, report
+
+#Instrumentation is always switched off again, even when a test fails
+@pytest.fixture
+def recorder():
+    yield instrumentation.enable()
+    instrumentation.disable()
+
+@instrumented("outer")
+def outer():
+    cmds.ls("garment0")
+    inner()
+    with operation("outer"):
+        cmds.ls("garment0")
+
+@instrumented("inner")
+def inner():
+    cmds.getAttr("garment0Shape.intermediateObject")
+
+#Host functions are only wrapped while instrumentation is on, and nothing is recorded when it is off
+def test_enable_disable():
+    fake_maya.build_scene(1)
+    original = cmds.ls
+    recorder = instrumentation.enable()
+    assert instrumentation.is_enabled() and cmds.ls is not original and cmds.ls.__pam_original__ is original
+    assert instrumentation.disable() is recorder
+    assert not instrumentation.is_enabled() and cmds.ls is original
+    assert not hasattr(mel.eval, "__pam_original__")
+
+    outer()
+    assert report() == {} and report(recorder) == {}
+
+#Host calls go to the innermost operation, an operation nested in itself counts as one run
+def test_calls_attributed_to_operations(recorder):
+    fake_maya.build_scene(1)
+    outer()
+    outer()
+    cmds.ls("garment0")
+
+    result = report()
+    assert result["outer"]["operation"]["count"] == 2
+    assert result["outer"]["host_calls"]["ls"]["count"] == 4 and result["outer"]["total_host_calls"] == 4
+    assert result["inner"]["operation"]["count"] == 2 and list(result["inner"]["host_calls"]) == ["getAttr"]
+    assert result[NO_OPERATION]["operation"] is None and result[NO_OPERATION]["host_calls"]["ls"]["count"] == 1
+    assert result["outer"]["host_calls"]["ls"]["payload_chars"] == 4 * len("garment0")
+
+#Preset operations record the host calls they make
+def test_apply_is_instrumented(recorder, host):
+    meshes = fake_maya.build_scene(2)
+    cmds.select(meshes)
+    presets["Silk"].apply_preset()
+    entry = report()["apply"]
+    assert entry["operation"]["count"] == 1 and entry["host_calls"]["confirmDialog"]["count"] == 1
+    assert entry["total_host_calls"] == sum(recorder.calls[key].count for key in recorder.calls if key[0] == "apply")
+
+#The JSON report and the Chrome trace are written to the folder, with operations and host calls as nested slices
+def test_export(recorder, tmp_path):
+    fake_maya.build_scene(1)
+    outer()
+    instrumentation.export_all(str(tmp_path))
+
+    with open(os.path.join(tmp_path, "pam_instrumentation.json"), 'r') as file:
+        assert json.load(file) == json.loads(json.dumps(report()))
+    with open(os.path.join(tmp_path, "pam_trace.json"), 'r') as file:
+        trace = json.load(file)
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events if event["cat"] == "operation"] == ["inner", "outer"]
+    assert sum(event["cat"] == "host" for event in events) == 3
+    host_event = next(event for event in events if event["name"] == "getAttr")
+    assert host_event["args"]["operation"] == "inner" and trace["otherData"]["dropped_events"] == 0
+    assert "outer: 1 run(s)" in instrumentation.summary_text()
+
+#Trace events past the limit are counted and dropped, trace=False keeps only the statistics
+def test_trace_limits(monkeypatch):
+    fake_maya.build_scene(1)
+    monkeypatch.setattr(instrumentation, "MAX_TRACE_EVENTS", 2)
+    try:
+        recorder = instrumentation.enable()
+        outer()
+        assert len(recorder.events) == 2 and recorder.dropped == 3
+
+        recorder = instrumentation.enable(trace=False)
+        outer()
+        assert recorder.events == [] and report()["outer"]["total_host_calls"] == 2
+    finally:
+        instrumentation.disable()
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from all_presets import presets
+from lazy_presets import LazyPresetFile, LazyPresets, scan_offsets, write_library
+from preset import Preset
+
+def variant(index):
+    return Preset(**dict(presets["Silk"].to_dict(), name=f"Silk {index}", friction=index / 1000))
+
+def write_json(path, data, **options):
+    with open(path, 'w') as file:
+        json.dump(data, file, **options)
+    return path
+
+#Every object entry maps to the exact bytes of its value, whatever the layout
+@pytest.mark.parametrize("options", [{"indent": 4}, {}, {"indent": 1, "separators": (",", " : ")}])
+def test_scan_offsets(options):
+    data = {"Silk": presets["Silk"].to_dict(), "Quote \"Q\" é": {"nested": {"a": [1, {"b": "}"}]}},
+            "Number": 3, "List": [1, 2], "Jelly": presets["Jelly"].to_dict()}
+    raw = json.dumps(data, **options).encode("utf-8")
+    offsets = scan_offsets(raw)
+    assert list(offsets) == ["Silk", "Quote \"Q\" é", "Jelly"]
+    for name, (start, end) in offsets.items():
+        assert json.loads(raw[start:end]) == data[name]
+
+def test_scan_offsets_empty_and_malformed():
+    assert scan_offsets(b" { } ") == {}
+    for raw in [b"[]", b'{"Silk": {}', b'{"Silk" {}}', b'{"Silk": {} "Jelly": {}}']:
+        with pytest.raises(ValueError):
+            scan_offsets(raw)
+
+#Presets are parsed on access and kept in a bounded LRU cache
+def test_lazy_file_cache(tmp_path):
+    path = write_json(str(tmp_path / "presets.json"), {name: preset.to_dict() for name, preset in presets.items()}, indent=4)
+    source = LazyPresetFile(path, cache_size=2)
+    assert list(source.offsets) == list(presets) and not source.cache
+
+    for name in ["Silk", "Jelly", "Silk", "Lava"]:
+        assert source.preset(name).to_dict() == presets[name].to_dict()
+    assert list(source.cache) == ["Silk", "Lava"]
+    assert source.preset("Silk") is source.cache["Silk"]
+
+#A file changed on disk is indexed again on the next access
+def test_lazy_file_rescan(tmp_path):
+    path = write_json(str(tmp_path / "presets.json"), {"Silk": presets["Silk"].to_dict()}, indent=4)
+    source = LazyPresetFile(path)
+    source.preset("Silk")
+    write_json(path, {"Jelly": presets["Jelly"].to_dict(), "Silk": variant(1).to_dict()}, indent=4)
+    os.utime(path, ns=(1, 1))
+    assert source.preset("Silk").to_dict() == variant(1).to_dict()
+    assert list(source.offsets) == ["Jelly", "Silk"]
+
+#Corrupted entries behave as missing ones, overlay presets win over the file
+def test_lazy_presets_mapping(tmp_path):
+    data = {name: preset.to_dict() for name, preset in presets.items()}
+    data["Broken"] = {"name": "Broken"}
+    source = LazyPresetFile(write_json(str(tmp_path / "presets.json"), data, indent=4))
+    library = LazyPresets(source)
+
+    assert len(library) == len(data) and "Broken" in library
+    with pytest.raises(KeyError):
+        library["Broken"]
+    assert "Broken" in source.errors
+    assert "Broken" not in dict(library.items())
+
+    library["Silk"] = variant(1)
+    library["Silk 2"] = variant(2)
+    del library["Jelly"]
+    copy = library.copy()
+    del copy["Lava"]
+    assert library["Silk"] is copy["Silk"] and library.raw("Silk") is None
+    assert json.loads(library.raw("Chiffon")) == data["Chiffon"]
+    assert "Lava" in library and "Jelly" not in library and list(library)[-1] == "Silk 2"
+    assert [preset.name for preset in library.values()][-1] == "Silk 2"
+
+#The streaming save matches json.dump with indent=4, copies unchanged entries and returns their new offsets
+def test_write_library(tmp_path):
+    path = write_json(str(tmp_path / "presets.json"), {name: preset.to_dict() for name, preset in presets.items()}, indent=4)
+    library = LazyPresets(LazyPresetFile(path))
+    library["Silk"] = variant(1)
+    library["Silk 2"] = variant(2)
+    del library["Jelly"]
+
+    offsets, digest = write_library(path, library)
+    with open(path, 'rb') as file:
+        raw = file.read()
+    expected = {name: preset.to_dict() for name, preset in library.items()}
+    assert raw == json.dumps(expected, indent=4).encode("utf-8")
+    assert offsets == scan_offsets(raw)
+
+    library.source.written(offsets)
+    assert library.source.preset("Silk 2").to_dict() == variant(2).to_dict()
+
+    offsets, _ = write_library(path, {})
+    with open(path, 'rb') as file:
+        assert file.read() == b"{}" and offsets == {}
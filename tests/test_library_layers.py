@@ -0,0 +1,49 @@
+import threading
+
+from all_presets import presets as builtin_presets
+from bench_storage import make_library
+from json_manager import JsonManager
+from lazy_presets import LazyPresetFile
+from library_layers import LayeredLibrary, LibraryLayer
+
+def make_layers(tmp_path):
+    for name in ("studio", "user"):
+        (tmp_path / name).mkdir()
+    JsonManager(str(tmp_path / "studio"), snapshot=False).save_presets(make_library(50, seed=1))
+    JsonManager(str(tmp_path / "user"), snapshot=False).save_presets(make_library(200, seed=2))
+    return LayeredLibrary(JsonManager(str(tmp_path / "user"), lazy=True, snapshot=False), [LibraryLayer("studio", str(tmp_path / "studio"))])
+
+#Merging a lazy user library only combines names, its presets are parsed when they are read
+def test_merge_does_not_parse_lazy_layer(tmp_path, monkeypatch):
+    library = make_layers(tmp_path)
+    parsed = []
+    parse = LazyPresetFile._parse
+    monkeypatch.setattr(LazyPresetFile, "_parse", lambda self, name, raw: parsed.append(name) or parse(self, name, raw))
+
+    merged = library.load()
+    assert parsed == []
+    assert len(merged) == len(set(builtin_presets) | set(make_library(50, seed=1)) | set(make_library(200, seed=2)))
+    assert library.layer_of(next(iter(make_library(200, seed=2)))) == "user"
+
+    name = next(iter(make_library(200, seed=2)))
+    assert merged[name].name == name
+    assert parsed == [name]
+    library.close()
+
+#The merged dictionary is the caller's own copy, changes to it never reach the library's cached merge
+def test_merged_copy_is_independent(tmp_path):
+    library = make_layers(tmp_path)
+    merged = library.load()
+    merged["New"] = builtin_presets["Custom"]
+    del merged["Custom"]
+    again = library.load()
+    assert "New" not in again and "Custom" in again
+    assert dict(merged.items())["New"] is builtin_presets["Custom"]
+    library.close()
+
+#Layer loads run on daemon threads, so a load hung on a share can't keep Maya from exiting
+def test_layer_threads_are_daemon(tmp_path):
+    library = make_layers(tmp_path)
+    library.load()
+    library.close()
+    assert all(thread.daemon for thread in threading.enumerate() if thread.name.startswith("PAMLibrary"))
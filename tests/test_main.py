@@ -0,0 +1,28 @@
+import pytest
+
+import main
+from startup_profile import PROFILE_ENV
+
+#The startup profile is only shown when PAM_PROFILE is set, never on stdout
+@pytest.mark.parametrize("profiling", [False, True])
+def test_startup_profile(host, tmp_path, monkeypatch, capsys, profiling):
+    monkeypatch.setattr(main, "file_path", str(tmp_path))
+    monkeypatch.delenv(main.STORE_ENV, raising=False)
+    if profiling:
+        monkeypatch.setenv(PROFILE_ENV, "1")
+    else:
+        monkeypatch.delenv(PROFILE_ENV, raising=False)
+
+    ui = main.main()
+    ui.close()
+    assert [message.startswith("PAM: Started in") for message in host.messages] == ([True] if profiling else [])
+    assert capsys.readouterr().out == ""
+
+#PAM_STORE picks the preset store the UI saves to
+@pytest.mark.parametrize("store, journal", [("", False), ("journal", True)])
+def test_store_choice(host, tmp_path, monkeypatch, store, journal):
+    monkeypatch.setattr(main, "file_path", str(tmp_path))
+    monkeypatch.setenv(main.STORE_ENV, store)
+    ui = main.main()
+    ui.close()
+    assert (ui.jsonManager.journal is not None) == journal
@@ -0,0 +1,50 @@
+from name_index import NameIndex
+
+NAMES = ["Silk", "Heavy Denim", "silky Satin", "Denim Light", "Chiffon", "Sil"]
+
+#Prefix search is case-insensitive and alphabetical
+def test_prefix():
+    index = NameIndex(NAMES)
+    assert index.prefix("SIL") == ["Sil", "Silk", "silky Satin"]
+    assert index.prefix("sil", limit=2) == ["Sil", "Silk"]
+    assert index.prefix("x") == []
+
+#Short text scans every name in library order, longer text goes through the trigram index
+def test_substring():
+    index = NameIndex(NAMES)
+    assert index.substring("im") == ["Heavy Denim", "Denim Light"]
+    assert index._trigrams is None
+    assert index.substring("DENIM") == ["Denim Light", "Heavy Denim"]
+    assert index.substring("nim l") == ["Denim Light"]
+    assert index.substring("ilk", limit=1) == ["Silk"]
+    assert index.substring("zzz") == []
+
+#Prefix matches come first, then the other substring matches, without repeats
+def test_search():
+    index = NameIndex(NAMES)
+    assert index.search("den") == ["Denim Light", "Heavy Denim"]
+    assert index.search("sil") == ["Sil", "Silk", "silky Satin"]
+    assert index.search("ilk") == ["Silk", "silky Satin"]
+    assert index.search("den", limit=1) == ["Denim Light"]
+    assert index.search("") == NAMES
+    assert index.search("", limit=2) == NAMES[:2]
+
+#Changes after a search keep both built structures in step with a fresh index
+def test_add_remove_sync():
+    index = NameIndex(NAMES)
+    index.search("silk")
+    assert index._sorted_names is not None and index._trigrams is not None
+
+    assert index.add("Silken Veil") and not index.add("Silk")
+    index.remove("Silk")
+    index.remove("Missing")
+    assert index.search("silk") == ["Silken Veil", "silky Satin"]
+
+    added = index.sync(["Chiffon", "Light Chiffon", "Silken Veil"])
+    assert added == ["Light Chiffon"]
+    assert len(index) == 3 and "Silk" not in index
+
+    fresh = NameIndex(["Chiffon", "Silken Veil", "Light Chiffon"])
+    assert index.sorted_names == fresh.sorted_names
+    assert index.trigrams == fresh.trigrams
+    assert index.search("chif") == ["Chiffon", "Light Chiffon"]
@@ -0,0 +1,66 @@
+import maya.cmds as cmds
+import pytest
+
+import fake_maya
+from ncloth_index import NClothIndex
+
+@pytest.fixture
+def index():
+    index = NClothIndex()
+    index.install_callbacks()
+    yield index
+    index.remove_callbacks()
+
+def built(index, count=2):
+    meshes = fake_maya.build_scene(count)
+    index.build()
+    return meshes
+
+def ncloth_of(mesh):
+    return cmds.listConnections(mesh + "Shape", type="nCloth")[0]
+
+#nCloth added after the build is picked up from its callbacks, without a rebuild
+def test_node_added(index):
+    meshes = built(index)
+    new_mesh = fake_maya.create_mesh("added")
+    node = fake_maya.make_ncloth(new_mesh)
+    assert not index.stale and node in index.dirty
+    assert index.ncloth_nodes(new_mesh) == [node]
+    assert index.ncloth_nodes(new_mesh + "Shape") == [node]
+    assert index.ncloth_nodes(meshes[0]) == [ncloth_of(meshes[0])]
+
+def test_node_removed(index):
+    meshes = built(index)
+    node = ncloth_of(meshes[0])
+    cmds.delete(cmds.listRelatives(node, parent=True))
+    assert not index.stale
+    assert index.ncloth_nodes(meshes[0]) == []
+    assert node not in index.all_ncloth_nodes()
+
+#Reconnecting an nCloth node to another mesh moves its entries
+def test_connection_changed(index):
+    meshes = built(index)
+    node = ncloth_of(meshes[0])
+    other = fake_maya.create_mesh("other")
+    index.refresh()
+    fake_maya.disconnect(meshes[0] + "Shape.worldMesh[0]", node + ".inputMesh")
+    cmds.connectAttr(other + "Shape.worldMesh[0]", node + ".inputMesh")
+    assert not index.stale and node in index.dirty
+    assert index.ncloth_nodes(other) == [node]
+    assert index.ncloth_nodes(meshes[0] + "Shape") == []
+
+#Renaming an indexed object rebuilds the index on the next lookup
+def test_rename(index):
+    meshes = built(index)
+    node = ncloth_of(meshes[0])
+    cmds.rename(meshes[0], "renamed")
+    assert index.stale
+    assert index.ncloth_nodes("renamed") == [node]
+    assert index.ncloth_nodes(meshes[0]) == []
+
+#A new scene drops everything indexed for the old one
+def test_scene_new(index):
+    meshes = built(index)
+    fake_maya.reset_scene()
+    assert index.stale
+    assert index.ncloth_nodes(meshes[0]) == [] and index.all_ncloth_nodes() == []
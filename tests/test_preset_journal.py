@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+from all_presets import presets
+from json_manager import JsonManager
+from preset import Preset
+from preset_journal import COMPACT_AFTER, PresetJournal
+
+def variant(index):
+    return Preset(**dict(presets["Silk"].to_dict(), name=f"Silk {index}", friction=index / 1000))
+
+def library_file(directory):
+    with open(os.path.join(directory, "presets.json"), 'r') as file:
+        return json.load(file)
+
+#Single changes are appended to the journal, presets.json isn't rewritten, and a new session replays them
+@pytest.mark.parametrize("lazy", [False, True])
+def test_append_and_replay(tmp_path, lazy):
+    directory = str(tmp_path)
+    JsonManager(directory, snapshot=False).save_presets(dict(presets))
+    store = JsonManager(directory, journal=True, lazy=lazy)
+    store.add_preset("Silk 1", variant(1))
+    store.add_preset("Silk 2", variant(2))
+    store.delete_preset("Jelly")
+    store.add_preset("Silk 1", variant(3))
+
+    assert set(library_file(directory)) == set(presets)
+    assert store.journal.count == 4
+
+    reloaded = JsonManager(directory, journal=True, lazy=lazy).load_presets()
+    assert "Jelly" not in reloaded
+    assert reloaded["Silk 1"].to_dict() == variant(3).to_dict()
+    assert reloaded["Silk 2"].to_dict() == variant(2).to_dict()
+
+#A record cut short by a crash is ignored, and the next append starts on its own line
+def test_truncated_last_record(tmp_path):
+    directory = str(tmp_path)
+    JsonManager(directory, snapshot=False).save_presets(dict(presets))
+    JsonManager(directory, journal=True).add_preset("Silk 1", variant(1))
+    with open(os.path.join(directory, "presets.journal"), 'ab') as file:
+        file.write(PresetJournal.encode("put", "Silk 2", variant(2).to_dict())[:40])
+
+    store = JsonManager(directory, journal=True, snapshot=False)
+    loaded = store.load_presets()
+    assert "Silk 1" in loaded and "Silk 2" not in loaded
+    assert store.journal.torn_tail
+
+    store.add_preset("Silk 3", variant(3))
+    reloaded = JsonManager(directory, journal=True, snapshot=False).load_presets()
+    assert "Silk 1" in reloaded and "Silk 3" in reloaded and "Silk 2" not in reloaded
+
+#After COMPACT_AFTER records the journal is folded into presets.json and emptied
+def test_compaction(tmp_path):
+    directory = str(tmp_path)
+    JsonManager(directory, snapshot=False).save_presets(dict(presets))
+    store = JsonManager(directory, journal=True)
+    for index in range(COMPACT_AFTER - 1):
+        store.add_preset(f"Silk {index}", variant(index))
+    assert store.journal.count == COMPACT_AFTER - 1
+    assert set(library_file(directory)) == set(presets)
+
+    store.add_preset("Last", variant(COMPACT_AFTER))
+    assert store.journal.count == 0
+    assert os.path.getsize(os.path.join(directory, "presets.journal")) == 0
+    assert len(library_file(directory)) == len(presets) + COMPACT_AFTER
+    assert len(JsonManager(directory, journal=True).load_presets()) == len(presets) + COMPACT_AFTER
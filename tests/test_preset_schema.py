@@ -0,0 +1,29 @@
+from all_presets import presets
+from preset_schema import validate_preset
+
+SILK = presets["Silk"].to_dict()
+
+#A library entry as PAM writes it is accepted as it is
+def test_valid_entry():
+    preset, problems = validate_preset(dict(SILK), "Silk")
+    assert problems == ()
+    assert preset.to_dict() == SILK
+
+#Repairable values are converted or clamped (keeping the field's type), each with a problem
+def test_repaired_entry():
+    data = dict(SILK, friction=str(SILK["friction"]), pointMass=-1.5, maxIterations=float(SILK["maxIterations"]), metadata="tag")
+    del data["name"]
+    preset, problems = validate_preset(data, "Silk")
+    assert preset.name == "Silk"
+    assert preset.friction == SILK["friction"]
+    assert type(preset.pointMass) is float
+    assert type(preset.maxIterations) is int
+    assert preset.metadata is None
+    assert len(problems) == 5
+
+#Entries with a value that can't be repaired are rejected with every problem found
+def test_rejected_entry():
+    preset, problems = validate_preset(dict(SILK, scalingRelation=7, bounce="high", colour="red"), "Silk")
+    assert preset is None
+    assert len(problems) == 3
+    assert validate_preset([1, 2], "Silk") == (None, ["entry is list, not an object"])
@@ -0,0 +1,52 @@
+import json
+import os
+import pickle
+
+from all_presets import presets
+from json_manager import JsonManager
+from preset_snapshot import HEADER, PresetSnapshot
+
+class Exploit:
+
+    def __reduce__(self):
+        return (os.remove, (self.path,))
+
+#Eager and lazy warm starts read the snapshot back, which holds JSON after its header
+def test_snapshot_round_trip(tmp_path):
+    JsonManager(str(tmp_path), snapshot=False).save_presets(dict(presets))
+    for lazy, extension in ((False, ".snapshot"), (True, ".offsets")):
+        cold = JsonManager(str(tmp_path), lazy=lazy).load_presets()
+        warm = JsonManager(str(tmp_path), lazy=lazy).load_presets()
+        assert {name: preset.to_dict() for name, preset in warm.items()} == {name: preset.to_dict() for name, preset in cold.items()}
+        with open(str(tmp_path / ("presets" + extension)), 'rb') as file:
+            file.seek(HEADER.size)
+            assert file.read(1) == b"{"
+
+#Load errors of a repaired library come back from the snapshot too
+def test_snapshot_keeps_load_errors(tmp_path):
+    with open(str(tmp_path / "presets.json"), 'w') as file:
+        file.write('{"Silk": ' + json.dumps(dict(presets["Silk"].to_dict(), friction="0.5")) + '}')
+    cold = JsonManager(str(tmp_path))
+    cold.load_presets()
+    warm = JsonManager(str(tmp_path))
+    assert warm.load_presets()["Silk"].friction == 0.5
+    assert warm.load_errors == cold.load_errors and warm.load_errors
+
+#A pickle planted in the snapshot is never unpickled, it is a cache miss
+def test_planted_pickle_is_not_loaded(tmp_path):
+    JsonManager(str(tmp_path), snapshot=False).save_presets(dict(presets))
+    JsonManager(str(tmp_path)).load_presets()
+    victim = tmp_path / "victim"
+    victim.write_text("keep")
+    exploit = Exploit()
+    exploit.path = str(victim)
+
+    snapshot_path = str(tmp_path / "presets.snapshot")
+    with open(snapshot_path, 'rb') as file:
+        header = file.read(HEADER.size)
+    with open(snapshot_path, 'wb') as file:
+        file.write(header + pickle.dumps(exploit))
+
+    assert PresetSnapshot(snapshot_path).load(stamp=HEADER.unpack(header)[3:]) is None
+    assert set(JsonManager(str(tmp_path)).load_presets()) == set(presets)
+    assert victim.exists()
@@ -0,0 +1,35 @@
+import gc
+import weakref
+
+from all_presets import presets
+from preset import Preset
+from preset_table import PresetTable
+
+TAGGED = Preset(**dict(presets["Silk"].to_dict(), name="Tagged Silk", metadata={"source": "silk.mel", "extra": {"thickness": 0.2}}))
+
+#Metadata survives the table, including selections and sorting
+def test_metadata_round_trip():
+    library = dict(presets, **{"Tagged Silk": TAGGED})
+    table = PresetTable.from_presets(library)
+    restored = table.to_presets()
+    assert restored["Tagged Silk"].to_dict() == TAGGED.to_dict()
+    assert restored["Silk"].to_dict() == presets["Silk"].to_dict()
+
+    selected = table.sort_by("friction").filter("friction", TAGGED.friction, TAGGED.friction)
+    assert selected.preset("Tagged Silk").metadata == TAGGED.metadata
+
+#A library without metadata keeps no metadata column
+def test_no_metadata():
+    table = PresetTable.from_presets(presets)
+    assert table._metadata is None
+    assert all("metadata" not in preset.to_dict() for preset in table.to_presets().values())
+
+#The table keeps no Preset alive once it is built
+def test_from_presets_drops_presets():
+    library = {name: Preset(**preset.to_dict()) for name, preset in presets.items()}
+    references = [weakref.ref(preset) for preset in library.values()]
+    table = PresetTable.from_presets(library)
+    del library
+    gc.collect()
+    assert all(reference() is None for reference in references)
+    assert table.preset("Silk").description == presets["Silk"].description
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from all_presets import presets
+from bench_storage import make_library
+from json_manager import JsonManager
+from preset_writer import PresetWriter
+
+#Duplicate checks on the main thread run while the writer thread saves through the same store
+def test_lookups_while_writing(tmp_path):
+    JsonManager(str(tmp_path), snapshot=False).save_presets(dict(presets))
+    writer = PresetWriter(JsonManager(str(tmp_path), lazy=True), delay=0)
+    library = make_library(300)
+    index = writer.fingerprint_index()
+    errors = []
+
+    def look_up():
+        try:
+            for preset in list(library.values()) * 3:
+                index.lookup(preset.sim_values())
+        except Exception as error:
+            errors.append(error)
+
+    reader = threading.Thread(target=look_up)
+    reader.start()
+    for name, preset in library.items():
+        writer.add_preset(name, preset)
+    reader.join()
+    writer.close()
+
+    assert errors == []
+    name, preset = next(iter(library.items()))
+    assert name in index.lookup(preset.sim_values())
+
+#close() writes what is queued and stops the thread
+def test_close_writes_and_stops(tmp_path):
+    JsonManager(str(tmp_path), snapshot=False).save_presets(dict(presets))
+    writer = PresetWriter(JsonManager(str(tmp_path), lazy=True), delay=60)
+    writer.add_preset("Kept", presets["Silk"])
+    writer.close()
+    assert not writer.thread.is_alive()
+    assert "Kept" in JsonManager(str(tmp_path), snapshot=False).load_presets()
+
+#Store whose writes fail with the given exceptions, one per write, before they go through
+class FailingStore:
+
+    def __init__(self, store, failures):
+        self.store = store
+        self.failures = list(failures)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def apply_changes(self, changes):
+        if self.failures:
+            raise self.failures.pop(0)
+        for name, preset in changes.items():
+            if preset is None:
+                self.store.delete_preset(name)
+            else:
+                self.store.add_preset(name, preset)
+
+#Errors other than OSError/ValueError (sqlite3 "database is locked", a TypeError while serialising) are retried
+@pytest.mark.parametrize("failure", [sqlite3.OperationalError("database is locked"), TypeError("not serialisable")])
+def test_unexpected_write_error_is_retried(tmp_path, failure):
+    store = FailingStore(JsonManager(str(tmp_path), snapshot=False), [failure])
+    writer = PresetWriter(store, delay=0)
+    writer.add_preset("Kept", presets["Silk"])
+    assert writer.flush(timeout=5) is False
+    assert writer.state() == "error" and writer.thread.is_alive()
+
+    assert writer.flush(timeout=5) is True
+    writer.close(timeout=5)
+    assert "Kept" in store.load_presets()
+
+#A writer thread that ends anyway keeps its changes queued, flush and close return instead of waiting for it
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_flush_returns_when_thread_dies(tmp_path):
+    store = FailingStore(JsonManager(str(tmp_path), snapshot=False), [SystemExit()])
+    writer = PresetWriter(store, delay=0)
+    writer.add_preset("Kept", presets["Silk"])
+    writer.thread.join(5)
+    assert not writer.thread.is_alive()
+    assert writer.flush() is False
+    assert writer.state() == "pending" and list(writer.pending) == ["Kept"]
+
+    #The next change starts a new thread which writes both
+    writer.add_preset("Also Kept", presets["Silk"])
+    writer.close(timeout=5)
+    assert {"Kept", "Also Kept"} <= set(store.load_presets())
+
+#Store whose writes wait until released, like a save to a slow share
+class SlowStore(FailingStore):
+
+    def __init__(self, store):
+        super().__init__(store, [])
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def apply_changes(self, changes):
+        self.started.set()
+        self.release.wait(10)
+        super().apply_changes(changes)
+
+#Duplicate checks during a write return at once and see the queued changes (saves, and deletes of written presets)
+def test_lookup_does_not_wait_for_write(tmp_path):
+    store = SlowStore(JsonManager(str(tmp_path), snapshot=False))
+    store.store.save_presets({"Silk": presets["Silk"]})
+    writer = PresetWriter(store, delay=0)
+    index = writer.fingerprint_index()
+    assert index.lookup(presets["Silk"].sim_values()) == ["Silk"]
+
+    writer.add_preset("Silk Copy", presets["Silk"])
+    assert store.started.wait(5)
+    writer.add_preset("Denim Copy", presets["Heavy Denim"])
+    writer.delete_preset("Silk")
+
+    start = time.monotonic()
+    assert index.lookup(presets["Silk"].sim_values()) == ["Silk Copy"]
+    assert index.lookup(presets["Heavy Denim"].sim_values()) == ["Denim Copy"]
+    assert index.duplicates() == [] and len(index) == 2
+    assert time.monotonic() - start < 0.5
+
+    store.release.set()
+    writer.close(timeout=5)
+    assert index.lookup(presets["Silk"].sim_values()) == ["Silk Copy"]
@@ -0,0 +1,58 @@
+import sqlite3
+
+from all_presets import presets
+from preset import Preset, SIM_ATTRIBUTES
+from sqlite_manager import SqliteManager
+from ui_manager import UiManager
+
+TAGGED = Preset(**dict(presets["Silk"].to_dict(), name="Tagged Silk", metadata={"source": "silk.mel", "tags": ["shirt"]}))
+
+#Metadata survives a save, an upsert and a fresh connection
+def test_metadata_round_trip(tmp_path):
+    store = SqliteManager(str(tmp_path))
+    store.save_presets({"Silk": presets["Silk"], "Tagged Silk": TAGGED})
+    store.add_preset("Tagged Again", TAGGED)
+    store.close()
+
+    loaded = SqliteManager(str(tmp_path)).load_presets()
+    assert loaded["Tagged Silk"].metadata == TAGGED.metadata
+    assert loaded["Tagged Again"].to_dict() == TAGGED.to_dict()
+    assert "metadata" not in loaded["Silk"].to_dict()
+
+#A database made before the metadata column gets it added, and rows that don't fit the schema are reported
+def test_old_database_and_load_errors(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "presets.db"))
+    columns = ", ".join(["key TEXT PRIMARY KEY", "name TEXT", "description TEXT"] + [f"{attr} REAL" for attr in SIM_ATTRIBUTES])
+    connection.execute(f"CREATE TABLE presets ({columns})")
+    values = presets["Silk"].to_dict()
+    row = ["Silk", "Silk", values["description"]] + [values[attr] for attr in SIM_ATTRIBUTES]
+    connection.execute(f"INSERT INTO presets VALUES ({', '.join('?' * len(row))})", row)
+    connection.execute(f"INSERT INTO presets VALUES ({', '.join('?' * len(row))})", ["Broken", "Broken", ""] + [None] * len(SIM_ATTRIBUTES))
+    connection.commit()
+    connection.close()
+
+    store = SqliteManager(str(tmp_path))
+    loaded = store.load_presets()
+    assert list(loaded) == ["Silk"]
+    assert "Broken" in store.load_errors
+    store.add_preset("Tagged Silk", TAGGED)
+    assert store.reopen().load_presets()["Tagged Silk"].metadata == TAGGED.metadata
+
+#The UI runs on a SQLite store: defaults are seeded, saves go through the background writer
+def test_ui_on_sqlite(tmp_path, host):
+    store = SqliteManager(str(tmp_path))
+    ui = UiManager(json_manager=store)
+    ui.create_UI()
+    assert "Silk" in ui.loaded_presets
+
+    settings = dict(presets["Silk"].to_dict(), name="Sqlite Silk", friction=0.61)
+    Preset.save_preset(settings, ui.writer, ui.ncloth_controls, ui.update_preset_dropdown, ui.loaded_presets)
+    temporary = dict(settings, name="Sqlite Temp", friction=0.62)
+    Preset.save_preset(temporary, ui.writer, ui.ncloth_controls, ui.update_preset_dropdown, ui.loaded_presets)
+    ui.delete_preset("Sqlite Temp")
+    assert ui.writer.flush(timeout=10)
+    assert ui.writer.fingerprint_index().lookup(settings) == ["Sqlite Silk"]
+    ui.close()
+
+    loaded = SqliteManager(str(tmp_path)).load_presets()
+    assert "Sqlite Silk" in loaded and "Sqlite Temp" not in loaded
@@ -0,0 +1,108 @@
+import maya.cmds as cmds
+import pytest
+
+import fake_maya
+from all_presets import presets
+from bench_storage import make_library
+from json_manager import JsonManager
+from library_layers import LayeredLibrary, LibraryLayer
+from preset import Preset
+from ui_manager import MENU_LIMIT, UiManager
+
+#A preset only the studio library holds
+STUDIO_PRESET = Preset(**dict(presets["Heavy Denim"].to_dict(), name="Studio Silk", friction=0.42, stretchResistance=12.0))
+
+@pytest.fixture
+def layered_ui(tmp_path):
+    (tmp_path / "studio").mkdir()
+    (tmp_path / "user").mkdir()
+    JsonManager(str(tmp_path / "studio"), snapshot=False).save_presets({"Studio Silk": STUDIO_PRESET})
+    store = JsonManager(str(tmp_path / "user"), lazy=True)
+    library = LayeredLibrary(store, [LibraryLayer("studio", str(tmp_path / "studio"))])
+    ui = UiManager(json_manager=store, library=library)
+    yield ui
+    ui.writer.close()
+    ui.close()
+
+#A node holding exactly a studio preset's settings is an exact match, not "closest (0.000 away)"
+def test_audit_finds_exact_match_in_shared_layer(layered_ui, host, capsys):
+    mesh = fake_maya.build_scene(1)[0]
+    node = cmds.listConnections(mesh + "Shape", type="nCloth")[0]
+    for attr, value in STUDIO_PRESET.sim_values().items():
+        cmds.setAttr(f"{node}.{attr}", value)
+
+    results = layered_ui.audit_scene()
+    assert [(result["preset"], result["match"]) for result in results] == [("Studio Silk", "exact")]
+    assert layered_ui.fingerprint_index().lookup(STUDIO_PRESET.sim_values()) == ["Studio Silk"]
+
+    #The summary is shown in the viewport, only nodes that differ from their preset are warned about
+    assert host.messages == ["Audited 1 nCloth node(s), 1 match a preset, 0 differ from their closest preset, 0 unmatched"]
+    assert host.warnings == []
+    assert capsys.readouterr().out == ""
+
+@pytest.fixture
+def large_ui(tmp_path):
+    library = dict(presets)
+    library.update(make_library(500))
+    JsonManager(str(tmp_path), snapshot=False).save_presets(library)
+    ui = UiManager(json_manager=JsonManager(str(tmp_path), lazy=True))
+    ui.create_UI()
+    yield ui
+    ui.writer.close()
+    ui.close()
+
+def dropdown_labels(ui):
+    items = cmds.optionMenu(ui.ncloth_controls['presetDropdown'], query=True, itemListLong=True) or []
+    return [cmds.menuItem(item, query=True, label=True) for item in items]
+
+#With more presets than the dropdown holds, a newly saved preset is listed and the rest are counted instead of dropped
+def test_dropdown_lists_saved_preset_past_limit(large_ui):
+    labels = dropdown_labels(large_ui)
+    assert len(labels) == MENU_LIMIT + 1
+    assert labels[-1] == f"{len(large_ui.loaded_presets) - 2 - (MENU_LIMIT - 1)} more, refine filter"
+
+    settings = dict(presets["Silk"].to_dict(), name="Zz Saved Last", friction=0.77)
+    Preset.save_preset(settings, large_ui.writer, large_ui.ncloth_controls, large_ui.update_preset_dropdown, large_ui.loaded_presets)
+    labels = dropdown_labels(large_ui)
+    assert "Zz Saved Last" in labels
+    assert labels[-1] == f"{len(large_ui.loaded_presets) - 2 - (MENU_LIMIT - 1)} more, refine filter"
+
+    #The current and newest presets are only pinned while they match the filter
+    large_ui.select_preset("Zz Saved Last")
+    large_ui.filter_presets("Silk")
+    assert dropdown_labels(large_ui) == ["Custom", "Silk"]
+
+#Importing Maya's presets from the UI reports in the viewport, not on stdout
+def test_import_attr_presets_reports_in_view(layered_ui, host, tmp_path, capsys):
+    from attr_preset_io import export_attr_presets
+    (tmp_path / "mel").mkdir()
+    export_attr_presets({"Imported Silk": Preset(**dict(presets["Silk"].to_dict(), name="Imported Silk"))}, str(tmp_path / "mel"))
+
+    result = layered_ui.import_attr_presets(str(tmp_path / "mel"))
+    assert list(result["presets"]) == ["Imported Silk"]
+    assert host.messages[-1].startswith("PAM: Imported 1 of 1 Maya preset file(s)")
+    assert capsys.readouterr().out == ""
+
+#Saving a copy of a built-in or studio preset warns about it, the duplicate check covers every merged layer
+@pytest.mark.parametrize("original", [presets["Silk"], STUDIO_PRESET])
+def test_save_custom_warns_about_layer_duplicates(layered_ui, host, monkeypatch, original):
+    layered_ui.create_UI()
+    monkeypatch.setattr(layered_ui, "get_current_settings", lambda refresh=False: dict(original.to_dict(), name="My Copy"))
+    host.dialog_answer = "No"
+
+    button = next(control for control in host.ui.controls.values() if control.props.get("label") == "Save Custom")
+    button.props["command"]()
+    assert host.warnings == [f"Preset 'My Copy' has the same settings as: {original.name}"]
+
+#A scene full of edited nCloth gets one warning naming the first few nodes, the detail stays in the results
+def test_audit_warns_once(layered_ui, host):
+    meshes = fake_maya.build_scene(20)
+    for mesh in meshes:
+        node = cmds.listConnections(mesh + "Shape", type="nCloth")[0]
+        cmds.setAttr(f"{node}.friction", 0.123)
+
+    results = layered_ui.audit_scene()
+    assert len(results) == 20 and all(result["match"] == "nearest" and result["deviations"] for result in results)
+    assert len(host.warnings) == 1
+    assert host.warnings[0].startswith("PAM: 20 nCloth node(s) don't match a preset exactly: ")
+    assert host.warnings[0].endswith(" (and 15 more)")
@@ -0,0 +1,79 @@
+import maya.cmds as cmds
+import numpy as np
+import pytest
+
+import fake_maya
+import wedge
+from all_presets import presets
+from json_manager import JsonManager
+from preset import ATTRIBUTE_RANGES, INT_ATTRIBUTES, SIM_ATTRIBUTES
+
+SILK = presets["Silk"]
+DENIM = presets["Heavy Denim"]
+
+def column(table, attr):
+    return table.column(attr).tolist()
+
+#Both ends are the presets themselves, attributes outside the blend keep the first preset's values
+def test_blend():
+    table = wedge.blend(SILK, DENIM, 5)
+    assert table.names[0] == "Silk to Heavy Denim 000" and len(table) == 5
+    assert table.row_values(0) == SILK.sim_values() and table.row_values(4) == DENIM.sim_values()
+    assert column(table, "friction")[2] == round((SILK.friction + DENIM.friction) / 2, 3)
+    assert table.preset(2).description == "50% of the way from Silk to Heavy Denim."
+
+    partial = wedge.blend(SILK, DENIM, 3, attributes=["bounce"], prefix="Bounce")
+    assert partial.names == ["Bounce 000", "Bounce 001", "Bounce 002"]
+    assert column(partial, "bounce")[-1] == DENIM.bounce
+    assert set(column(partial, "friction")) == {SILK.friction}
+
+#Every combination of the axes, a count spreads over the whole slider range and values are clamped to it
+def test_grid():
+    table = wedge.grid(SILK, {"friction": [0.1, 0.2, 9.0], "maxIterations": 3})
+    assert len(table) == 9
+    assert column(table, "friction") == [0.1] * 3 + [0.2] * 3 + [4.0] * 3
+    assert column(table, "maxIterations")[:3] == [0, 2500, 5000]
+    assert set(column(table, "bounce")) == {SILK.bounce}
+    assert table.preset(1).description == "Silk with friction=0.1, maxIterations=2500."
+
+#Random variants stay inside the slider ranges at slider precision, the same seed gives the same batch
+def test_random_variants():
+    table = wedge.random_variants(DENIM, 200, spread=0.5, seed=3)
+    assert np.array_equal(table.values, wedge.random_variants(DENIM, 200, spread=0.5, seed=3).values)
+    for attr in SIM_ATTRIBUTES:
+        values = table.column(attr)
+        assert values.min() >= ATTRIBUTE_RANGES[attr]["min"] and values.max() <= ATTRIBUTE_RANGES[attr]["max"]
+        assert np.array_equal(values, np.round(values, 3))
+    for attr in INT_ATTRIBUTES:
+        assert set(column(table, attr)) == {getattr(DENIM, attr)}
+
+    only = wedge.random_variants(DENIM, 20, attributes=["bounce"], seed=1)
+    changed = [attr for attr in SIM_ATTRIBUTES if len(set(column(only, attr))) > 1]
+    assert changed == ["bounce"]
+
+def test_save_variants(tmp_path):
+    store = JsonManager(str(tmp_path), snapshot=False)
+    store.save_presets(dict(presets))
+    table = wedge.random_variants(SILK, 10, seed=1)
+    saved = wedge.save_variants(table, store)
+    loaded = JsonManager(str(tmp_path), snapshot=False).load_presets()
+    assert len(loaded) == len(presets) + 10
+    assert loaded["Silk Variant 009"].to_dict() == saved["Silk Variant 009"].to_dict()
+
+#Variant i goes on duplicate i in one undo step
+def test_duplicate_and_apply(host):
+    fake_maya.build_scene(1, with_ncloth=False)
+    table = wedge.grid(SILK, {"friction": [0.5, 1.0, 1.5]})
+    objects = wedge.duplicate_for_variants("garment0", 3)
+    assert objects == ["garment0_wedge000", "garment0_wedge001", "garment0_wedge002"]
+
+    queue = len(host.undo_queue)
+    results = wedge.apply_variants(table, objects)
+    assert [result["status"] for result in results] == ["applied"] * 3
+    assert len(host.undo_queue) == queue + 1
+    for obj, friction in zip(objects, [0.5, 1.0, 1.5]):
+        node = cmds.listConnections(obj + "Shape", type="nCloth")[0]
+        assert cmds.getAttr(node + ".friction") == friction
+
+    with pytest.raises(ValueError):
+        wedge.apply_variants(table, objects + ["garment0"])
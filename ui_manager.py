@@ -1,44 +1,84 @@
 import maya.cmds as cmds
 import maya.mel as mel
-import webbrowser
 import os
+import webbrowser
 
 
-from preset import Preset
+from preset import Preset, ATTRIBUTE_RANGES, SIM_ATTRIBUTES, fingerprint, quantize
 from json_manager import JsonManager
 from all_presets import presets
+from ncloth_index import get_index
+from ui_model import UiStateModel
+from name_index import NameIndex
+from startup_profile import StartupProfile
+from scene_audit import audit_scene, describe_mismatches, summarize_audit
+from preset_writer import PresetWriter
+from fingerprint_index import FingerprintIndex
+from preset_schema import describe_errors
+from attr_preset_io import attr_preset_directory, import_attr_presets, summarize_import
+from maya_paths import maya_app_dir
+from instrumentation import instrumented
+
+#Keys of the settings dictionary, in the order get_current_settings returns them
+SETTINGS_KEYS = ["name", "description"] + SIM_ATTRIBUTES
+
+#Most presets the dropdown holds at once, the filter field narrows larger libraries down
+MENU_LIMIT = 200
+
+#Most recently added presets (saved or imported) kept in the dropdown whatever their place in the library
+RECENT_LIMIT = 10
+
+#Option menu labels in index order
+SCALING_RELATION_LABELS = ["Link", "Object Space", "World Space"]
+PRESSURE_METHOD_LABELS = ["Manual Pressure Setting", "Volume Tracking Model"]
 
 # UI MANAGER CLASS #
 #######################################################################################
 class UiManager: 
     
-    def __init__(self):
+    #json_manager is the preset store shared with the caller (a lazy JsonManager is created if none is given)
+    #profile is the StartupProfile the loading phases are recorded in
+    #library is an optional LayeredLibrary merging shared studio/project libraries under the user's (json_manager is its user layer)
+    def __init__(self, json_manager=None, profile=None, library=None):
 
-        #Initialises JSON Manager which handles saving and loading presets
-        self.jsonManager = JsonManager()
+        self.profile = profile or StartupProfile()
 
-        #Checks if the JSON file exists or if it is empty (has no presets loaded into it)
-        if not os.path.exists(self.jsonManager.file_path) or os.path.getsize(self.jsonManager.file_path) == 0:
-            self.jsonManager.save_presets(presets)
+        #Initialises JSON Manager which handles saving and loading presets
+        self.jsonManager = json_manager or JsonManager(lazy=True)
 
         #Load all presets from the JSON file into a dictionary of Preset objects
-        self.loaded_presets = self.jsonManager.load_presets()  
-
-        #Checks if loading the JSON file returned nothing, if so load the default presets into the JSON
-        if not self.loaded_presets:
-            self.loaded_presets = presets
-            self.jsonManager.save_presets(self.loaded_presets)
-
-        #Checks if JSON file was just created, if so load the default presets into the JSON and marks file as not new anymore
-        if self.jsonManager.is_new_file: 
-            self.jsonManager.save_presets(presets)
-            self.jsonManager.is_new_file = False
+        #With layered libraries the built-ins are already the bottom layer, so the user library is never seeded with them
+        self.library = library
+        with self.profile.phase("load presets"):
+            if library:
+                self.loaded_presets = library.load()
+                for layer_name in library.unavailable:
+                    cmds.warning(f"PAM: The {layer_name} preset library could not be loaded in time, its presets are not shown")
+            else:
+                self.loaded_presets = self.jsonManager.load_presets()  
+
+        #Entries that didn't fit the schema were repaired or left out, say so instead of dropping them silently
+        if self.jsonManager.load_errors:
+            cmds.warning(f"PAM: {self.jsonManager.file_path}: {describe_errors(self.jsonManager.load_errors, self.loaded_presets)}")
+
+        #Checks if the JSON file was just created, is empty or loading it returned nothing, if so write the default presets into it (once)
+        if not library and (self.jsonManager.is_new_file or not self.loaded_presets):
+            with self.profile.phase("write defaults"):
+                self.loaded_presets = dict(presets)
+                self.jsonManager.save_presets(self.loaded_presets)
+                self.jsonManager.is_new_file = False
+
+        #Saves and deletes are queued and written on a background thread, through a second manager on the same file
+        self.writer = PresetWriter(self.jsonManager.reopen(), on_status=self.update_save_status)
 
         #Initialise both current and original settings dictionaries and current preset
         self.current_settings = {}
         self.original_settings = {}
         self.current_preset = self.loaded_presets["Custom"]
 
+        #Settings (description and simulation attributes) that currently differ from original_settings, kept up to date per edit
+        self.dirty_attributes = set()
+
         #Initilaise menu look-up dictionaries which map menu option names to integers
         self.scalingRel_menu = {'Link' : 0, 'Object Space' : 1, 'World Space' : 2}
         self.pressMeth_menu = {'Manual Pressure Setting' : 0, 'Volume Tracking Model' : 1}
@@ -46,6 +86,24 @@ class UiManager:
         #Store nCloth controls dictionary, to be populated later
         self.ncloth_controls = {}
 
+        #Columnar copy of the loaded presets used for similarity search, rebuilt when the library changes
+        self.preset_table = None
+
+        #Fingerprint index over the merged layers (see fingerprint_index), rebuilt when the library changes
+        self.fingerprints = None
+
+        #Search index over the library names and the dropdown's current entries (preset name -> menuItem), see update_preset_dropdown
+        self.name_index = NameIndex(self.loaded_presets)
+        self.menu_items = {}
+        self.preset_filter = ""
+
+        #Presets added since the tool opened, newest first, and the disabled "N more" entry closing the dropdown
+        self.recent_presets = []
+        self.more_item = None
+
+        #Cached values of the UI controls, updated by the change callbacks (see get_current_settings and update_UI)
+        self.ui_model = UiStateModel()
+
 #######################################################################################
 # BASIC FUNCTIONS #
 #######################################################################################    
@@ -54,58 +112,115 @@ class UiManager:
     def open_webpage(self, url):
         webbrowser.open(url)
 
-    #Check if any settings have changed compared to original preset values (excluding name) 
-    def compare_settings(self, current_settings, original_settings):
-
-        #If current_settings and original_settings dictionaries are empty, assume nothing has changed
-        if not current_settings or not original_settings:
-            return False
-
-        #Iterate over each key in current_settings and compare values
-        for key in current_settings:
-            if key != "name":
-
-                #Checks if current settings are different to original settings
-                if current_settings[key] != original_settings.get(key, None):
-
-            #Setting other than name has been changed
-                    return True
-
-        #No relevant settings have been changed
-        return False
-
-
-    #Update preset name if settings have changed (excluding name) 
-    def update_preset_name(self, preset_name, current_settings, original_settings):
-        if self.compare_settings(current_settings, original_settings):
+    #Update preset name if settings have changed (excluding name), decided from the running set of dirty attributes
+    def update_preset_name(self, preset_name):
+        if self.dirty_attributes:
 
             #Settings changed, name will be changed to Custom - "Preset Name"
             return f"Custom - {preset_name}"
         
         #If no change is found, keep original name
         return preset_name
+
+    #Record whether one setting now differs from its original value (simulation values compared at the UI precision)
+    def mark_dirty(self, attr, value):
+
+        #Nothing selected yet, so there is nothing to compare against
+        if not self.original_settings:
+            return
+
+        original = self.original_settings.get(attr)
+        if attr == "description":
+            changed = value != original
+        else:
+            changed = original is None or quantize(value) != quantize(original)
+
+        if changed:
+            self.dirty_attributes.add(attr)
+        else:
+            self.dirty_attributes.discard(attr)
+
+    #Start a new comparison baseline: the current settings become the original settings and nothing is dirty
+    def reset_original_settings(self):
+        self.original_settings = self.get_current_settings()
+        self.current_settings = self.original_settings.copy()
+        self.dirty_attributes.clear()
     
 #######################################################################################
 # SETTINGS CHANGED HANDLER #
 #######################################################################################
 
+    #Returns the change callback for one setting's control, registered once in create_UI
+    def setting_callback(self, attr):
+        return lambda *args: self.on_setting_changed(attr, *args[:1])
 
     #Callback to update the preset name in the UI when settings have changed
-    def on_setting_changed(self, *args):
+    #attr is the setting whose control changed and value its new value as passed by Maya (queried if not given)
+    #Only that setting is compared, so each edit costs the same however many settings there are
+    @instrumented("edit_setting")
+    def on_setting_changed(self, attr=None, value=None, *args):
+
+        if attr is None:
+            #No control given, re-check every setting
+            self.current_settings = self.get_current_settings(refresh=True)
+            for key in SETTINGS_KEYS[1:]:
+                self.mark_dirty(key, self.current_settings[key])
+        else:
+            #Record the changed control in the view-model and current settings
+            value = self._query_control(attr) if value is None else self._to_setting(attr, value)
+            self.ui_model.update({attr: value})
+            if not self.current_settings:
+                self.current_settings = self.get_current_settings()
+            self.current_settings[attr] = value
+            self.mark_dirty(attr, value)
 
-        #Get current settings from the UI
-        self.current_settings = self.get_current_settings()
+        #If any setting differs from the original settings, update preset name
+        self.push_settings({"name": self.update_preset_name(self.current_preset.name)})
 
-        #Compare current settings with original settings, if different update preset name
-        new_name = self.update_preset_name(self.current_preset.name, self.current_settings, self.original_settings)
+        if attr != "description":
+            self.update_closest_preset(self.current_settings)
 
-        cmds.textField(self.ncloth_controls['fieldpresetName'], edit=True, text=new_name)
+#######################################################################################
+# SIMILARITY SEARCH #
+#######################################################################################
+
+    #Returns the k library presets closest to the given settings as (name, distance) pairs, closest first
+    #Each attribute is scaled by its slider range, the search runs over the whole library as one NumPy operation
+    def find_closest_presets(self, settings, k=1):
+        return self.similarity_table().nearest(settings, k, exclude=["Custom", "Default"])
+
+    #Columnar table of the loaded presets, built on first use and dropped whenever the dropdown is rebuilt
+    def similarity_table(self):
+        if self.preset_table is None:
+            from preset_table import PresetTable
+            self.preset_table = PresetTable.from_presets(self.loaded_presets)
+        return self.preset_table
+
+    #Fingerprint index over every loaded preset, used for exact matches
+    #Without layers the library is the user's file, whose index the writer keeps up to date, otherwise it covers all merged layers
+    def fingerprint_index(self):
+        if not self.library:
+            return self.writer.fingerprint_index()
+        if self.fingerprints is None:
+            self.fingerprints = FingerprintIndex(self.loaded_presets)
+        return self.fingerprints
+
+    #Show the closest library preset to the given settings under the preset name
+    def update_closest_preset(self, settings):
+        label = self.ncloth_controls.get('closestPreset')
+        if not label:
+            return
+
+        matches = self.find_closest_presets(settings)
+        text = f"Closest to {matches[0][0]} ({matches[0][1]:.2f} away)" if matches else ""
+        cmds.text(label, edit=True, label=text)
 
 #######################################################################################
 # UI UPDATE AND PRESET SELECTION #
 #######################################################################################
 
     #Update UI based on which preset button was pressed (which preset was selected from dropdown)
+    @instrumented("select_preset")
     def select_preset(self, preset_name, *args):
 
         #Gets selected preset from presets dictionary 
@@ -119,102 +234,79 @@ class UiManager:
             self.update_UI(preset)
 
             #Store current settings as both current and original (needed for comparison later since base preset settings)
-            self.original_settings = self.get_current_settings()
-            self.current_settings = self.original_settings.copy()
+            self.reset_original_settings()
 
             ##Update preset name if settings have changed
-            updated_name = self.update_preset_name(preset_name, self.current_settings, self.original_settings)
-            cmds.textField(self.ncloth_controls['fieldpresetName'], edit=True, text=updated_name)
-
-            #Loops over all sliders and menus adding a callback so any change triggers a name change
-            for slider_name in ['bounce', 'friction', 'stretchResistance', 'compressionResistance', 'bendResistance', 'bendAngleDropoff', 
-                                'restitutionAngle', 'rigidity', 'deformResistance', 'restLengthScale', 'pointMass', 'tangentialDrag', 
-                                'damp', 'stretchDamp', 'startPressure', 'airTightness', 'incompressibility', 'maxIterations', 'pushOutRadius']:
-
-                slider = self.ncloth_controls[slider_name]
-                if cmds.floatSliderGrp(slider, exists=True):
-                    cmds.floatSliderGrp(slider, edit=True, changeCommand=lambda *_:self.on_setting_changed())
-                elif cmds.intSliderGrp(slider, exists=True):
-                    cmds.intSliderGrp(slider, edit=True, changeCommand=lambda *_:self.on_setting_changed())
-
-            for menu_name in ['scalingRelation', 'pressureMethod']:
-                menu = self.ncloth_controls[menu_name]
-                cmds.optionMenu(menu, edit=True, changeCommand=lambda *_:self.on_setting_changed())
+            updated_name = self.update_preset_name(preset_name)
+            self.push_settings({"name": updated_name})
+            self.update_closest_preset(self.current_settings)
+        elif preset_name in self.jsonManager.load_errors:
+            cmds.warning(f"Preset '{preset_name}' could not be loaded: " + "; ".join(self.jsonManager.load_errors[preset_name]))
         else:
             cmds.warning(f"Preset '{preset_name}' not found!")
 
 
     #Update UI based on values of the current preset
+    #Only controls whose value differs from what they already show are edited
     def update_UI(self, current_preset):
 
-            #Update the preset name and description in their associated text fields
-            cmds.textField(self.ncloth_controls['fieldpresetName'], edit = True, text=current_preset.name)
-            cmds.scrollField(self.ncloth_controls['fieldpresetDesc'], edit = True, text=current_preset.description)
-
-            #Update physical property sliders with current preset values
-            cmds.floatSliderGrp(self.ncloth_controls['bounce'], edit = True, value=current_preset.bounce)
-            cmds.floatSliderGrp(self.ncloth_controls['friction'], edit = True, value=current_preset.friction)
-            cmds.floatSliderGrp(self.ncloth_controls['stretchResistance'], edit = True, value=current_preset.stretchResistance)
-            cmds.floatSliderGrp(self.ncloth_controls['compressionResistance'], edit = True, value=current_preset.compressionResistance)
-            cmds.floatSliderGrp(self.ncloth_controls['bendResistance'], edit = True, value=current_preset.bendResistance)
-            cmds.floatSliderGrp(self.ncloth_controls['bendAngleDropoff'], edit = True, value=current_preset.bendAngleDropoff)
-            cmds.floatSliderGrp(self.ncloth_controls['restitutionAngle'], edit=True, value=current_preset.restitutionAngle)
-            cmds.floatSliderGrp(self.ncloth_controls['rigidity'], edit=True, value=current_preset.rigidity)
-            cmds.floatSliderGrp(self.ncloth_controls['deformResistance'], edit=True, value=current_preset.deformResistance)
-            cmds.floatSliderGrp(self.ncloth_controls['restLengthScale'], edit=True, value=current_preset.restLengthScale)
-            cmds.floatSliderGrp(self.ncloth_controls['pointMass'], edit = True, value=current_preset.pointMass)
-            cmds.floatSliderGrp(self.ncloth_controls['tangentialDrag'], edit = True, value=current_preset.tangentialDrag)
-            cmds.floatSliderGrp(self.ncloth_controls['damp'], edit = True, value=current_preset.damp)
-            cmds.floatSliderGrp(self.ncloth_controls['stretchDamp'], edit=True, value=current_preset.stretchDamp)
-
-            #Update scaling relation option menu (Converting scaling relation menu option from int to corresponding string)
-            scaling_relation_menu = ["Link", "Object Space", "World Space"]
-            scaling_relation_str = scaling_relation_menu[current_preset.scalingRelation]
-            cmds.optionMenu(self.ncloth_controls['scalingRelation'], edit = True, value=scaling_relation_str)
-
-            #Update pressure method option menu (converting pressure method menu option from int to corresponding string)
-            pressure_method_menu = ["Manual Pressure Setting", "Volume Tracking Model"]
-            pressure_method_str = pressure_method_menu[current_preset.pressureMethod]
-            cmds.optionMenu(self.ncloth_controls['pressureMethod'], edit = True, value=pressure_method_str)
-
-            #Update related pressure method related sliders
-            cmds.floatSliderGrp(self.ncloth_controls['startPressure'], edit=True, value=current_preset.startPressure)
-            cmds.floatSliderGrp(self.ncloth_controls['airTightness'], edit=True, value=current_preset.airTightness)
-            cmds.floatSliderGrp(self.ncloth_controls['incompressibility'], edit=True, value=current_preset.incompressibility)
-
-            #Update additional simulation settings (these are not related to pressure method)
-            cmds.intSliderGrp(self.ncloth_controls['maxIterations'], edit = True, value=current_preset.maxIterations)
-            cmds.floatSliderGrp(self.ncloth_controls['pushOutRadius'], edit = True, value=current_preset.pushOutRadius)
+            values = {"name": current_preset.name, "description": current_preset.description}
+            values.update(current_preset.sim_values())
+            self.push_settings(values)
+
+    #Edit the controls for the given settings, skipping any control already showing that value
+    def push_settings(self, values):
+        changed = self.ui_model.diff(values)
+        for key, value in changed.items():
+            self._set_control(key, value)
+        self.ui_model.update(changed)
 
     #Get current settings from all UI controls and return as a dictionary 
-    def get_current_settings(self): 
-        settings = {
-        "name" : cmds.textField(self.ncloth_controls['fieldpresetName'], query=True, text = True, ),
-        "description" : cmds.scrollField(self.ncloth_controls['fieldpresetDesc'], query=True, text = True),
-        "bounce" : cmds.floatSliderGrp(self.ncloth_controls['bounce'], query=True, value = True),
-        "friction": cmds.floatSliderGrp(self.ncloth_controls['friction'], query=True, value = True),
-        "stretchResistance": cmds.floatSliderGrp(self.ncloth_controls['stretchResistance'], query=True, value = True),
-        "compressionResistance": cmds.floatSliderGrp(self.ncloth_controls['compressionResistance'], query=True, value = True),
-        "bendResistance": cmds.floatSliderGrp(self.ncloth_controls['bendResistance'], query=True, value = True),
-        "bendAngleDropoff":cmds.floatSliderGrp(self.ncloth_controls['bendAngleDropoff'], query=True, value = True),
-        "restitutionAngle":cmds.floatSliderGrp(self.ncloth_controls['restitutionAngle'], query=True, value = True),
-        "rigidity":cmds.floatSliderGrp(self.ncloth_controls['rigidity'], query=True, value = True),
-        "deformResistance":cmds.floatSliderGrp(self.ncloth_controls['deformResistance'], query=True, value = True),
-        "restLengthScale":cmds.floatSliderGrp(self.ncloth_controls['restLengthScale'], query=True, value = True),
-        "pointMass":cmds.floatSliderGrp(self.ncloth_controls['pointMass'], query=True, value = True),
-        "tangentialDrag":cmds.floatSliderGrp(self.ncloth_controls['tangentialDrag'], query=True, value = True),
-        "damp":cmds.floatSliderGrp(self.ncloth_controls['damp'], query=True, value = True),
-        "stretchDamp":cmds.floatSliderGrp(self.ncloth_controls['stretchDamp'], query=True, value = True),
-        "scalingRelation": self.scalingRel_menu.get(cmds.optionMenu(self.ncloth_controls['scalingRelation'], query=True, value = True), 0),
-        "pressureMethod": self.pressMeth_menu.get(cmds.optionMenu(self.ncloth_controls['pressureMethod'], query=True, value = True), 0),
-        "startPressure":cmds.floatSliderGrp(self.ncloth_controls['startPressure'], query=True, value = True),
-        "airTightness":cmds.floatSliderGrp(self.ncloth_controls['airTightness'], query=True, value = True),
-        "incompressibility":cmds.floatSliderGrp(self.ncloth_controls['incompressibility'], query=True, value = True),
-        "maxIterations":cmds.intSliderGrp(self.ncloth_controls['maxIterations'], query=True, value=True),
-        "pushOutRadius":cmds.floatSliderGrp(self.ncloth_controls['pushOutRadius'], query=True, value = True)
-        }
-
-        return settings
+    #Served from the view-model, only controls it doesn't know yet are queried (every control with refresh=True)
+    def get_current_settings(self, refresh=False): 
+        keys = SETTINGS_KEYS if refresh else self.ui_model.missing(SETTINGS_KEYS)
+        self.ui_model.update({key: self._query_control(key) for key in keys})
+
+        return self.ui_model.snapshot(SETTINGS_KEYS)
+
+    #Convert a value reported by a control into its settings value (option menus report their label)
+    def _to_setting(self, key, value):
+        if key == "scalingRelation":
+            return self.scalingRel_menu.get(value, 0)
+        if key == "pressureMethod":
+            return self.pressMeth_menu.get(value, 0)
+        if key == "maxIterations":
+            return int(value)
+        if key in ("name", "description"):
+            return value
+        return float(value)
+
+    #Query the current value of the control for one settings key
+    def _query_control(self, key):
+        if key == "name":
+            return cmds.textField(self.ncloth_controls['fieldpresetName'], query=True, text = True)
+        if key == "description":
+            return cmds.scrollField(self.ncloth_controls['fieldpresetDesc'], query=True, text = True)
+        if key in ("scalingRelation", "pressureMethod"):
+            return self._to_setting(key, cmds.optionMenu(self.ncloth_controls[key], query=True, value = True))
+        if key == "maxIterations":
+            return cmds.intSliderGrp(self.ncloth_controls[key], query=True, value=True)
+        return cmds.floatSliderGrp(self.ncloth_controls[key], query=True, value = True)
+
+    #Edit the control for one settings key (option menus are set by label)
+    def _set_control(self, key, value):
+        if key == "name":
+            cmds.textField(self.ncloth_controls['fieldpresetName'], edit = True, text=value)
+        elif key == "description":
+            cmds.scrollField(self.ncloth_controls['fieldpresetDesc'], edit = True, text=value)
+        elif key == "scalingRelation":
+            cmds.optionMenu(self.ncloth_controls[key], edit = True, value=SCALING_RELATION_LABELS[value])
+        elif key == "pressureMethod":
+            cmds.optionMenu(self.ncloth_controls[key], edit = True, value=PRESSURE_METHOD_LABELS[value])
+        elif key == "maxIterations":
+            cmds.intSliderGrp(self.ncloth_controls[key], edit = True, value=value)
+        else:
+            cmds.floatSliderGrp(self.ncloth_controls[key], edit = True, value=value)
 
 #######################################################################################
 # COLLIDER AND TOOL ACTIONS #
@@ -222,6 +314,7 @@ class UiManager:
 
     #Apply passive collider to selected mesh
     #NOTE: Passive collider must be added to meshes the user wants the simulated asset to interact with 
+    @instrumented("apply_collider")
     def apply_collider(self):
 
         #Get current selected objects
@@ -239,32 +332,31 @@ class UiManager:
 
         #If user says yes, the passive collider is applied to the selected mesh
         if confirmation == 'Yes': 
+
+            #Skip objects that are already passive colliders (looked up in the scene index, no graph queries)
+            index = get_index()
+            objects = [obj for obj in selection if not index.collider_nodes(obj)]
             for obj in selection:
-                cmds.select(obj, replace=True) 
+                if obj not in objects:
+                    cmds.warning(f"{obj} is already a passive collider")
+
+            if objects:
+                cmds.select(objects, replace=True) 
 
                 #Use MEL command to apply passive collider to the selected mesh/es for nCloth simulation
                 mel.eval("makeCollideNCloth;")
 
     #Checks if the current UI settings match those of an existing preset, if so that preset is applied to the mesh, if no "Custom" is returned
     def does_preset_match(self, current_settings, preset):
-        preset_name = preset.name
-        match_found = True 
-
-        #Compare each parameter in current UI to specified parameters in the selected preset
-        for key in current_settings:
-            preset_attr = getattr(preset, key, None)
-
-            if current_settings[key] != preset_attr:
-                match_found = False
-        
-        #If all settings match that exact preset will be returned, if they don't then "Custom" will be returned
-        if match_found: 
-            return preset_name
+        #Settings match when their fingerprints are equal (simulation values quantised to the slider precision)
+        if fingerprint(current_settings) == preset.fingerprint():
+            return preset.name
         return "Custom"
 
     #Identifies if current UI settings match the exisitng preset, then applies either the matched preset or custom settings
+    @instrumented("apply")
     def identify_and_apply_preset(self):
-        current_settings = self.get_current_settings()
+        current_settings = self.get_current_settings(refresh=True)
         preset_matches = self.does_preset_match(current_settings, self.current_preset)
 
         preset_name = getattr(self.current_preset, "name", None)
@@ -274,12 +366,80 @@ class UiManager:
 
         #If a preset matches, apply it
         if preset_matches != "Custom":
-            self.loaded_presets[preset_matches].apply_preset()
+            self.current_preset.apply_preset()
+            return
+
+        #Otherwise check the whole library for a preset with these settings (single lookup in the fingerprint index)
+        library_matches = [name for name in self.fingerprint_index().lookup(current_settings) if name in self.loaded_presets]
+        if library_matches:
+            self.loaded_presets[library_matches[0]].apply_preset()
         else:
             #Otherwise, apply custom preset
             custom_preset = Preset(**current_settings)
             custom_preset.apply_preset()
 
+    #Reports which library preset every nCloth node in the scene uses, and the attributes that were changed from it
+    @instrumented("audit")
+    def audit_scene(self):
+        results = audit_scene(self.loaded_presets, fingerprints=self.fingerprint_index(), table=self.similarity_table())
+        if not results:
+            cmds.warning("No nCloth nodes found in the scene. ")
+            return results
+
+        #One warning names the nodes that don't match a preset exactly, the counts are shown in the viewport
+        mismatches = describe_mismatches(results)
+        if mismatches:
+            cmds.warning("PAM: " + mismatches)
+        summary = summarize_audit(results)
+        cmds.inViewMessage(assistMessage=f"Audited {summary['nodes']} nCloth node(s), {summary['exact']} match a preset, "
+                           f"{summary['nearest']} differ from their closest preset, {summary['unmatched']} unmatched",
+                           position="topCenter", fade=True)
+        return results
+
+    #Deletes a preset from the library, the name and description fields are cleared outside the view-model so they are queried again
+    def delete_preset(self, preset_name):
+        layer_name = self.library.layer_of(preset_name.strip()) if self.library else None
+        if layer_name in ("studio", "project"):
+            cmds.warning(f"Preset '{preset_name.strip()}' comes from the {layer_name} library and cannot be deleted here!")
+            return
+        Preset.delete_preset(preset_name, self.loaded_presets, self.writer, self.ncloth_controls, self.update_preset_dropdown)
+        self.ui_model.forget(["name", "description"])
+
+    #Import Maya's own nCloth presets (.mel attribute presets) from a folder, asking for it if none is given
+    #The files are parsed in a process pool and the new presets are saved together by the background writer
+    @instrumented("import")
+    def import_attr_presets(self, directory=None):
+        if directory is None:
+            start = attr_preset_directory()
+            chosen = cmds.fileDialog2(fileMode=3, dialogStyle=2, caption="Import Maya nCloth Presets",
+                                      startingDirectory=start if os.path.isdir(start) else maya_app_dir())
+            if not chosen:
+                return None
+            directory = chosen[0]
+
+        result = import_attr_presets(directory, self.writer, existing=self.loaded_presets)
+        if result["presets"]:
+            self.loaded_presets.update(result["presets"])
+            self.update_preset_dropdown(self.loaded_presets, self.ncloth_controls)
+        cmds.inViewMessage(assistMessage=summarize_import(result), position="topCenter", fade=True)
+        if result["skipped"]:
+            cmds.warning(f"PAM: {len(result['skipped'])} Maya preset file(s) were not imported, e.g. "
+                         + "; ".join(f"{os.path.basename(path)}: {reason}" for path, reason in list(result["skipped"].items())[:3]))
+        return result
+
+    #Writer status callback (runs on the main thread), shows whether saves are queued, being written or failed
+    def update_save_status(self, status):
+        label = self.ncloth_controls.get('saveStatus')
+        if label:
+            cmds.text(label, edit=True, label=self.writer.status_text())
+
+    #Stops the tool's background work when its window is closed
+    #Queued saves are written first, layer loads still waiting on a share are dropped
+    def close(self):
+        self.writer.close()
+        if self.library:
+            self.library.close()
+
     #Resets tool to default values (This is defined in presets dictionary in all_presets)
     def reset_tool(self):
         #Get default custom preset
@@ -290,33 +450,69 @@ class UiManager:
         self.update_UI(custom_preset)
 
         #Store current settings as orginal and make a copy for comparison in other functions
-        self.original_settings = self.get_current_settings()
-        self.current_settings = self.original_settings.copy()
+        self.reset_original_settings()
 
         #Update preset dropdown to show "Custom"
         cmds.optionMenu(self.ncloth_controls['presetDropdown'], edit=True, value="Custom")
 
-    #Creates buttons in the dropdown for each preset from the preset dictionary and adds them to the UI
-    #Once all items are cleared the dropdown is then filled with all the preset names from the presets dicitonary (except "Default")
+    #Keeps the dropdown in step with the library and the filter field
+    #Only presets added or removed since the last update get menu items created or deleted, and at most MENU_LIMIT are shown
+    #"Custom", the current preset and the newest presets are always listed if they match the filter, "Default" never is
+    #Matches that don't fit are counted in a disabled "N more, refine filter" entry at the end
     def update_preset_dropdown(self, loaded_presets, ncloth_controls):
         dropdown = ncloth_controls.get('presetDropdown')
 
+        #The library changed, so the similarity search table and the merged fingerprint index have to be rebuilt
+        self.preset_table = None
+        self.fingerprints = None
+        added = self.name_index.sync(loaded_presets)
+        self.recent_presets = (added[::-1] + [name for name in self.recent_presets if name in loaded_presets])[:RECENT_LIMIT]
+
         if not dropdown:
             return
 
-        #Clear existing menu items
-        menu_items = cmds.optionMenu(dropdown, query=True, itemListLong=True) or []
-        for item in menu_items:
-            cmds.deleteUI(item)
-
-        #Repopulate dropdown with all menu items except Default 
-        for preset_name in loaded_presets.keys():
-
-            if not preset_name or preset_name == "Default":
-
-                continue
-
-            cmds.menuItem(label=preset_name, parent=dropdown)
+        #Presets to show: Custom, the current and newest presets, then filter matches in library order
+        text = self.preset_filter.lower()
+        current = getattr(self.current_preset, "name", None)
+        pinned = [name for name in [current] + self.recent_presets if name in loaded_presets and text in name.lower()]
+        matches = self.name_index.search(self.preset_filter, MENU_LIMIT + 2)
+        shown = ["Custom"] if "Custom" in loaded_presets else []
+        for preset_name in dict.fromkeys(pinned + matches):
+            if preset_name and preset_name not in ("Default", "Custom") and len(shown) < MENU_LIMIT:
+                shown.append(preset_name)
+
+        #Matches that didn't fit, every match is only counted when the limited search was cut short
+        if len(matches) < MENU_LIMIT + 2:
+            total = sum(1 for name in matches if name not in ("Default", "Custom"))
+        elif not text:
+            total = len(self.name_index) - sum(1 for name in ("Default", "Custom") if name in self.name_index)
+        else:
+            total = sum(1 for name in self.name_index.search(self.preset_filter) if name not in ("Default", "Custom"))
+        hidden = total - (len(shown) - ("Custom" in shown))
+
+        #Delete menu items of presets no longer shown
+        for preset_name in [name for name in self.menu_items if name not in shown]:
+            cmds.deleteUI(self.menu_items.pop(preset_name))
+
+        #Add menu items for newly shown presets
+        created = False
+        for preset_name in shown:
+            if preset_name not in self.menu_items:
+                self.menu_items[preset_name] = cmds.menuItem(label=preset_name, parent=dropdown)
+                created = True
+
+        #The "more" entry is recreated after new items so it stays last
+        label = f"{hidden} more, refine filter" if hidden > 0 else None
+        if self.more_item and (created or label != self.more_item[1]):
+            cmds.deleteUI(self.more_item[0])
+            self.more_item = None
+        if label and not self.more_item:
+            self.more_item = (cmds.menuItem(label=label, enable=False, parent=dropdown), label)
+
+    #Filter field callback, shows only presets whose name starts with or contains the text
+    def filter_presets(self, text, *args):
+        self.preset_filter = text.strip()
+        self.update_preset_dropdown(self.loaded_presets, self.ncloth_controls)
 
 #######################################################################################
 # UI CREATION #
@@ -336,7 +532,8 @@ class UiManager:
             cmds.deleteUI('win_maya_ui_dock', window=True)
 
         #Creating Main Window
-        cmds.workspaceControl(dock_name, label="P.A.M.", retain=False, floating=True, width=800, height=900)
+        cmds.workspaceControl(dock_name, label="P.A.M.", retain=False, floating=True, width=800, height=900,
+                              closeCommand=lambda *args: self.close())
 
         #Main layout for UI window with tool title and top buttons
         cmds.columnLayout("mainColumnLayout", adj=True)
@@ -352,17 +549,22 @@ class UiManager:
 
         #CHANGED FROM SCROLL LAYOUT TO DROPDOWN BASED OFF OF USER TESTING SESSION
         cmds.separator(h=10, style='none')
-        cmds.rowLayout(numberOfColumns=4)
+        cmds.rowLayout(numberOfColumns=5)
         cmds.text(label="", width=113)
         cmds.text(label="Type:")
         self.presetDropdown = cmds.optionMenu("presetDropdown", width=200, 
                                               changeCommand = lambda x: self.select_preset(cmds.optionMenu("presetDropdown",query=True, value=True), self.ncloth_controls, self.scalingRel_menu, self.pressMeth_menu))
-        for preset_name in self.loaded_presets.keys():
-            if preset_name != "Default":
-                cmds.menuItem(label=preset_name)
         cmds.button(label="Delete Preset", height=17,
-                    command=lambda *_: Preset.delete_preset(cmds.optionMenu(self.presetDropdown, query=True, value=True),
-                                                            self.loaded_presets, self.jsonManager, self.ncloth_controls, self.update_preset_dropdown))
+                    command=lambda *_: self.delete_preset(cmds.optionMenu(self.presetDropdown, query=True, value=True)))
+        cmds.button(label="Import Maya Presets", height=17, command=lambda *_: self.import_attr_presets())
+        cmds.setParent("..")
+
+        #Typeahead filter for the dropdown, needed once the library is bigger than MENU_LIMIT
+        cmds.rowLayout(numberOfColumns=3)
+        cmds.text(label="", width=107)
+        cmds.text(label="Search:")
+        self.presetFilter = cmds.textField("presetFilter", pht="Filter presets...", width=200,
+                                           textChangedCallback=lambda text: self.filter_presets(text))
         cmds.setParent("..")
 
         #Creation of simulation settings input fields and sliders
@@ -372,14 +574,19 @@ class UiManager:
         cmds.rowLayout(numberOfColumns=3)
         cmds.text(label="", width=76)
         cmds.text(label="Preset Name:")
-        self.fieldpresetName = cmds.textField("fieldpresetName", pht="Name...", width=200)
+        self.fieldpresetName = cmds.textField("fieldpresetName", pht="Name...", width=200,
+                                              changeCommand=lambda text: self.ui_model.update({"name": text}))
 
+        cmds.setParent("..")
+        cmds.rowLayout(numberOfColumns=2)
+        cmds.text(label="", width=148)
+        self.closestPreset = cmds.text("closestPreset", label="")
         cmds.setParent("..")
         cmds.separator(h=10, style='none')
         cmds.rowLayout(numberOfColumns=3)
         cmds.text(label="", width=52)
         cmds.text(label="Preset Description:")
-        self.fieldpresetDesc = cmds.scrollField("fieldpresetDesc", w=300, h=45, ww=True, nl=3, font="plainLabelFont")
+        self.fieldpresetDesc = cmds.scrollField("fieldpresetDesc", w=300, h=45, ww=True, nl=3, font="plainLabelFont", changeCommand=self.setting_callback("description"))
         cmds.setParent("..")
 
         cmds.separator(h=10, style='none')
@@ -390,26 +597,27 @@ class UiManager:
         sim_type = cmds.text(label="nCloth")
         cmds.setParent("..")
 
+        #Every setting's change callback is registered once here and passes which setting changed
         cmds.separator(h=10, style='none')
-        self.bounce = cmds.floatSliderGrp(l= "Bounce", min = 0.000, max = 1.000, field = True, step=0.01, precision=3)
-        self.friction = cmds.floatSliderGrp(l = "Friction", min = 0.0, max = 4.0, field = True, step=0.01, precision=3)
-        self.stretch_res = cmds.floatSliderGrp(l = "Stretch Resistance", min = 0, max = 200, field = True, step=0.01, precision=3)
-        self.comp_res = cmds.floatSliderGrp(l = "Compression Resistance", min = 0, max = 200, field = True, step=0.01, precision=3)
-        self.bend_res = cmds.floatSliderGrp(l = "Bend Resistance", min = 0, max = 200, field = True, step=0.01, precision=3)
-        self.bend_ang_do = cmds.floatSliderGrp(l = "Bend Angle Dropoff", min = 0, max = 1, field = True, step=0.01, precision=3)
-        self.restitution_ang = cmds.floatSliderGrp(l= "Restitution Angle", min = 0, max =720.0, field = True, step=0.01, precision=3)
-        self.rigidity =  cmds.floatSliderGrp(l= "Rigidity", min = 0, max = 10, field = True, step=0.01, precision=3)
-        self.deform_res = cmds.floatSliderGrp(l="Deform Resistance", min = 0, max = 10, field = True, step=0.01, precision=3)
-        self.rest_len_scale = cmds.floatSliderGrp(l = "Rest Length Scale", min = 0, max = 2, field=True, step=0.01, precision=3)
-        self.mass = cmds.floatSliderGrp(l = "Mass", min = 0, max = 50, field = True, step=0.01, precision=3)
-
-        self.tang_drag = cmds.floatSliderGrp(l = "Tangential Drag", min = 0, max = 1, field = True, step=0.01, precision=3)
-        self.damp = cmds.floatSliderGrp(l = "Damp", min = 0, max = 10, field = True, step=0.01, precision=3)
-        self.stretch_damp = cmds.floatSliderGrp(l = "Stretch Damp", min = 0, max =10, field = True, step=0.01, precision=3)
+        self.bounce = cmds.floatSliderGrp(l= "Bounce", **ATTRIBUTE_RANGES["bounce"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("bounce"))
+        self.friction = cmds.floatSliderGrp(l = "Friction", **ATTRIBUTE_RANGES["friction"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("friction"))
+        self.stretch_res = cmds.floatSliderGrp(l = "Stretch Resistance", **ATTRIBUTE_RANGES["stretchResistance"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("stretchResistance"))
+        self.comp_res = cmds.floatSliderGrp(l = "Compression Resistance", **ATTRIBUTE_RANGES["compressionResistance"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("compressionResistance"))
+        self.bend_res = cmds.floatSliderGrp(l = "Bend Resistance", **ATTRIBUTE_RANGES["bendResistance"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("bendResistance"))
+        self.bend_ang_do = cmds.floatSliderGrp(l = "Bend Angle Dropoff", **ATTRIBUTE_RANGES["bendAngleDropoff"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("bendAngleDropoff"))
+        self.restitution_ang = cmds.floatSliderGrp(l= "Restitution Angle", **ATTRIBUTE_RANGES["restitutionAngle"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("restitutionAngle"))
+        self.rigidity =  cmds.floatSliderGrp(l= "Rigidity", **ATTRIBUTE_RANGES["rigidity"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("rigidity"))
+        self.deform_res = cmds.floatSliderGrp(l="Deform Resistance", **ATTRIBUTE_RANGES["deformResistance"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("deformResistance"))
+        self.rest_len_scale = cmds.floatSliderGrp(l = "Rest Length Scale", **ATTRIBUTE_RANGES["restLengthScale"], field=True, step=0.01, precision=3, changeCommand=self.setting_callback("restLengthScale"))
+        self.mass = cmds.floatSliderGrp(l = "Mass", **ATTRIBUTE_RANGES["pointMass"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("pointMass"))
+
+        self.tang_drag = cmds.floatSliderGrp(l = "Tangential Drag", **ATTRIBUTE_RANGES["tangentialDrag"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("tangentialDrag"))
+        self.damp = cmds.floatSliderGrp(l = "Damp", **ATTRIBUTE_RANGES["damp"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("damp"))
+        self.stretch_damp = cmds.floatSliderGrp(l = "Stretch Damp", **ATTRIBUTE_RANGES["stretchDamp"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("stretchDamp"))
 
         cmds.rowLayout(numberOfColumns=2)
         cmds.text(label="", width=61)
-        self.scaling_rel = cmds.optionMenu(l="Scaling Relation", width=200)
+        self.scaling_rel = cmds.optionMenu(l="Scaling Relation", width=200, changeCommand=self.setting_callback("scalingRelation"))
         cmds.menuItem(l="Link")
         cmds.menuItem(l="Object Space")
         cmds.menuItem(l="World Space")  
@@ -417,21 +625,22 @@ class UiManager:
 
         cmds.rowLayout(numberOfColumns=2)
         cmds.text(label="", width=55)
-        self.press_meth = cmds.optionMenu(l="Pressure Method", width=250)
+        self.press_meth = cmds.optionMenu(l="Pressure Method", width=250, changeCommand=self.setting_callback("pressureMethod"))
         cmds.menuItem(l="Manual Pressure Setting")
         cmds.menuItem(l="Volume Tracking Model")
         cmds.setParent("..")
 
-        self.start_press = cmds.floatSliderGrp(l = "Start Pressure", min = -1, max =1, field = True, step=0.01, precision=3)
-        self.air_tight = cmds.floatSliderGrp(l="Air Tightness", min = 0.000, max = 1.000, field = True, step=0.01, precision=3)
-        self.incomp = cmds.floatSliderGrp(l="Incompressibility", min = 0.000, max = 200.000, field = True, step=0.01, precision=3)
-        self.max_ite = cmds.intSliderGrp(l = "Max Iterations", min = 0, max = 5000, field = True)
-        self.po_rad = cmds.floatSliderGrp(l = "Push Out Radius", min = -1, max = 10, field = True, step=0.01, precision=3)
+        self.start_press = cmds.floatSliderGrp(l = "Start Pressure", **ATTRIBUTE_RANGES["startPressure"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("startPressure"))
+        self.air_tight = cmds.floatSliderGrp(l="Air Tightness", **ATTRIBUTE_RANGES["airTightness"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("airTightness"))
+        self.incomp = cmds.floatSliderGrp(l="Incompressibility", **ATTRIBUTE_RANGES["incompressibility"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("incompressibility"))
+        self.max_ite = cmds.intSliderGrp(l = "Max Iterations", **ATTRIBUTE_RANGES["maxIterations"], field = True, changeCommand=self.setting_callback("maxIterations"))
+        self.po_rad = cmds.floatSliderGrp(l = "Push Out Radius", **ATTRIBUTE_RANGES["pushOutRadius"], field = True, step=0.01, precision=3, changeCommand=self.setting_callback("pushOutRadius"))
 
         #nCloth controls stored in a dictionary for later use
         self.ncloth_controls = {
                        'fieldpresetName' : self.fieldpresetName,
                        'fieldpresetDesc' : self.fieldpresetDesc,
+                       'closestPreset' : self.closestPreset,
                        'bounce' : self.bounce,
                        'friction' : self.friction,
                        'stretchResistance' : self.stretch_res,
@@ -458,21 +667,28 @@ class UiManager:
         #Defined AFTER ncloth_controls and stored as a variable so dropdown can be updated dynamically
         self.ncloth_controls['presetDropdown'] = self.presetDropdown
 
-        #Buttons for saving custom, applying collider and applying preset
+        #Buttons for saving custom, applying collider, auditing the scene and applying preset
         cmds.columnLayout("mainColumnLayout", adj=True)
         cmds.separator(h=5, style='none')  
-        cmds.rowLayout(nc=3,columnWidth=[(1, 200), (2,200), (3,200)], columnAttach=[(1, 'both', 1), (2, 'both', 1), (3, 'both', 1)])
+        cmds.rowLayout(nc=4,columnWidth=[(1, 150), (2,150), (3,150), (4,150)], columnAttach=[(1, 'both', 1), (2, 'both', 1), (3, 'both', 1), (4, 'both', 1)])
         cmds.button(label = "Save Custom", width =150, command = lambda *args: Preset.save_preset(
-            self.get_current_settings(),
-            self.jsonManager,
+            self.get_current_settings(refresh=True),
+            self.writer,
             self.ncloth_controls,
-            self.update_preset_dropdown, self.loaded_presets))
+            self.update_preset_dropdown, self.loaded_presets, self.fingerprint_index()))
         cmds.button(label = "Apply Collider", width =150, command = lambda x: self.apply_collider())
+        cmds.button(label = "Audit Scene", width =150, command = lambda x: self.audit_scene())
         cmds.button(label = "Apply", width =150, command = lambda x: self.identify_and_apply_preset())
         cmds.setParent("..")
 
-        #Update the dropdown menu for presets with new/custom presets added by the user 
-        self.update_preset_dropdown(self.loaded_presets, self.ncloth_controls)
+        #Background save status (see update_save_status)
+        self.ncloth_controls['saveStatus'] = cmds.text("saveStatus", label="", align="left")
+
+        #Fill the dropdown menu with the presets (this is its only full build, later updates only apply changes)
+        self.menu_items = {}
+        self.more_item = None
+        with self.profile.phase("fill dropdown"):
+            self.update_preset_dropdown(self.loaded_presets, self.ncloth_controls)
 
         #Show UI window
         cmds.workspaceControl(dock_name, edit=True, width=800, height=900)
@@ -0,0 +1,37 @@
+# UI STATE MODEL CLASS #
+# Cached copy of the values shown in the PAM controls, kept current by the change callbacks #
+# Lets the UI push only values that differ and answer "what are the current settings" without querying widgets #
+#######################################################################################
+
+class UiStateModel:
+
+    def __init__(self):
+
+        #Settings key (name, description or simulation attribute) -> value currently shown in its control
+        self.values = {}
+
+    #Return the entries of values that differ from what the controls currently show (or that aren't known yet)
+    def diff(self, values):
+        return {key: value for key, value in values.items() if key not in self.values or self.values[key] != value}
+
+    #Record values now shown in the controls
+    def update(self, values):
+        self.values.update(values)
+
+    #Return the keys whose control value isn't known yet
+    def missing(self, keys):
+        return [key for key in keys if key not in self.values]
+
+    #Forget some (or all) values, e.g. after controls were edited outside the model, so they are queried again
+    def forget(self, keys=None):
+        if keys is None:
+            self.values.clear()
+            return
+        for key in keys:
+            self.values.pop(key, None)
+
+    #Return the known values for the given keys as a new dictionary
+    def snapshot(self, keys):
+        return {key: self.values[key] for key in keys}
+
+#######################################################################################
@@ -0,0 +1,103 @@
+import numpy as np
+import maya.cmds as cmds
+
+#Import classes
+from preset import ATTRIBUTE_RANGES, FINGERPRINT_PRECISION, INT_ATTRIBUTES, SIM_ATTRIBUTES
+from preset_table import COLUMN, PresetTable
+from apply_engine import apply_presets
+
+# WEDGING #
+# Generates preset variants for parameter sweeps: blends between two presets, grids and random samples around one #
+# Every batch is computed as one NumPy array and returned as a PresetTable, values are kept inside the UI slider ranges #
+#######################################################################################
+
+RANGE_LOW = np.array([ATTRIBUTE_RANGES[attr]["min"] for attr in SIM_ATTRIBUTES], dtype=np.float64)
+RANGE_HIGH = np.array([ATTRIBUTE_RANGES[attr]["max"] for attr in SIM_ATTRIBUTES], dtype=np.float64)
+INT_COLUMNS = [COLUMN[attr] for attr in INT_ATTRIBUTES]
+
+def _base_values(preset):
+    return np.array([getattr(preset, attr) for attr in SIM_ATTRIBUTES], dtype=np.float64)
+
+#Clamp every row to the slider ranges, round to the slider precision (whole numbers for int attributes) and wrap the rows in a PresetTable
+#describe(row, values) returns the description of one variant, only called when descriptions are first needed
+def _variant_table(prefix, values, describe):
+    values = np.round(np.clip(values, RANGE_LOW, RANGE_HIGH), FINGERPRINT_PRECISION)
+    values[:, INT_COLUMNS] = np.round(values[:, INT_COLUMNS])
+    width = max(3, len(str(len(values))))
+    names = [f"{prefix} {i:0{width}d}" for i in range(len(values))]
+    return PresetTable(names, values, descriptions=lambda: [describe(row, row_values) for row, row_values in enumerate(values.tolist())])
+
+#######################################################################################
+# GENERATORS #
+#######################################################################################
+
+#count presets going in even steps from preset a to preset b (both included)
+#attributes limits the blend to those attributes, the others keep a's values
+def blend(a, b, count, attributes=None, prefix=None):
+    start = _base_values(a)
+    end = _base_values(b)
+    if attributes is not None:
+        mask = np.zeros(len(SIM_ATTRIBUTES), dtype=bool)
+        mask[[COLUMN[attr] for attr in attributes]] = True
+        end = np.where(mask, end, start)
+
+    weights = np.linspace(0.0, 1.0, count)[:, None]
+    values = start + weights * (end - start)
+    weights = weights[:, 0].tolist()
+    return _variant_table(prefix or f"{a.name} to {b.name}", values,
+                          lambda row, row_values: f"{weights[row]:.0%} of the way from {a.name} to {b.name}.")
+
+#Every combination of the given attribute values around a base preset
+#axes maps attribute -> list of values, or -> a number of evenly spaced values over the attribute's whole slider range
+def grid(base, axes, prefix=None):
+    attributes = list(axes)
+    steps = []
+    for attr in attributes:
+        values = axes[attr]
+        if isinstance(values, int):
+            values = np.linspace(ATTRIBUTE_RANGES[attr]["min"], ATTRIBUTE_RANGES[attr]["max"], values)
+        steps.append(np.asarray(values, dtype=np.float64))
+
+    combinations = np.stack([axis.ravel() for axis in np.meshgrid(*steps, indexing="ij")], axis=1)
+    values = np.repeat(_base_values(base)[None, :], len(combinations), axis=0)
+    values[:, [COLUMN[attr] for attr in attributes]] = combinations
+
+    columns = [COLUMN[attr] for attr in attributes]
+    return _variant_table(prefix or f"{base.name} Grid", values,
+                          lambda row, row_values: f"{base.name} with " + ", ".join(f"{attr}={row_values[column]:g}"
+                                                                                   for attr, column in zip(attributes, columns)) + ".")
+
+#count random variants of a base preset, each attribute moved by up to spread x its slider range (uniformly)
+#attributes limits the variation to those attributes (all float attributes by default), seed makes the batch repeatable
+def random_variants(base, count, attributes=None, spread=0.1, seed=None, prefix=None):
+    if attributes is None:
+        attributes = [attr for attr in SIM_ATTRIBUTES if attr not in INT_ATTRIBUTES]
+    columns = [COLUMN[attr] for attr in attributes]
+
+    rng = np.random.default_rng(seed)
+    values = np.repeat(_base_values(base)[None, :], count, axis=0)
+    values[:, columns] += rng.uniform(-spread, spread, (count, len(columns))) * (RANGE_HIGH - RANGE_LOW)[columns]
+    return _variant_table(prefix or f"{base.name} Variant", values,
+                          lambda row, row_values: f"Random variant of {base.name} ({spread:.0%} spread).")
+
+#######################################################################################
+# SAVE AND APPLY #
+#######################################################################################
+
+#Save a batch of variants with one bulk write (any store with add_presets: JsonManager, SqliteManager, PresetWriter)
+def save_variants(table, store):
+    presets = table.to_presets()
+    store.add_presets(presets)
+    return presets
+
+#Duplicate an object once per variant, returns the new object names in variant order
+def duplicate_for_variants(obj, count):
+    return [cmds.duplicate(obj, name=f"{obj}_wedge{i:03d}")[0] for i in range(count)]
+
+#Apply variant i to object i through the batch apply path (one undo step, rolled back if any write fails)
+def apply_variants(table, objects, transactional=True):
+    if len(objects) > len(table):
+        raise ValueError(f"{len(objects)} objects but only {len(table)} variants")
+    return apply_presets([(obj, table.preset(row)) for row, obj in enumerate(objects)], transactional=transactional)
+
+#######################################################################################